@@ -1,15 +1,14 @@
 """
 GNN-OPF: Graph Neural Network-based Optimal Power Flow solver
+
+Submodules are imported on first attribute access (``gnn_opf.train_gnn``),
+so ``import gnn_opf`` stays cheap and only the dependencies of the modules
+actually used get loaded.
 """
 
-__version__ = "0.1.0"
+import importlib
 
-from . import pypsa_data_generation
-from . import baseline_opf
-from . import train_gnn
-from . import evaluate_gnn
-from . import gnn_opf
-from .data import graph_data
+__version__ = "0.1.0"
 
 __all__ = [
     "pypsa_data_generation",
@@ -17,5 +16,26 @@ __all__ = [
     "train_gnn",
     "evaluate_gnn",
     "gnn_opf",
-    "graph_data",
-] 
\ No newline at end of file
+    "data",
+    "inference_pipeline",
+    "inference_engine",
+    "inference_service",
+    "inference_cache",
+    "contingency",
+    "distributed",
+    "partition",
+    "benchmark",
+    "instrumentation",
+    "export",
+    "dc_opf",
+    "hybrid_opf",
+    "checkpoint",
+]
+
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -1,30 +1,103 @@
-import csv
+import os
+from pathlib import Path
+import numpy as np
+import pandas as pd
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from torch.utils.data import Dataset, DataLoader
+from torch.utils.data import BatchSampler, Dataset, DataLoader, RandomSampler, SequentialSampler
+from gnn_opf.data.scenario_io import is_parquet_path, read_scenario_table
 
-# Define a simple dataset class that reads the generated CSV file.
+# Columns stored for each sample: the two features followed by the target.
+SAMPLE_COLUMNS = ["scenario", "bus1_load", "total_cost"]
+
+def _cache_path(csv_file):
+    return Path(str(csv_file) + ".cache.npy")
+
+def _stamp_path(csv_file):
+    return Path(str(csv_file) + ".cache.stamp")
+
+def _csv_stamp(csv_file):
+    """Size and modification time of a CSV, which identify the version the cache was built from."""
+    stat = Path(csv_file).stat()
+    return f"{stat.st_size} {stat.st_mtime_ns}"
+
+def _read_stamp(csv_file):
+    try:
+        return _stamp_path(csv_file).read_text()
+    except OSError:
+        return None
+
+def _load_sample_array(csv_file, use_cache=True):
+    """
+    Load the [num_samples, 3] float32 sample array of a scenario file.
+
+    CSV files are parsed once with pandas and the result is saved as a binary
+    .npy cache next to the CSV, which later loads memory-map instead of
+    re-parsing. The size and mtime of the CSV it was built from are stored in
+    a .cache.stamp file, and the cache is rebuilt unless both still match.
+    Parquet datasets are read by column projection and never cached.
+    """
+    if is_parquet_path(csv_file):
+        table = read_scenario_table(csv_file, columns=SAMPLE_COLUMNS)
+        return np.stack([table.column(name).to_numpy() for name in SAMPLE_COLUMNS], axis=1).astype(np.float32)
+
+    cache = _cache_path(csv_file)
+    # Taken before parsing, so a CSV rewritten meanwhile does not match the stamp.
+    stamp = _csv_stamp(csv_file)
+    if use_cache and cache.exists() and _read_stamp(csv_file) == stamp:
+        # Copy-on-write mapping: pages are shared and torch gets a writable buffer.
+        return np.load(cache, mmap_mode="c")
+
+    samples = pd.read_csv(csv_file, usecols=SAMPLE_COLUMNS, dtype=np.float32)[SAMPLE_COLUMNS].to_numpy()
+    samples = np.ascontiguousarray(samples)
+    if use_cache:
+        try:
+            tmp = cache.with_name(cache.name + ".tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, samples)
+            os.replace(tmp, cache)
+            tmp = _stamp_path(csv_file).with_name(_stamp_path(csv_file).name + ".tmp")
+            tmp.write_text(stamp)
+            os.replace(tmp, _stamp_path(csv_file))
+        except OSError:
+            # Read-only data directory: serve the parsed array from memory.
+            pass
+    return samples
+
+# Define a simple dataset class that reads the generated CSV file (or Parquet scenario dataset).
 class OPFDataset(Dataset):
-    def __init__(self, csv_file):
-        self.samples = []
-        with open(csv_file, "r") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # Read both the scenario number and bus1_load as float features.
-                feature1 = float(row["scenario"])
-                feature2 = float(row["bus1_load"])
-                target = float(row["total_cost"])
-                # Combine them into a list of features.
-                self.samples.append(([feature1, feature2], target))
+    """
+    Scenario features (scenario number, bus1_load) and total_cost targets held as contiguous tensors.
+
+    Indexing with an int returns one sample; indexing with a slice, list or
+    tensor of indices returns a whole batch in one gather, which is what
+    batch_loader uses to avoid per-sample __getitem__ calls.
+    """
+    def __init__(self, csv_file, use_cache=True):
+        samples = torch.from_numpy(_load_sample_array(csv_file, use_cache))
+        self.features = samples[:, :2]
+        self.targets = samples[:, 2:]
     
     def __len__(self):
-        return len(self.samples)
+        return self.features.size(0)
     
     def __getitem__(self, idx):
-        features, target = self.samples[idx]
-        # Convert to tensors; model now expects a 2D input.
-        return torch.tensor(features, dtype=torch.float), torch.tensor([target], dtype=torch.float)
+        if isinstance(idx, (list, np.ndarray)):
+            idx = torch.as_tensor(idx, dtype=torch.long)
+        # The model expects 2D input: [batch, 2] features and [batch, 1] targets.
+        return self.features[idx], self.targets[idx]
+
+def batch_loader(dataset, batch_size=4, shuffle=True, drop_last=False):
+    """
+    Create a DataLoader that fetches whole batches from an OPFDataset by slicing.
+
+    The sampler yields lists of indices and auto-collation is disabled, so each
+    batch is a single dataset[indices] gather instead of batch_size separate
+    __getitem__ calls followed by collation.
+    """
+    sampler = RandomSampler(dataset) if shuffle else SequentialSampler(dataset)
+    return DataLoader(dataset, sampler=BatchSampler(sampler, batch_size, drop_last), batch_size=None)
 
 # Define a simple MLP model.
 class BaselineOPFModel(nn.Module):
@@ -42,7 +115,7 @@ class BaselineOPFModel(nn.Module):
 # Define a training function.
 def train_baseline_model(csv_file, epochs=50, batch_size=4, learning_rate=0.01):
     dataset = OPFDataset(csv_file)
-    dataloader = DataLoader(dataset, batch_size=batch_size, shuffle=True)
+    dataloader = batch_loader(dataset, batch_size=batch_size, shuffle=True)
     model = BaselineOPFModel()
     criterion = nn.MSELoss()
     optimizer = optim.Adam(model.parameters(), lr=learning_rate)
@@ -0,0 +1,386 @@
+"""
+Benchmark harness for the GNN-OPF pipeline.
+
+Sweeps the pandapower cases of get_case_function_map (case4gs up to
+case9241pegase by default) and several batch sizes over these benchmarks:
+
+  - case_load:        pandapower case construction (load_power_network)
+  - graph_build:      topology extraction and PyG conversion from a loaded network
+  - load_network_as_pyg: the cached load path used by the pipeline
+  - train_step:       one shared-topology optimizer step (forward, penalty, backward, Adam)
+  - inference:        a no-grad shared-topology forward pass
+  - train_gnn:        end-to-end train_gnn epoch on a synthetic case14 CSV
+  - evaluate_model:   end-to-end evaluate_model on a synthetic case14 CSV
+  - generate_opf_scenarios: DC OPF scenario generation (small cases only)
+  - import_gnn_opf:   ``import gnn_opf`` in a fresh interpreter
+  - import_serving:   importing the model and InferenceEngine in a fresh interpreter
+
+The import benchmarks run a new Python process per repeat, so their wall
+time includes interpreter startup and nothing is served from sys.modules;
+like the end-to-end benchmarks they are recorded under case14 only.
+
+Every (benchmark, case, batch size) point runs in a freshly forked process,
+so its peak RSS is not inflated by earlier points. Where the kernel allows it
+the inherited peak is reset first; start_rss_mb records the RSS inherited
+from the parent. Timing repeats report the median wall time; one extra run
+under tracemalloc records the peak Python heap allocation and the net number
+of allocated blocks (torch tensor storage is not traced by tracemalloc, the
+RSS captures it).
+
+Results are written as JSON and can be stored as a baseline; later runs are
+compared against it and regressions beyond a tolerance are reported:
+
+    python -m gnn_opf.benchmark --save-baseline
+    python -m gnn_opf.benchmark --cases case14 case118 --batch-sizes 1 64
+"""
+
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import torch
+
+DEFAULT_OUTPUT = "data/benchmarks/latest.json"
+DEFAULT_BASELINE = "data/benchmarks/baseline.json"
+DEFAULT_BATCH_SIZES = (1, 32, 256)
+# Scenario generation solves one OPF per scenario; larger cases take minutes.
+GENERATION_MAX_BUSES = 300
+GENERATION_SCENARIOS = 8
+EVALUATION_ROWS = 20000
+TRAINING_ROWS = 2048
+
+def default_cases():
+    """Cases from case4gs up to case9241pegase, in get_case_function_map order."""
+    from gnn_opf.data.power_networks import get_case_function_map
+    cases = list(get_case_function_map())
+    return cases[:cases.index("case9241pegase") + 1]
+
+def _write_scenario_csv(path, num_rows):
+    with open(path, "w") as f:
+        f.write("scenario,total_cost,bus1_load\n")
+        for i in range(num_rows):
+            f.write(f"{i % 10},{8000.0 + i},{20.0 + i % 7}\n")
+
+def _setup_case_load(case, batch_size, workdir):
+    from gnn_opf.data.power_networks import load_power_network
+    return (lambda: load_power_network(case)), 1
+
+def _setup_graph_build(case, batch_size, workdir):
+    from gnn_opf.data.power_networks import build_topology, load_power_network
+    net = load_power_network(case)
+    return (lambda: build_topology(net, case).to_pyg_data()), 1
+
+def _setup_load_network_as_pyg(case, batch_size, workdir):
+    from gnn_opf.data.power_networks import load_network_as_pyg, load_topology
+    load_network_as_pyg(case)
+
+    def run():
+        load_topology.cache_clear()
+        return load_network_as_pyg(case)
+    return run, 1
+
+def _shared_inputs(case, batch_size):
+    from gnn_opf.data.power_networks import load_topology
+    from gnn_opf.gnn_opf import normalized_adjacency
+    topology = load_topology(case)
+    adjacency = normalized_adjacency(topology.edge_index, topology.num_nodes)
+    loads = topology.load_p_mw.expand(batch_size, -1) * torch.linspace(0.7, 1.3, batch_size)[:, None]
+    return topology, adjacency, loads.unsqueeze(-1).contiguous()
+
+def _setup_train_step(case, batch_size, workdir):
+    from gnn_opf.gnn_opf import PhysicsInformedGNN, physics_penalty
+    topology, adjacency, x = _shared_inputs(case, batch_size)
+    graph = topology.to_pyg_data()
+    targets = torch.full((batch_size,), 1000.0)
+    model = PhysicsInformedGNN()
+    optimizer = torch.optim.Adam(model.parameters(), lr=0.01)
+
+    def run():
+        optimizer.zero_grad()
+        predictions = model.forward_shared(x, adjacency)
+        loss = torch.nn.functional.mse_loss(predictions.mean(dim=(1, 2)), targets)
+        loss = loss + physics_penalty(graph, predictions, loads=x)
+        loss.backward()
+        optimizer.step()
+    return run, batch_size
+
+def _setup_inference(case, batch_size, workdir):
+    from gnn_opf.gnn_opf import PhysicsInformedGNN
+    _, adjacency, x = _shared_inputs(case, batch_size)
+    model = PhysicsInformedGNN().eval()
+
+    def run():
+        with torch.no_grad():
+            return model.forward_shared(x, adjacency)
+    return run, batch_size
+
+def _setup_train_gnn(case, batch_size, workdir):
+    if case != "case14":
+        return None
+    from gnn_opf.train_gnn import train_gnn
+    csv_path = os.path.join(workdir, "train.csv")
+    _write_scenario_csv(csv_path, TRAINING_ROWS)
+    return (lambda: train_gnn(num_epochs=1, csv_path=csv_path, batch_size=batch_size, shuffle=True)), TRAINING_ROWS
+
+def _setup_evaluate_model(case, batch_size, workdir):
+    if case != "case14":
+        return None
+    from gnn_opf.evaluate_gnn import evaluate_model
+    from gnn_opf.gnn_opf import PhysicsInformedGNN
+    csv_path = os.path.join(workdir, "test.csv")
+    _write_scenario_csv(csv_path, EVALUATION_ROWS)
+    model = PhysicsInformedGNN().eval()
+    return (lambda: evaluate_model(model, test_csv=csv_path, batch_size=batch_size)), EVALUATION_ROWS
+
+def _setup_generate_opf_scenarios(case, batch_size, workdir):
+    from gnn_opf.data.power_networks import load_topology
+    from gnn_opf.pypsa_data_generation import generate_opf_scenarios
+    if load_topology(case).num_nodes > GENERATION_MAX_BUSES:
+        return None
+    # generate_opf_scenarios writes to data/ below the working directory.
+    os.chdir(workdir)
+    return (lambda: generate_opf_scenarios(GENERATION_SCENARIOS, case_name=case)), GENERATION_SCENARIOS
+
+# Statements timed by the import benchmarks.
+IMPORT_STATEMENTS = {
+    "import_gnn_opf": "import gnn_opf",
+    "import_serving": "import gnn_opf.gnn_opf, gnn_opf.inference_engine",
+}
+
+def _import_setup(name):
+    def setup(case, batch_size, workdir):
+        if case != "case14":
+            return None
+        # Make the package importable from the child however this process found it.
+        package_root = str(Path(__file__).resolve().parent.parent)
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [package_root, env.get("PYTHONPATH")]))
+        command = [sys.executable, "-c", IMPORT_STATEMENTS[name]]
+        return (lambda: subprocess.run(command, env=env, cwd=workdir, check=True)), 1
+    return setup
+
+# name -> (setup function, whether the benchmark depends on the batch size)
+BENCHMARKS = {
+    "case_load": (_setup_case_load, False),
+    "graph_build": (_setup_graph_build, False),
+    "load_network_as_pyg": (_setup_load_network_as_pyg, False),
+    "train_step": (_setup_train_step, True),
+    "inference": (_setup_inference, True),
+    "train_gnn": (_setup_train_gnn, True),
+    "evaluate_model": (_setup_evaluate_model, True),
+    "generate_opf_scenarios": (_setup_generate_opf_scenarios, False),
+    "import_gnn_opf": (_import_setup("import_gnn_opf"), False),
+    "import_serving": (_import_setup("import_serving"), False),
+}
+
+def _reset_peak_rss():
+    """Reset the peak RSS of this process to its current RSS (Linux only)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def _rss_mb(field):
+    """Read VmRSS or VmHWM (peak) from /proc/self/status, falling back to ru_maxrss."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _run_point(name, case, batch_size, repeats):
+    """Run one benchmark point; executed in a forked child process."""
+    import warnings
+    warnings.filterwarnings("ignore")
+    # A forked child inherits the peak RSS of its parent; start from the current RSS instead.
+    _reset_peak_rss()
+    start_rss = _rss_mb("VmRSS")
+    setup, _ = BENCHMARKS[name]
+    with tempfile.TemporaryDirectory() as workdir:
+        prepared = setup(case, batch_size, workdir)
+        if prepared is None:
+            return None
+        fn, items = prepared
+        fn()  # warm-up
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+
+        blocks = sys.getallocatedblocks()
+        tracemalloc.start()
+        fn()
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        blocks = sys.getallocatedblocks() - blocks
+
+    wall = statistics.median(times)
+    return {
+        "benchmark": name,
+        "case": case,
+        "batch_size": batch_size,
+        "repeats": repeats,
+        "wall_s": wall,
+        "wall_min_s": min(times),
+        "throughput": items / wall if wall > 0 else float("inf"),
+        "peak_rss_mb": _rss_mb("VmHWM"),
+        "start_rss_mb": start_rss,
+        "py_alloc_peak_mb": traced_peak / 2 ** 20,
+        "py_alloc_blocks": blocks,
+    }
+
+def run_benchmarks(cases=None, batch_sizes=DEFAULT_BATCH_SIZES, benchmarks=None, repeats=3, verbose=True):
+    """
+    Run the benchmark sweep.
+
+    Args:
+        cases (list, optional): Case names; default_cases() if None
+        batch_sizes (sequence): Batch sizes for the batch-dependent benchmarks
+        benchmarks (list, optional): Benchmark names; all of BENCHMARKS if None
+        repeats (int): Timed runs per point (after one warm-up run)
+        verbose (bool): Whether to print each result as it completes
+
+    Returns:
+        dict: {"meta": environment description, "results": list of result records}
+    """
+    cases = default_cases() if cases is None else list(cases)
+    benchmarks = list(BENCHMARKS) if benchmarks is None else list(benchmarks)
+    unknown = set(benchmarks) - set(BENCHMARKS)
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {sorted(unknown)}. Available: {list(BENCHMARKS)}")
+
+    context = multiprocessing.get_context("fork")
+    results = []
+    for name in benchmarks:
+        for case in cases:
+            for batch_size in (batch_sizes if BENCHMARKS[name][1] else (1,)):
+                with context.Pool(1, maxtasksperchild=1) as pool:
+                    record = pool.apply(_run_point, (name, case, batch_size, repeats))
+                if record is None:
+                    continue
+                results.append(record)
+                if verbose:
+                    print(format_record(record), flush=True)
+    return {"meta": environment(), "results": results}
+
+def environment():
+    """Describe the machine and library versions the results were measured with."""
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "torch_threads": torch.get_num_threads(),
+    }
+
+def format_record(record):
+    return (f"{record['benchmark']:<24} {record['case']:<16} {record['batch_size']:>6} "
+            f"{record['wall_s'] * 1e3:>11.3f} ms {record['throughput']:>12.1f}/s "
+            f"{record['peak_rss_mb']:>9.1f} MB")
+
+def _key(record):
+    return record["benchmark"], record["case"], record["batch_size"]
+
+def compare_results(current, baseline, tolerance=0.25, min_seconds=1e-3):
+    """
+    Flag points that got slower or bigger than the baseline.
+
+    A point regresses when its median wall time exceeds the baseline by more
+    than tolerance (relative) and min_seconds (absolute, to ignore timer noise
+    on microsecond points), or when its peak RSS exceeds the baseline by more
+    than tolerance. Points missing from either side are ignored.
+
+    Args:
+        current (dict): Results of run_benchmarks
+        baseline (dict): Stored results to compare against
+        tolerance (float): Allowed relative increase
+        min_seconds (float): Allowed absolute wall time increase
+
+    Returns:
+        list: One dictionary per regression with benchmark, case, batch_size,
+            metric, baseline, current and ratio
+    """
+    reference = {_key(r): r for r in baseline["results"]}
+    regressions = []
+    for record in current["results"]:
+        base = reference.get(_key(record))
+        if base is None:
+            continue
+        checks = [
+            ("wall_s", record["wall_s"] > base["wall_s"] * (1 + tolerance)
+             and record["wall_s"] - base["wall_s"] > min_seconds),
+            ("peak_rss_mb", record["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance)),
+        ]
+        for metric, regressed in checks:
+            if regressed:
+                regressions.append({
+                    "benchmark": record["benchmark"],
+                    "case": record["case"],
+                    "batch_size": record["batch_size"],
+                    "metric": metric,
+                    "baseline": base[metric],
+                    "current": record[metric],
+                    "ratio": record[metric] / base[metric],
+                })
+    return regressions
+
+def save_results(results, path):
+    """Write results as JSON, creating parent directories."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2))
+    return str(path)
+
+def load_results(path):
+    """Read results written by save_results."""
+    return json.loads(Path(path).read_text())
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark the GNN-OPF pipeline")
+    parser.add_argument("--cases", nargs="+", help="Case names (default: case4gs up to case9241pegase)")
+    parser.add_argument("--benchmarks", nargs="+", choices=list(BENCHMARKS), help="Benchmarks to run (default: all)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=list(DEFAULT_BATCH_SIZES))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.cases, args.batch_sizes, args.benchmarks, args.repeats)
+    print(f"Results written to {save_results(results, args.output)}")
+    if args.save_baseline:
+        print(f"Baseline written to {save_results(results, args.baseline)}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+
+    regressions = compare_results(results, load_results(args.baseline), args.tolerance)
+    for r in regressions:
+        print(f"REGRESSION {r['benchmark']} {r['case']} batch={r['batch_size']}: {r['metric']} "
+              f"{r['baseline']:.4g} -> {r['current']:.4g} ({r['ratio']:.2f}x)")
+    if not regressions:
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
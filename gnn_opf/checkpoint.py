@@ -0,0 +1,316 @@
+"""
+Self-describing training checkpoints.
+
+A checkpoint is a single torch.save file holding
+
+    format, format_version   identify the file as a gnn_opf checkpoint
+    config                   PhysicsInformedGNN constructor arguments
+    state_dict               model weights
+    optimizer, scheduler     their state_dicts (None when not given)
+    rng                      torch, numpy and python RNG states
+    epoch                    last completed epoch (None outside training)
+    topology_fingerprint     digest of the case graph the model was trained on
+    extra                    caller-provided metadata
+
+so a model can be rebuilt without knowing its dimensions, and an interrupted
+training run resumes with the same optimizer moments and random streams.
+Files only contain tensors and plain containers, so they are read back with
+torch.load(weights_only=True).
+
+Writes go to a temporary file that is renamed into place, so a preempted
+save never leaves a truncated checkpoint behind. AsyncCheckpointer moves the
+serialization to a background thread: the training loop only pays for
+copying the state to fresh CPU tensors.
+
+load_checkpoint memory-maps the file by default. Tensors then reference
+pages of the file instead of being read and copied up front, and loading a
+model with load_state_dict(assign=True) keeps it that way.
+"""
+
+import hashlib
+import os
+import queue
+import random
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from gnn_opf import instrumentation
+
+FORMAT = "gnn_opf.checkpoint"
+FORMAT_VERSION = 1
+
+_FINGERPRINT_FIELDS = ("bus_index", "voltage", "edge_index", "r_ohm", "x_ohm", "capacity")
+
+def model_config(model):
+    """
+    Constructor arguments of a PhysicsInformedGNN.
+
+    Args:
+        model (PhysicsInformedGNN): The model
+
+    Returns:
+        dict: input_dim, hidden_dim and output_dim
+    """
+    return {
+        "input_dim": model.conv1.in_channels,
+        "hidden_dim": model.conv1.out_channels,
+        "output_dim": model.conv2.out_channels,
+    }
+
+def topology_fingerprint(topology):
+    """
+    Digest of the graph structure of a case topology.
+
+    Base loads are left out: they do not change the graph a model runs on.
+
+    Args:
+        topology (CaseTopology): The topology
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{topology.num_nodes}:{topology.sn_mva!r}".encode())
+    for name in _FINGERPRINT_FIELDS:
+        array = getattr(topology, name).contiguous().numpy()
+        digest.update(f"{name}:{array.dtype.str}:{array.shape}".encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+def rng_state():
+    """
+    Capture the torch, numpy and python RNG states.
+
+    The numpy state is stored as a dict with the key array as a tensor, so
+    the checkpoint stays loadable with weights_only=True.
+    """
+    name, keys, pos, has_gauss, cached_gaussian = np.random.get_state()
+    return {
+        "torch": torch.get_rng_state(),
+        "numpy": {"name": name, "keys": torch.from_numpy(keys.astype(np.int64)), "pos": int(pos),
+                  "has_gauss": int(has_gauss), "cached_gaussian": float(cached_gaussian)},
+        "python": random.getstate(),
+    }
+
+def set_rng_state(state):
+    """Restore RNG states captured by rng_state."""
+    torch.set_rng_state(state["torch"])
+    np_state = state["numpy"]
+    np.random.set_state((np_state["name"], np_state["keys"].numpy().astype(np.uint32), np_state["pos"],
+                         np_state["has_gauss"], np_state["cached_gaussian"]))
+    version, internal, gauss_next = state["python"]
+    random.setstate((version, tuple(internal), gauss_next))
+
+def checkpoint_state(model, optimizer=None, scheduler=None, epoch=None, topology=None, **extra):
+    """
+    Build the checkpoint dict of a model and its training state.
+
+    Args:
+        model (PhysicsInformedGNN): The model
+        optimizer (torch.optim.Optimizer, optional): Optimizer to store
+        scheduler (torch.optim.lr_scheduler.LRScheduler, optional): Scheduler to store
+        epoch (int, optional): Last completed epoch
+        topology (CaseTopology, optional): Topology the model was trained on
+        **extra: Additional metadata (tensors and plain values)
+
+    Returns:
+        dict: The checkpoint; its tensors may alias the live model and optimizer
+    """
+    return {
+        "format": FORMAT,
+        "format_version": FORMAT_VERSION,
+        "config": model_config(model),
+        "state_dict": model.state_dict(),
+        "optimizer": optimizer.state_dict() if optimizer is not None else None,
+        "scheduler": scheduler.state_dict() if scheduler is not None else None,
+        "rng": rng_state(),
+        "epoch": epoch,
+        "case_name": topology.case_name if topology is not None else None,
+        "topology_fingerprint": topology_fingerprint(topology) if topology is not None else None,
+        "extra": extra,
+    }
+
+def snapshot(state):
+    """Copy every tensor of a nested checkpoint dict to a fresh CPU tensor."""
+    if isinstance(state, torch.Tensor):
+        return state.detach().to("cpu", copy=True)
+    if isinstance(state, dict):
+        return {k: snapshot(v) for k, v in state.items()}
+    if isinstance(state, (list, tuple)):
+        return type(state)(snapshot(v) for v in state)
+    return state
+
+def write_checkpoint(state, path):
+    """
+    Atomically write a checkpoint dict.
+
+    Args:
+        state (dict): Checkpoint built by checkpoint_state
+        path (str or Path): Destination file
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with instrumentation.timer("checkpoint.write"), os.fdopen(fd, "wb") as f:
+            torch.save(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+def save_checkpoint(path, model, optimizer=None, scheduler=None, epoch=None, topology=None, **extra):
+    """
+    Synchronously save a checkpoint (see checkpoint_state for the arguments).
+    """
+    write_checkpoint(checkpoint_state(model, optimizer, scheduler, epoch, topology, **extra), path)
+
+def is_checkpoint(state):
+    """Whether a loaded object is a checkpoint written by this module."""
+    return isinstance(state, dict) and state.get("format") == FORMAT
+
+def load_checkpoint(path, mmap=True):
+    """
+    Load a checkpoint file onto the CPU.
+
+    Args:
+        path (str or Path): The checkpoint
+        mmap (bool): Memory-map the tensors instead of reading them into memory.
+            Files in torch's legacy (non-zip) format are read normally.
+
+    Returns:
+        dict: The checkpoint, or whatever object an older save_model wrote
+
+    Raises:
+        ValueError: If the checkpoint was written by a newer format version
+    """
+    with instrumentation.timer("checkpoint.load"):
+        try:
+            state = torch.load(path, map_location="cpu", mmap=mmap, weights_only=True)
+        except RuntimeError:
+            if not mmap:
+                raise
+            state = torch.load(path, map_location="cpu", weights_only=True)
+    if is_checkpoint(state) and state["format_version"] > FORMAT_VERSION:
+        raise ValueError(f"{path} has checkpoint format {state['format_version']}, "
+                         f"this version reads up to {FORMAT_VERSION}")
+    return state
+
+def check_topology(state, topology):
+    """
+    Ensure a checkpoint was trained on a given topology.
+
+    Checkpoints without a fingerprint are accepted.
+
+    Raises:
+        ValueError: If the fingerprints differ
+    """
+    expected = state.get("topology_fingerprint")
+    if expected is not None and expected != topology_fingerprint(topology):
+        raise ValueError(f"checkpoint was trained on a different topology than {topology.case_name} "
+                         f"(trained on {state.get('case_name')})")
+
+def restore_training_state(state, model, optimizer=None, scheduler=None, topology=None, restore_rng=True):
+    """
+    Load a checkpoint into a model and its optimizer and scheduler.
+
+    Args:
+        state (dict): Checkpoint from load_checkpoint
+        model (torch.nn.Module): Model to load the weights into
+        optimizer (torch.optim.Optimizer, optional): Optimizer to restore
+        scheduler (torch.optim.lr_scheduler.LRScheduler, optional): Scheduler to restore
+        topology (CaseTopology, optional): Checked against the stored fingerprint
+        restore_rng (bool): Whether to restore the RNG states
+
+    Returns:
+        int: The epoch to continue from (the stored epoch + 1, or 0)
+    """
+    if topology is not None:
+        check_topology(state, topology)
+    model.load_state_dict(state["state_dict"])
+    if optimizer is not None and state.get("optimizer") is not None:
+        optimizer.load_state_dict(state["optimizer"])
+    if scheduler is not None and state.get("scheduler") is not None:
+        scheduler.load_state_dict(state["scheduler"])
+    if restore_rng and state.get("rng") is not None:
+        set_rng_state(state["rng"])
+    epoch = state.get("epoch")
+    return 0 if epoch is None else epoch + 1
+
+class AsyncCheckpointer:
+    """
+    Write checkpoints from a background thread.
+
+    save() snapshots the state to CPU tensors on the calling thread, so the
+    model can keep training while the snapshot is serialized. At most one
+    save is pending: a newer one replaces a queued one that has not started.
+    Errors of the writer are raised by the next save, wait or close.
+
+    Args:
+        path (str or Path): Checkpoint file, rewritten on every save
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.saves = 0
+        self.skipped = 0
+        self._pending = queue.Queue(maxsize=1)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="gnn-opf-checkpoint", daemon=True)
+        self._thread.start()
+
+    def save(self, model, optimizer=None, scheduler=None, epoch=None, topology=None, **extra):
+        """Queue a checkpoint (see checkpoint_state for the arguments)."""
+        self._raise_error()
+        with instrumentation.timer("checkpoint.snapshot"):
+            state = snapshot(checkpoint_state(model, optimizer, scheduler, epoch, topology, **extra))
+        try:
+            self._pending.get_nowait()
+            self._pending.task_done()
+            self.skipped += 1
+        except queue.Empty:
+            pass
+        self._pending.put(state)
+
+    def _run(self):
+        while True:
+            state = self._pending.get()
+            try:
+                if state is None:
+                    return
+                write_checkpoint(state, self.path)
+                self.saves += 1
+            except BaseException as exc:
+                self._error = exc
+            finally:
+                self._pending.task_done()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def wait(self):
+        """Block until every queued checkpoint is on disk."""
+        self._pending.join()
+        self._raise_error()
+
+    def close(self):
+        """Write the pending checkpoint and stop the writer thread."""
+        if self._thread.is_alive():
+            self._pending.join()
+            self._pending.put(None)
+            self._thread.join()
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
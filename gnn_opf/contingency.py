@@ -0,0 +1,143 @@
+"""
+N-1 contingency screening with the trained PhysicsInformedGNN.
+
+Every single-line outage is derived from the base edge_index by masking the
+two directed edges of the outaged line; no network or graph is rebuilt.
+Lines are the branches of the case topology, so transformer outages are
+screened as well.
+Outage variants are processed in blocks: a block of K variants becomes one
+block-diagonal normalized adjacency over K * num_buses nodes, and all load
+scenarios run through it together on the shared-topology path of the model.
+
+Post-contingency line flows are estimated from the predicted dispatch with
+the case's PTDF and LODF matrices (see gnn_opf.data.sensitivities):
+flows_after = flows + LODF[:, k] * flows[k] for outage of line k.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import torch
+from torch_geometric.nn.conv.gcn_conv import gcn_norm
+
+from gnn_opf.data.dc_model import dc_network
+from gnn_opf.data.power_networks import load_topology
+from gnn_opf.data.sensitivities import load_sensitivities
+
+@dataclass
+class ContingencyResult:
+    """
+    Screening results for a set of outaged lines across load scenarios.
+
+    Attributes:
+        lines (torch.Tensor): Outaged line of each contingency, shape [num_contingencies]
+        predicted_total (torch.Tensor): Mean node prediction, shape [num_contingencies, num_scenarios]
+        max_loading (torch.Tensor): Highest post-contingency flow / limit ratio over all lines,
+            shape [num_contingencies, num_scenarios]; NaN for islanding outages
+        violation (torch.Tensor): True where some line exceeds its limit,
+            shape [num_contingencies, num_scenarios]
+        islanding (torch.Tensor): True for outages that split an island, shape [num_contingencies]
+        node_predictions (torch.Tensor, optional): Shape [num_contingencies, num_scenarios, num_buses]
+    """
+    lines: torch.Tensor
+    predicted_total: torch.Tensor
+    max_loading: torch.Tensor
+    violation: torch.Tensor
+    islanding: torch.Tensor
+    node_predictions: Optional[torch.Tensor] = None
+
+def outage_adjacency(topology, lines):
+    """
+    Build the block-diagonal normalized adjacency of several single-line outages.
+
+    Args:
+        topology (CaseTopology): The base topology
+        lines (torch.Tensor): Outaged line of each block, shape [num_blocks]
+
+    Returns:
+        torch.Tensor: Sparse CSR matrix of shape [num_blocks * num_buses, num_blocks * num_buses];
+            block j is the GCN-normalized adjacency without line lines[j]
+    """
+    num_blocks = lines.numel()
+    num_nodes = topology.num_nodes
+    num_edges = topology.edge_index.size(1)
+    offsets = torch.arange(num_blocks) * num_nodes
+    edge_index = topology.edge_index.repeat(1, num_blocks) + offsets.repeat_interleave(num_edges)
+
+    keep = torch.ones(num_blocks, num_edges, dtype=torch.bool)
+    blocks = torch.arange(num_blocks)
+    keep[blocks, lines] = False
+    keep[blocks, lines + topology.num_lines] = False
+    edge_index = edge_index[:, keep.reshape(-1)]
+
+    total = num_blocks * num_nodes
+    norm_index, norm_weight = gcn_norm(edge_index, None, total, add_self_loops=True)
+    return torch.sparse_coo_tensor(norm_index.flip(0), norm_weight, (total, total)).coalesce().to_sparse_csr()
+
+def screen_contingencies(model, case_name, loads, lines=None, block_size=None, memory_budget_mb=256,
+                         threshold=0.0, return_node_predictions=False):
+    """
+    Screen load scenarios against single-line outages.
+
+    Args:
+        model (PhysicsInformedGNN): Trained model; predictions are read as bus generation in MW
+        case_name (str): Name of the test case
+        loads (torch.Tensor): Bus loads in MW, shape [num_scenarios, num_buses]
+        lines (sequence, optional): Lines to outage; all lines if None
+        block_size (int, optional): Outages per forward pass; derived from memory_budget_mb if None
+        memory_budget_mb (float): Target size of the hidden activations of one block
+        threshold (float): Sparsification threshold of the PTDF/LODF matrices
+        return_node_predictions (bool): Also return per-bus predictions of every contingency
+
+    Returns:
+        ContingencyResult: Per-contingency predictions and violation flags
+    """
+    topology = load_topology(case_name)
+    network = dc_network(topology)
+    sensitivities = load_sensitivities(case_name, threshold)
+    ptdf = sensitivities.ptdf_tensor()
+    lodf = sensitivities.lodf.tocsc()
+    limit = network.limit_mw_t
+
+    loads = torch.as_tensor(loads, dtype=torch.float)
+    num_scenarios, num_nodes = loads.shape
+    lines = torch.arange(topology.num_lines) if lines is None else torch.as_tensor(lines, dtype=torch.long)
+    if block_size is None:
+        hidden = max(model.conv1.out_channels, model.conv1.in_channels)
+        per_outage = num_scenarios * num_nodes * hidden * 4
+        block_size = max(1, int(memory_budget_mb * 2 ** 20 // per_outage))
+
+    islanding = torch.from_numpy(sensitivities.islanding)[lines]
+    totals, loadings, node_predictions = [], [], []
+    x = loads.unsqueeze(-1)
+    for start in range(0, lines.numel(), block_size):
+        block = lines[start:start + block_size]
+        k = block.numel()
+        adjacency = outage_adjacency(topology, block)
+        with torch.no_grad():
+            predictions = model.forward_shared(x.repeat(1, k, 1), adjacency)
+        # [num_scenarios, k * num_buses, 1] -> [k, num_scenarios, num_buses]
+        predictions = predictions.reshape(num_scenarios, k, num_nodes).transpose(0, 1)
+        totals.append(predictions.mean(dim=2))
+        if return_node_predictions:
+            node_predictions.append(predictions)
+
+        injections = (predictions - loads).reshape(k * num_scenarios, num_nodes)
+        base_flows = torch.sparse.mm(ptdf, injections.t()).t().reshape(k, num_scenarios, -1)
+        block_lodf = torch.from_numpy(lodf[:, block.numpy()].toarray().T).float()  # [k, num_lines]
+        outaged_flow = base_flows[torch.arange(k), :, block]  # [k, num_scenarios]
+        flows = base_flows + block_lodf[:, None, :] * outaged_flow[:, :, None]
+        loading = (flows.abs() / limit).amax(dim=2)
+        loading[islanding[start:start + k]] = float("nan")
+        loadings.append(loading)
+
+    max_loading = torch.cat(loadings)
+    return ContingencyResult(
+        lines=lines,
+        predicted_total=torch.cat(totals),
+        max_loading=max_loading,
+        violation=max_loading > 1.0,
+        islanding=islanding,
+        node_predictions=torch.cat(node_predictions) if return_node_predictions else None,
+    )
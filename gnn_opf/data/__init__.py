@@ -1,7 +1,25 @@
 """
 GNN-OPF data processing and graph conversion utilities
+
+Submodules are imported on first attribute access.
 """
 
-from . import graph_data
+import importlib
+
+__all__ = [
+    "power_networks",
+    "topology_cache",
+    "scenario_store",
+    "scenario_io",
+    "dc_model",
+    "sensitivities",
+    "grid_state",
+]
+
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-__all__ = ["graph_data"] 
\ No newline at end of file
+def __dir__():
+    return sorted(list(globals()) + __all__)
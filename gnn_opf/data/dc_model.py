@@ -0,0 +1,182 @@
+"""
+Sparse DC power-flow model of a case topology.
+
+The DC approximation relates bus injections P (in per unit) to voltage
+angles through the susceptance matrix B = A^T diag(b) A, where A is the
+line-bus incidence matrix and b the per-unit line susceptances; line flows
+are then b * (A theta). One reference bus per electrical island is removed
+so the reduced B can be factorized once with a sparse LU and reused for
+every scenario. Nothing in this module builds a dense N x N matrix.
+"""
+
+import math
+import weakref
+
+import numpy as np
+import scipy.sparse as sp
+import torch
+from scipy.sparse.csgraph import connected_components
+from scipy.sparse.linalg import splu
+
+# Smallest per-unit reactance used, guarding against zero-impedance lines.
+MIN_X_PU = 1e-6
+
+class DCNetwork:
+    """
+    Sparse DC power-flow model built from branch (line and transformer) reactances and capacities.
+
+    Lines are the edges with source < target in ``edge_index``, which for a
+    CaseTopology is the forward half in line order.
+
+    Args:
+        edge_index (torch.Tensor): Symmetric edge indices, shape [2, 2 * num_lines]
+        x_ohm (torch.Tensor): Per-edge reactance in ohm
+        capacity (torch.Tensor): Per-edge thermal limit in kA
+        voltage (torch.Tensor): Nominal bus voltage in kV
+        sn_mva (float): System base power in MVA
+
+    Attributes:
+        from_bus, to_bus (numpy.ndarray): Line endpoints, shape [num_lines]
+        susceptance (numpy.ndarray): Per-unit line susceptances b
+        limit_mw (numpy.ndarray): Line flow limits in MW
+        incidence (scipy.sparse.csr_matrix): Line-bus incidence matrix A, shape [num_lines, num_nodes]
+        island (numpy.ndarray): Island label of every bus
+        reference (numpy.ndarray): Reference bus of every island
+    """
+
+    def __init__(self, edge_index, x_ohm, capacity, voltage, sn_mva):
+        edge_index = edge_index.numpy()
+        lines = edge_index[0] < edge_index[1]
+        self.num_nodes = voltage.numel()
+        self.sn_mva = float(sn_mva)
+        self.from_bus = edge_index[0, lines]
+        self.to_bus = edge_index[1, lines]
+        self.num_lines = len(self.from_bus)
+
+        vn_kv = voltage.double().numpy()[self.from_bus]
+        x_pu = x_ohm.double().numpy()[lines] / (vn_kv ** 2 / self.sn_mva)
+        # Keep the sign: series-compensated branches have a negative reactance.
+        self.susceptance = 1.0 / np.where(np.abs(x_pu) < MIN_X_PU, MIN_X_PU, x_pu)
+        self.limit_mw = math.sqrt(3) * vn_kv * capacity.double().numpy()[lines]
+
+        rows = np.repeat(np.arange(self.num_lines), 2)
+        cols = np.stack([self.from_bus, self.to_bus], axis=1).ravel()
+        signs = np.tile([1.0, -1.0], self.num_lines)
+        self.incidence = sp.csr_matrix((signs, (rows, cols)), shape=(self.num_lines, self.num_nodes))
+        self.bbus = (self.incidence.T @ sp.diags(self.susceptance) @ self.incidence).tocsc()
+
+        num_islands, self.island = connected_components(self.bbus, directed=False)
+        self.num_islands = num_islands
+        # The first bus of each island serves as its angle reference.
+        self.reference = np.full(num_islands, self.num_nodes)
+        np.minimum.at(self.reference, self.island, np.arange(self.num_nodes))
+        keep = np.ones(self.num_nodes, dtype=bool)
+        keep[self.reference] = False
+        self.non_reference = np.flatnonzero(keep)
+        reduced = self.bbus[self.non_reference][:, self.non_reference].tocsc()
+        self._lu = splu(reduced) if reduced.shape[0] else None
+
+        # Torch views used by the differentiable penalty.
+        self.incidence_t = torch.sparse_csr_tensor(
+            torch.from_numpy(self.incidence.indptr).long(), torch.from_numpy(self.incidence.indices).long(),
+            torch.from_numpy(self.incidence.data).float(), size=self.incidence.shape,
+        )
+        self.susceptance_t = torch.from_numpy(self.susceptance).float()
+        self.limit_mw_t = torch.from_numpy(self.limit_mw).float()
+        self.island_t = torch.from_numpy(self.island).long()
+        self.non_reference_t = torch.from_numpy(self.non_reference).long()
+
+    def solve_reduced(self, rhs):
+        """
+        Solve B_red X = rhs with the cached sparse LU factorization.
+
+        Args:
+            rhs (numpy.ndarray): Right-hand sides, shape [num_non_reference, k]
+
+        Returns:
+            numpy.ndarray: Solution of the same shape
+        """
+        if self._lu is None:
+            return np.zeros_like(rhs)
+        return self._lu.solve(np.asarray(rhs, dtype=np.float64))
+
+    def angles(self, injections_mw):
+        """
+        Compute bus voltage angles for batches of injections, differentiably.
+
+        The reference bus of each island absorbs its island's imbalance.
+
+        Args:
+            injections_mw (torch.Tensor): Net injections in MW, shape [num_scenarios, num_nodes]
+
+        Returns:
+            torch.Tensor: Angles in radians, shape [num_scenarios, num_nodes]
+        """
+        rhs = injections_mw[:, self.non_reference_t] / self.sn_mva
+        theta_red = _ReducedSolve.apply(rhs, self)
+        theta = injections_mw.new_zeros(injections_mw.shape)
+        return theta.index_copy(1, self.non_reference_t, theta_red)
+
+    def line_flows(self, injections_mw):
+        """
+        Compute DC line flows in MW for batches of injections.
+
+        Args:
+            injections_mw (torch.Tensor): Net injections in MW, shape [num_scenarios, num_nodes]
+
+        Returns:
+            torch.Tensor: Flows from from_bus to to_bus, shape [num_scenarios, num_lines]
+        """
+        theta = self.angles(injections_mw)
+        angle_diff = torch.sparse.mm(self.incidence_t, theta.t()).t()
+        return angle_diff * self.susceptance_t * self.sn_mva
+
+    def island_imbalance(self, injections_mw):
+        """
+        Sum injections per island; zero for a balanced lossless DC network.
+
+        Returns:
+            torch.Tensor: Imbalance in MW, shape [num_scenarios, num_islands]
+        """
+        imbalance = injections_mw.new_zeros(injections_mw.size(0), self.num_islands)
+        return imbalance.index_add(1, self.island_t, injections_mw)
+
+class _ReducedSolve(torch.autograd.Function):
+    """theta = B_red^-1 rhs for rhs of shape [num_scenarios, num_non_reference]; B_red is symmetric."""
+
+    @staticmethod
+    def forward(ctx, rhs, network):
+        ctx.network = network
+        solution = network.solve_reduced(rhs.detach().double().numpy().T).T
+        return torch.from_numpy(np.ascontiguousarray(solution)).to(rhs.dtype)
+
+    @staticmethod
+    def backward(ctx, grad_output):
+        grad = ctx.network.solve_reduced(grad_output.double().numpy().T).T
+        return torch.from_numpy(np.ascontiguousarray(grad)).to(grad_output.dtype), None
+
+# DCNetwork per edge_index tensor, keyed by id() and dropped when the
+# edge_index is garbage collected.
+_NETWORK_CACHE = {}
+
+def dc_network(data):
+    """
+    Return the DCNetwork of a topology, building it once per edge_index tensor.
+
+    Args:
+        data: CaseTopology, or PyG Data with edge_index, x_ohm, capacity, voltage
+            and optionally sn_mva (defaults to 100 MVA)
+
+    Returns:
+        DCNetwork: The cached sparse DC model
+    """
+    edge_index = data.edge_index
+    key = id(edge_index)
+    entry = _NETWORK_CACHE.get(key)
+    if entry is not None and entry[0]() is edge_index:
+        return entry[1]
+    sn_mva = getattr(data, "sn_mva", None) or 100.0
+    network = DCNetwork(edge_index, data.x_ohm, data.capacity, data.voltage, sn_mva)
+    _NETWORK_CACHE[key] = (weakref.ref(edge_index), network)
+    weakref.finalize(edge_index, _NETWORK_CACHE.pop, key, None)
+    return network
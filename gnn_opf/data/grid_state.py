@@ -0,0 +1,143 @@
+"""
+Mutable per-bus operating state on top of a frozen case topology.
+
+A GridState pairs a shared CaseTopology (edge_index, line parameters, GCN
+normalization and DC model, all computed once) with dense per-bus load and
+generation tensors that it owns. Moving to another scenario rewrites those
+tensors in place with vectorized ops, so it costs O(num_buses) tensor work
+and never rebuilds a network, a graph or a normalization.
+
+The model input ``state.x`` (also ``state.graph.x``) is a separate tensor,
+rewritten in place next to the MW loads: after the load methods it holds the
+loads themselves, after apply_scenario the voltage-derived training features
+of the scenario while ``state.loads`` holds its MW loads. ``loads`` is always
+in MW, so injections and the penalty never depend on which method ran last.
+"""
+
+import torch
+
+from gnn_opf.gnn_opf import normalized_adjacency, physics_penalty
+from gnn_opf.data.power_networks import load_topology
+from gnn_opf.data.scenario_store import scenario_bus_loads, scenario_load_features
+
+class GridState:
+    """
+    Frozen topology plus in-place updatable bus loads and generation.
+
+    Args:
+        topology (CaseTopology): The case topology (shared, never modified)
+        loads (torch.Tensor, optional): Initial bus loads in MW, shape [num_buses];
+            the topology's base loads if None
+        generation (torch.Tensor, optional): Initial bus generation in MW; zero if None
+    """
+
+    def __init__(self, topology, loads=None, generation=None):
+        self.topology = topology
+        self.adjacency = normalized_adjacency(topology.edge_index, topology.num_nodes)
+        self.base_loads = topology.load_p_mw
+        self.loads = torch.empty(topology.num_nodes)
+        self.generation = torch.zeros(topology.num_nodes)
+        # [num_buses, 1] model input, rewritten in place so graph.x follows every update.
+        self.x = torch.empty(topology.num_nodes, 1)
+        self.graph = topology.to_pyg_data()
+        self.graph.x = self.x
+        self.set_loads(self.base_loads if loads is None else loads)
+        if generation is not None:
+            self.set_generation(generation)
+
+    @classmethod
+    def from_case(cls, case_name, **kwargs):
+        """Create a state on the shared topology of a test case."""
+        return cls(load_topology(case_name), **kwargs)
+
+    @property
+    def num_nodes(self):
+        return self.topology.num_nodes
+
+    def _values(self, values):
+        values = torch.as_tensor(values, dtype=self.loads.dtype)
+        if values.dim() and values.shape != self.loads.shape:
+            raise ValueError(f"Expected {self.num_nodes} bus values, got shape {tuple(values.shape)}")
+        return values
+
+    def _loads_as_input(self):
+        self.x[:, 0].copy_(self.loads)
+        return self
+
+    def set_loads(self, loads):
+        """Overwrite every bus load (a scalar is broadcast)."""
+        self.loads.copy_(self._values(loads))
+        return self._loads_as_input()
+
+    def set_generation(self, generation):
+        """Overwrite every bus generation (a scalar is broadcast)."""
+        self.generation.copy_(self._values(generation))
+        return self
+
+    def update_loads(self, buses, deltas):
+        """
+        Add deltas to the loads of some buses; repeated buses accumulate.
+
+        Args:
+            buses (torch.Tensor): Bus positions, shape [k]
+            deltas (torch.Tensor or float): Load changes in MW, shape [k] or scalar
+        """
+        buses = torch.as_tensor(buses, dtype=torch.long)
+        deltas = torch.as_tensor(deltas, dtype=self.loads.dtype).expand(buses.shape)
+        self.loads.index_add_(0, buses, deltas)
+        return self._loads_as_input()
+
+    def assign_loads(self, buses, values):
+        """Set the loads of some buses, leaving the others unchanged."""
+        buses = torch.as_tensor(buses, dtype=torch.long)
+        values = torch.as_tensor(values, dtype=self.loads.dtype).expand(buses.shape)
+        self.loads.index_copy_(0, buses, values)
+        return self._loads_as_input()
+
+    def scale_loads(self, factor):
+        """Multiply every load by a scalar or per-bus factor."""
+        self.loads.mul_(self._values(factor))
+        return self._loads_as_input()
+
+    def reset(self):
+        """Restore the base loads of the topology and zero generation."""
+        self.loads.copy_(self.base_loads)
+        self.generation.zero_()
+        return self._loads_as_input()
+
+    def apply_scenario(self, scenario, load_variation=0.3):
+        """
+        Move to a scenario number as training does.
+
+        The model input gets the features of train_gnn.set_network_loads
+        (see scenario_load_features), the loads the scaled base loads in MW
+        (see scenario_bus_loads).
+        """
+        scenario = torch.tensor([float(scenario)])
+        self.x.copy_(scenario_load_features(self.topology, scenario, load_variation)[0])
+        self.loads.copy_(scenario_bus_loads(self.topology, scenario, load_variation)[0])
+        return self
+
+    def iter_scenarios(self, scenarios, load_variation=0.3):
+        """Apply each scenario number in turn, yielding the (same) updated state."""
+        for scenario in scenarios:
+            yield self.apply_scenario(scenario, load_variation)
+
+    @property
+    def injections(self):
+        """Net bus injections generation - loads in MW."""
+        return self.generation - self.loads
+
+    def predict(self, model):
+        """
+        Run the model on the current input.
+
+        Returns:
+            torch.Tensor: Predictions of shape [num_buses, output_dim]
+        """
+        with torch.no_grad():
+            return model.forward_shared(self.x.unsqueeze(0), self.adjacency)[0]
+
+    def penalty(self, predictions):
+        """DC physics penalty of predicted generation against the current loads."""
+        return physics_penalty(self.topology, predictions, loads=self.loads)
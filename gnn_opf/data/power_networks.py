@@ -2,16 +2,27 @@
 Power network data handling utilities.
 This module provides functions to load various power system test cases and convert them
 between different graph formats (pandapower, networkx, pytorch geometric).
+
+pandapower and networkx are imported inside the functions that need them, so
+code that only reads cached topologies never loads them.
 """
 
-import pandapower.networks as pn
-import networkx as nx
+import copy
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
 import torch
 from torch_geometric.data import Data
-from torch_geometric.utils import from_networkx
+
+from gnn_opf import instrumentation
+
+# Number of topologies kept alive by the in-process cache in load_topology.
+TOPOLOGY_CACHE_SIZE = 32
 
 def get_case_function_map():
     """Returns a dictionary mapping case names to their loading functions."""
+    import pandapower.networks as pn
     return {
         'case4gs': pn.case4gs,
         'case5': pn.case5,
@@ -59,7 +70,255 @@ def load_power_network(case_name):
     if case_name not in case_functions:
         raise ValueError(f"Unknown case name: {case_name}. Available cases: {list(case_functions.keys())}")
     
-    return case_functions[case_name]()
+    with instrumentation.timer("case.load"):
+        return case_functions[case_name]()
+
+@dataclass(frozen=True)
+class CaseTopology:
+    """
+    Static graph structure of a power network, stored as flat tensors.
+
+    Buses are numbered positionally (0..num_nodes-1); ``bus_index`` maps each
+    position back to its pandapower bus label. Branches are the in-service
+    lines and two-winding transformers (see _line_arrays); "lines" below
+    refers to both. Every line appears twice in ``edge_index``: the first
+    ``num_lines`` columns hold the forward direction and the last
+    ``num_lines`` columns the reverse one, so the per-edge attributes are
+    duplicated in the same order.
+
+    Instances returned by load_topology are shared between callers, so the
+    tensors must be treated as read-only.
+    """
+    case_name: str
+    bus_index: torch.Tensor
+    voltage: torch.Tensor
+    load_p_mw: torch.Tensor
+    edge_index: torch.Tensor
+    r_ohm: torch.Tensor
+    x_ohm: torch.Tensor
+    capacity: torch.Tensor
+    sn_mva: float
+
+    @property
+    def num_nodes(self):
+        return self.voltage.numel()
+
+    @property
+    def num_lines(self):
+        return self.edge_index.size(1) // 2
+
+    def to_pyg_data(self):
+        """
+        Wrap the topology in a PyTorch Geometric Data object without copying.
+
+        Returns:
+            torch_geometric.data.Data: Graph with ``voltage`` node attributes,
+                ``r_ohm``, ``x_ohm`` and ``capacity`` edge attributes and the
+                system base power ``sn_mva``
+        """
+        return Data(
+            edge_index=self.edge_index,
+            voltage=self.voltage,
+            r_ohm=self.r_ohm,
+            x_ohm=self.x_ohm,
+            capacity=self.capacity,
+            sn_mva=self.sn_mva,
+            num_nodes=self.num_nodes,
+        )
+
+# Major pandapower versions whose private case conversion pandapower_internal_case supports.
+SUPPORTED_PANDAPOWER_MAJOR = (2, 3)
+# Tables the conversion writes to; pandapower_internal_case gives it copies of them.
+_CONVERSION_TABLES = ("gen", "sgen", "load", "vsc")
+
+def pandapower_internal_case(net):
+    """
+    Convert a pandapower network to its MATPOWER cases, as rundcopp does.
+
+    This is the one place gnn_opf calls pandapower's private _pd2ppc. The
+    conversion runs on a shallow copy of the network in which only the tables
+    it writes to are copied, so the caller's network is left untouched and the
+    bus, line and trafo tables are not duplicated. Nothing is solved, so it also
+    works for cases whose OPF fails.
+
+    Args:
+        net (pandapower.auxiliary.pandapowerNet): The network
+
+    Returns:
+        tuple: (ppc, ppci, lookups) where ppc holds every element in table order,
+            ppci only the in-service ones, and lookups maps "bus" to the ppci row of
+            every bus index and "branch" to the (start, stop) ppc rows of each branch table
+
+    Raises:
+        ImportError: If the installed pandapower does not provide the conversion
+    """
+    import pandapower
+    major = int(pandapower.__version__.split(".")[0])
+    try:
+        if major not in SUPPORTED_PANDAPOWER_MAJOR:
+            raise ImportError(f"unsupported major version {major}")
+        from pandapower.auxiliary import _add_auxiliary_elements, _init_rundcopp_options
+        from pandapower.pd2ppc import _pd2ppc
+    except ImportError as e:
+        raise ImportError(f"pandapower {pandapower.__version__} does not provide the internal case "
+                          f"conversion gnn_opf relies on (supported major versions: "
+                          f"{SUPPORTED_PANDAPOWER_MAJOR})") from e
+
+    ppc_net = copy.copy(net)
+    for name in _CONVERSION_TABLES:
+        if name in ppc_net:
+            ppc_net[name] = ppc_net[name].copy()
+    # Static generators and loads are fixed unless flagged otherwise, as in rundcopp.
+    for name in ("sgen", "load"):
+        table = ppc_net[name]
+        if not table.empty and "controllable" not in table.columns:
+            table["controllable"] = False
+    _init_rundcopp_options(ppc_net, check_connectivity=True, switch_rx_ratio=0.5, delta=1e-10,
+                           trafo3w_losses="hv")
+    _add_auxiliary_elements(ppc_net)
+    ppc, ppci = _pd2ppc(ppc_net)
+    return ppc, ppci, ppc_net._pd2ppc_lookups
+
+def _trafo_arrays(net):
+    """
+    Series impedance and rating of the in-service two-winding transformers.
+
+    The per-unit impedance and off-nominal tap ratio are taken from the
+    branch model pandapower builds for its DC power flow (T-model converted
+    to a pi equivalent, tap changers applied, see pandapower_internal_case),
+    and the reactance is scaled by the ratio as in the DC B matrix
+    (b = 1 / (x * tap)). Phase shifts are not modelled.
+
+    Returns:
+        tuple: (hv_pos, lv_pos, r_pu, x_pu, rating_mva) as NumPy arrays, impedances
+            in per unit on the system base
+    """
+    in_service = net.trafo.in_service.values.astype(bool)
+    trafo = net.trafo[in_service]
+    hv_pos = net.bus.index.get_indexer(trafo.hv_bus.values)
+    lv_pos = net.bus.index.get_indexer(trafo.lv_bus.values)
+    if trafo.empty:
+        return hv_pos, lv_pos, np.zeros(0), np.zeros(0), np.zeros(0)
+
+    from pandapower.pypower.idx_brch import BR_R, BR_X, TAP
+
+    ppc, _, lookups = pandapower_internal_case(net)
+    start, stop = lookups["branch"]["trafo"]
+    branch = ppc["branch"][start:stop][in_service]
+    tap = np.real(branch[:, TAP])
+    tap = np.where(tap == 0, 1.0, tap)
+    r_pu = np.real(branch[:, BR_R]) * tap
+    x_pu = np.real(branch[:, BR_X]) * tap
+    return hv_pos, lv_pos, r_pu, x_pu, trafo.sn_mva.values.astype(np.float64) * trafo.parallel.values
+
+def _line_arrays(net):
+    """
+    Extract positional branch endpoints and parameters from a pandapower network.
+
+    Branches are the in-service lines followed by the in-service two-winding
+    transformers (see _trafo_arrays). Impedances are in ohm and capacities in
+    kA, both referred to the nominal voltage of the endpoint with the lower
+    position, which is where DCNetwork converts them back to per unit.
+    Parallel branches between the same pair of buses are merged into one
+    equivalent branch (impedances combined in parallel, capacities summed) and
+    branches starting and ending at the same bus are dropped.
+
+    Returns:
+        tuple: (from_pos, to_pos, r_ohm, x_ohm, capacity) as NumPy arrays
+    """
+    line = net.line[net.line.in_service]
+    parallel = line.parallel.values.astype(np.float64) if "parallel" in line else 1.0
+    hv_pos, lv_pos, trafo_r_pu, trafo_x_pu, trafo_rating_mva = _trafo_arrays(net)
+    from_pos = np.concatenate([net.bus.index.get_indexer(line.from_bus.values), hv_pos])
+    to_pos = np.concatenate([net.bus.index.get_indexer(line.to_bus.values), lv_pos])
+    vn_bus = net.bus.vn_kv.values.astype(np.float64)
+    trafo_vn = vn_bus[np.minimum(hv_pos, lv_pos)]
+    z_base = trafo_vn ** 2 / net.sn_mva
+    r_ohm = np.concatenate([line.r_ohm_per_km.values * line.length_km.values / parallel, trafo_r_pu * z_base])
+    x_ohm = np.concatenate([line.x_ohm_per_km.values * line.length_km.values / parallel, trafo_x_pu * z_base])
+    capacity = np.concatenate([line.max_i_ka.values.astype(np.float64) * parallel,
+                               trafo_rating_mva / (np.sqrt(3) * trafo_vn)])
+
+    keep = from_pos != to_pos
+    lo = np.minimum(from_pos, to_pos)[keep]
+    hi = np.maximum(from_pos, to_pos)[keep]
+    r_ohm, x_ohm, capacity = r_ohm[keep], x_ohm[keep], capacity[keep]
+
+    keys = lo.astype(np.int64) * len(net.bus) + hi
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    if len(unique_keys) == len(keys):
+        return lo, hi, r_ohm, x_ohm, capacity
+
+    # Combine parallel branches through their admittances y = 1 / (r + jx) for the
+    # resistance, and through their DC susceptances 1 / x for the reactance, so the
+    # merged branch carries the same DC flow as the originals together.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        y = 1.0 / (r_ohm + 1j * x_ohm)
+        y_sum = (np.bincount(inverse, weights=y.real)
+                 + 1j * np.bincount(inverse, weights=y.imag))
+        z = np.nan_to_num(1.0 / y_sum)
+        x_merged = np.nan_to_num(1.0 / np.bincount(inverse, weights=1.0 / x_ohm))
+    capacity = np.bincount(inverse, weights=capacity)
+    return (unique_keys // len(net.bus), unique_keys % len(net.bus),
+            z.real, x_merged, capacity)
+
+def build_topology(net, case_name=None):
+    """
+    Build a CaseTopology directly from the pandapower bus, line, trafo and load tables.
+
+    Args:
+        net (pandapower.auxiliary.pandapowerNet): The pandapower network
+        case_name (str, optional): Name recorded on the topology
+
+    Returns:
+        CaseTopology: The flat tensor representation of the network
+    """
+    from_pos, to_pos, r_ohm, x_ohm, capacity = _line_arrays(net)
+
+    load = net.load[net.load.in_service]
+    load_pos = net.bus.index.get_indexer(load.bus.values)
+    load_p_mw = np.bincount(load_pos, weights=load.p_mw.values * load.scaling.values,
+                            minlength=len(net.bus))
+
+    src = np.concatenate([from_pos, to_pos])
+    dst = np.concatenate([to_pos, from_pos])
+
+    def edge_attr(values):
+        return torch.from_numpy(np.concatenate([values, values]).astype(np.float32))
+
+    return CaseTopology(
+        case_name=case_name,
+        bus_index=torch.from_numpy(net.bus.index.values.astype(np.int64)),
+        voltage=torch.from_numpy(net.bus.vn_kv.values.astype(np.float32)),
+        load_p_mw=torch.from_numpy(load_p_mw.astype(np.float32)),
+        edge_index=torch.from_numpy(np.stack([src, dst]).astype(np.int64)),
+        r_ohm=edge_attr(r_ohm),
+        x_ohm=edge_attr(x_ohm),
+        capacity=edge_attr(capacity),
+        sn_mva=float(net.sn_mva),
+    )
+
+@lru_cache(maxsize=TOPOLOGY_CACHE_SIZE)
+def load_topology(case_name):
+    """
+    Load the topology of a test case, reusing a shared instance on repeated calls.
+
+    The first call in a process reads the compiled topology from the on-disk
+    cache (see gnn_opf.data.topology_cache), building it from pandapower only
+    if no valid entry exists yet.
+
+    Args:
+        case_name (str): Name of the test case to load
+
+    Returns:
+        CaseTopology: The shared topology for the case
+
+    Raises:
+        ValueError: If case_name is not recognized
+    """
+    from gnn_opf.data.topology_cache import load_cached_topology
+    with instrumentation.timer("graph.load_topology"):
+        return load_cached_topology(case_name)
 
 def build_graph_from_pandapower(net):
     """
@@ -71,21 +330,19 @@ def build_graph_from_pandapower(net):
     Returns:
         networkx.Graph: The converted graph with voltage and line parameters as attributes
     """
-    G = nx.Graph()
+    import networkx as nx
+    from_pos, to_pos, r_ohm, x_ohm, capacity = _line_arrays(net)
+    bus_labels = net.bus.index.values
 
-    # Add nodes (buses)
-    for idx, row in net.bus.iterrows():
-        G.add_node(idx, voltage=row.vn_kv)
-
-    # Add edges (lines)
-    for idx, row in net.line.iterrows():
-        G.add_edge(
-            row.from_bus, 
-            row.to_bus, 
-            r_ohm=row.r_ohm_per_km * row.length_km,
-            x_ohm=row.x_ohm_per_km * row.length_km, 
-            capacity=row.max_i_ka
-        )
+    G = nx.Graph()
+    G.add_nodes_from(
+        (bus, {"voltage": voltage}) for bus, voltage in zip(bus_labels.tolist(), net.bus.vn_kv.tolist())
+    )
+    G.add_edges_from(
+        (u, v, {"r_ohm": r, "x_ohm": x, "capacity": c})
+        for u, v, r, x, c in zip(bus_labels[from_pos].tolist(), bus_labels[to_pos].tolist(),
+                                 r_ohm.tolist(), x_ohm.tolist(), capacity.tolist())
+    )
 
     return G
 
@@ -99,6 +356,7 @@ def to_pyg_data(nx_graph):
     Returns:
         torch_geometric.data.Data: The converted PyG Data object
     """
+    from torch_geometric.utils import from_networkx
     return from_networkx(nx_graph)
 
 def load_network_as_pyg(case_name):
@@ -111,6 +369,4 @@ def load_network_as_pyg(case_name):
     Returns:
         torch_geometric.data.Data: The network as a PyG Data object
     """
-    pp_net = load_power_network(case_name)
-    nx_graph = build_graph_from_pandapower(pp_net)
-    return to_pyg_data(nx_graph) 
\ No newline at end of file
+    return load_topology(case_name).to_pyg_data()
@@ -0,0 +1,193 @@
+"""
+Columnar storage of generated OPF scenarios.
+
+Scenario results are written as a Parquet dataset: a directory of part files,
+each holding one fixed-size chunk of results. Per-bus load and dispatch
+vectors are stored as fixed-size list columns. Part files are written under a
+temporary name and renamed when complete, so a crash loses at most the
+chunk being buffered and a later run can resume from the parts on disk.
+The parameters a dataset was generated with are stored in the schema
+metadata of every part file (see dataset_metadata), so a resumed run can
+check it continues the same generation.
+
+pyarrow is an optional dependency (``pip install gnn_opf[parquet]``).
+"""
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+PART_GLOB = "part-*.parquet"
+METADATA_KEY = b"gnn_opf.generation"
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet scenario files require pyarrow: pip install gnn_opf[parquet]") from e
+    return pa, pq
+
+def is_parquet_path(path):
+    """Return True if path names a Parquet scenario dataset rather than a CSV file."""
+    path = Path(path)
+    return path.is_dir() or path.suffix == ".parquet"
+
+def _part_files(path):
+    return sorted(Path(path).glob(PART_GLOB))
+
+def scenario_schema(num_buses):
+    """
+    Return the Arrow schema of a scenario dataset.
+
+    Args:
+        num_buses (int): Length of the per-bus vector columns
+    """
+    pa, _ = _require_pyarrow()
+    return pa.schema([
+        ("scenario", pa.int64()),
+        ("total_cost", pa.float64()),
+        ("bus1_load", pa.float64()),
+        ("converged", pa.bool_()),
+        ("load_p_mw", pa.list_(pa.float32(), num_buses)),
+        ("gen_p_mw", pa.list_(pa.float32(), num_buses)),
+    ])
+
+class ParquetScenarioWriter:
+    """
+    Buffer scenario results and flush them to a Parquet dataset in fixed-size chunks.
+
+    Args:
+        path (str or Path): Dataset directory, created if missing
+        chunk_size (int): Number of scenarios per part file
+        metadata (dict, optional): JSON-serializable generation parameters stored
+            in the schema metadata of every part file
+    """
+
+    def __init__(self, path, chunk_size=1024, metadata=None):
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self.metadata = metadata
+        self.path.mkdir(parents=True, exist_ok=True)
+        parts = _part_files(self.path)
+        self._next_part = int(parts[-1].stem.split("-")[1]) + 1 if parts else 0
+        self._buffer = []
+
+    def write(self, result):
+        """
+        Add one scenario result, as yielded by iter_opf_scenarios.
+
+        Args:
+            result (dict): Result with scenario, total_cost, bus1_load, converged,
+                load_p_mw and gen_p_mw entries
+        """
+        self._buffer.append(result)
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered results as a new part file."""
+        if not self._buffer:
+            return
+        pa, pq = _require_pyarrow()
+        rows = self._buffer
+        num_buses = len(rows[0]["load_p_mw"])
+
+        def vectors(key):
+            flat = pa.array(np.concatenate([r[key] for r in rows]).astype(np.float32))
+            return pa.FixedSizeListArray.from_arrays(flat, num_buses)
+
+        table = pa.Table.from_arrays([
+            pa.array([r["scenario"] for r in rows], pa.int64()),
+            pa.array([r["total_cost"] for r in rows], pa.float64()),
+            pa.array([r["bus1_load"] for r in rows], pa.float64()),
+            pa.array([r["converged"] for r in rows], pa.bool_()),
+            vectors("load_p_mw"),
+            vectors("gen_p_mw"),
+        ], schema=scenario_schema(num_buses))
+        if self.metadata is not None:
+            table = table.replace_schema_metadata({METADATA_KEY: json.dumps(self.metadata, sort_keys=True)})
+
+        final = self.path / f"part-{self._next_part:05d}.parquet"
+        tmp = final.with_suffix(".tmp")
+        pq.write_table(table, tmp)
+        os.replace(tmp, final)
+        self._next_part += 1
+        self._buffer = []
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def read_scenario_table(path, columns=None, converged_only=True):
+    """
+    Read a scenario dataset, loading only the requested columns.
+
+    Args:
+        path (str or Path): Dataset directory
+        columns (list, optional): Columns to load; all columns if None
+        converged_only (bool): Drop scenarios whose OPF did not converge
+
+    Returns:
+        pyarrow.Table: Scenario rows sorted by scenario number
+    """
+    pa, pq = _require_pyarrow()
+    parts = _part_files(path)
+    if not parts:
+        raise FileNotFoundError(f"No scenario part files found in {path}")
+
+    read_columns = None
+    if columns is not None:
+        read_columns = list(dict.fromkeys(list(columns) + ["scenario"] + (["converged"] if converged_only else [])))
+    table = pa.concat_tables([pq.read_table(part, columns=read_columns) for part in parts])
+    if converged_only:
+        table = table.filter(table.column("converged"))
+    table = table.sort_by("scenario")
+    return table.select(columns) if columns is not None else table
+
+def written_scenarios(path):
+    """
+    Return the scenario numbers already stored in a dataset.
+
+    Args:
+        path (str or Path): Dataset directory
+
+    Returns:
+        set: Scenario numbers of every stored row, converged or not
+    """
+    if not _part_files(path):
+        return set()
+    table = read_scenario_table(path, columns=["scenario"], converged_only=False)
+    return set(table.column("scenario").to_pylist())
+
+def dataset_metadata(path):
+    """
+    Return the generation parameters stored with a dataset.
+
+    Args:
+        path (str or Path): Dataset directory
+
+    Returns:
+        dict: Parameters of the part files, or None if the dataset has no part files
+
+    Raises:
+        ValueError: If part files lack the parameters or disagree on them
+    """
+    _, pq = _require_pyarrow()
+    found = None
+    for part in _part_files(path):
+        raw = (pq.read_schema(part).metadata or {}).get(METADATA_KEY)
+        if raw is None:
+            raise ValueError(f"{part} does not record its generation parameters")
+        metadata = json.loads(raw)
+        if found is not None and metadata != found:
+            raise ValueError(f"{part} was generated with {metadata}, other parts with {found}")
+        found = metadata
+    return found
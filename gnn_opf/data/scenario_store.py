@@ -0,0 +1,216 @@
+"""
+Precomputed scenario tensors for training and evaluation.
+
+Every scenario of a case shares the same topology, so instead of rebuilding
+a network and a graph per scenario, the node features of all scenarios are
+materialized once into a single [num_scenarios, num_buses, num_features]
+tensor next to the shared edge_index and the target vector.
+"""
+
+import torch
+from torch.utils.data import DataLoader
+from torch_geometric.data import Data
+
+from gnn_opf.data.power_networks import load_topology
+
+def scenario_load_features(topology, scenario_values, load_variation=0.3, nodes=None):
+    """
+    Compute per-bus load features for a batch of scenario numbers.
+
+    This is the vectorized form of train_gnn.set_network_loads:
+      load = v_nom * (1 + load_variation * (scenario / 10))
+
+    Args:
+        topology (CaseTopology): The case topology
+        scenario_values (torch.Tensor): Scenario numbers, shape [num_scenarios]
+        load_variation (float): Load variation factor
+        nodes (torch.Tensor, optional): Only compute the features of these buses
+
+    Returns:
+        torch.Tensor: Node features of shape [num_scenarios, num_buses (or len(nodes)), 1]
+    """
+    scenario_values = torch.as_tensor(scenario_values, dtype=torch.float)
+    factor = 1 + load_variation * (scenario_values / 10.0)
+    voltage = topology.voltage if nodes is None else topology.voltage[nodes]
+    return (factor[:, None] * voltage[None, :]).unsqueeze(-1)
+
+def scenario_bus_loads(topology, scenario_values, load_variation=0.3):
+    """
+    Compute per-bus loads in MW for a batch of scenario numbers.
+
+    The case's base loads are scaled by the same factor as the node features:
+      load_mw = base_load_mw * (1 + load_variation * (scenario / 10))
+
+    Unlike scenario_load_features, whose values are voltage-derived, these are
+    the MW loads the physics penalty balances generation against.
+
+    Args:
+        topology (CaseTopology): The case topology
+        scenario_values (torch.Tensor): Scenario numbers, shape [num_scenarios]
+        load_variation (float): Load variation factor
+
+    Returns:
+        torch.Tensor: Bus loads of shape [num_scenarios, num_buses]
+    """
+    scenario_values = torch.as_tensor(scenario_values, dtype=torch.float)
+    factor = 1 + load_variation * (scenario_values / 10.0)
+    return factor[:, None] * topology.load_p_mw[None, :]
+
+class ScenarioStore:
+    """
+    Stacked node features and targets for every scenario of one case.
+
+    Attributes:
+        topology (CaseTopology): Topology shared by all scenarios
+        features (torch.Tensor): Node features, shape [num_scenarios, num_buses, num_features]
+        targets (torch.Tensor): Target total cost per scenario, shape [num_scenarios]
+        scenario_ids (torch.Tensor): Scenario number of each row, shape [num_scenarios]
+        loads (torch.Tensor): Bus loads in MW, shape [num_scenarios, num_buses], or None if unknown
+    """
+
+    def __init__(self, topology, features, targets, scenario_ids, loads=None):
+        if features.size(0) != targets.size(0) or features.size(1) != topology.num_nodes:
+            raise ValueError(
+                f"Features of shape {tuple(features.shape)} do not match {targets.size(0)} targets "
+                f"on a {topology.num_nodes}-bus topology"
+            )
+        self.topology = topology
+        self.features = features
+        self.targets = targets
+        self.scenario_ids = scenario_ids
+        self.loads = loads
+        self._batch_edge_index = {}
+
+    def __len__(self):
+        return self.features.size(0)
+
+    @property
+    def edge_index(self):
+        return self.topology.edge_index
+
+    @property
+    def num_nodes(self):
+        return self.topology.num_nodes
+
+    def graph(self, idx):
+        """
+        Return scenario ``idx`` as a PyG Data object sharing the store's tensors.
+
+        Args:
+            idx (int): Row of the scenario in the store
+
+        Returns:
+            torch_geometric.data.Data: Graph with ``x`` and ``y`` set for the scenario
+        """
+        data = self.topology.to_pyg_data()
+        data.x = self.features[idx]
+        data.y = self.targets[idx]
+        return data
+
+    def batch_edge_index(self, num_graphs):
+        """
+        Return the block-diagonal edge_index of ``num_graphs`` copies of the topology.
+
+        Copy ``g`` occupies nodes ``g * num_nodes`` to ``(g + 1) * num_nodes - 1``.
+        The result is cached per batch size.
+        """
+        if num_graphs not in self._batch_edge_index:
+            edge_index = self.edge_index
+            offsets = torch.arange(num_graphs) * self.num_nodes
+            self._batch_edge_index[num_graphs] = (
+                edge_index.repeat(1, num_graphs) + offsets.repeat_interleave(edge_index.size(1))
+            )
+        return self._batch_edge_index[num_graphs]
+
+    def collate(self, indices):
+        """
+        Pack several scenarios into one disjoint-union graph.
+
+        Args:
+            indices (list or torch.Tensor): Rows of the scenarios to pack
+
+        Returns:
+            torch_geometric.data.Data: Batch with ``x`` of shape [len(indices) * num_buses, features],
+                the block-diagonal ``edge_index``, the ``batch`` vector assigning nodes to
+                scenarios, ``y`` of shape [len(indices)] and ``loads`` in MW of shape
+                [len(indices) * num_buses] (None if the store has no loads)
+        """
+        indices = torch.as_tensor(indices, dtype=torch.long)
+        num_graphs = indices.numel()
+        return Data(
+            loads=self.loads[indices].reshape(-1) if self.loads is not None else None,
+            x=self.features[indices].reshape(num_graphs * self.num_nodes, -1),
+            edge_index=self.batch_edge_index(num_graphs),
+            batch=torch.arange(num_graphs).repeat_interleave(self.num_nodes),
+            y=self.targets[indices],
+            num_nodes=num_graphs * self.num_nodes,
+            num_graphs=num_graphs,
+        )
+
+    def stack(self, indices):
+        """
+        Gather several scenarios for the shared-topology path of PhysicsInformedGNN.
+
+        Args:
+            indices (list or torch.Tensor): Rows of the scenarios to gather
+
+        Returns:
+            tuple: (features of shape [len(indices), num_buses, features], targets of shape [len(indices)],
+                bus loads in MW of shape [len(indices), num_buses] or None if the store has no loads)
+        """
+        indices = torch.as_tensor(indices, dtype=torch.long)
+        loads = self.loads[indices] if self.loads is not None else None
+        return self.features[indices], self.targets[indices], loads
+
+def scenario_loader(store, batch_size=32, shuffle=True, num_workers=0, prefetch_factor=2, generator=None,
+                    shared_topology=False):
+    """
+    Create a DataLoader yielding batches of scenarios from a store.
+
+    By default each batch is a disjoint-union graph (see ScenarioStore.collate).
+    With shared_topology=True batches are (features, targets, loads) tuples from
+    ScenarioStore.stack, for use with PhysicsInformedGNN.forward_shared.
+
+    Args:
+        store (ScenarioStore): The precomputed scenarios
+        batch_size (int): Number of scenarios per batch
+        shuffle (bool): Whether to reshuffle the scenarios every epoch
+        num_workers (int): Number of worker processes collating batches ahead of time
+        prefetch_factor (int): Batches prefetched per worker (ignored without workers)
+        generator (torch.Generator, optional): Generator driving the shuffle order
+        shared_topology (bool): Whether to yield stacked feature tensors instead of graphs
+
+    Returns:
+        torch.utils.data.DataLoader: Loader over scenario batches
+    """
+    kwargs = {}
+    if num_workers > 0:
+        kwargs = {"prefetch_factor": prefetch_factor, "persistent_workers": True}
+    return DataLoader(
+        range(len(store)),
+        batch_size=batch_size,
+        shuffle=shuffle,
+        collate_fn=store.stack if shared_topology else store.collate,
+        num_workers=num_workers,
+        generator=generator,
+        **kwargs,
+    )
+
+def build_scenario_store(scenarios, case_name="case14", load_variation=0.3):
+    """
+    Materialize every scenario of a case into a ScenarioStore.
+
+    Args:
+        scenarios (list): Scenario dictionaries as returned by train_gnn.read_scenarios
+        case_name (str): Name of the test case the scenarios belong to
+        load_variation (float): Load variation factor
+
+    Returns:
+        ScenarioStore: The precomputed scenario tensors
+    """
+    topology = load_topology(case_name)
+    scenario_ids = torch.tensor([s["scenario"] for s in scenarios], dtype=torch.float)
+    targets = torch.tensor([s["total_cost"] for s in scenarios], dtype=torch.float)
+    features = scenario_load_features(topology, scenario_ids, load_variation)
+    loads = scenario_bus_loads(topology, scenario_ids, load_variation)
+    return ScenarioStore(topology, features, targets, scenario_ids, loads)
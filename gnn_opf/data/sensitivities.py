@@ -0,0 +1,204 @@
+"""
+Power Transfer and Line Outage Distribution Factors per case topology.
+
+PTDF[l, n] is the change of the DC flow on line l per MW injected at bus n
+and withdrawn at the reference bus of its island. LODF[l, k] is the share
+of the pre-outage flow of line k that moves onto line l when k is taken
+out of service. "Lines" are the branches of the topology, transformers
+included (see power_networks._line_arrays). Both are computed from the
+sparse LU factorization of the reduced B matrix held by DCNetwork, a block
+of lines at a time. Entries
+below a threshold can be dropped so large grids stay sparse. Results are
+persisted next to the compiled topologies and are exposed as SciPy CSR
+matrices or torch sparse tensors.
+"""
+
+import logging
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+import torch
+
+from gnn_opf.data.dc_model import dc_network
+from gnn_opf.data.power_networks import load_topology
+from gnn_opf.data.topology_cache import cache_root, pandapower_version
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 2
+
+# Denominators 1 - PTDF_kk below this mark line k as a bridge whose outage splits an island.
+ISLANDING_TOLERANCE = 1e-6
+
+class Sensitivities:
+    """
+    PTDF and LODF matrices of one topology.
+
+    Attributes:
+        ptdf (scipy.sparse.csr_matrix): Shape [num_lines, num_nodes]
+        lodf (scipy.sparse.csr_matrix): Shape [num_lines, num_lines], or None if not computed
+        islanding (numpy.ndarray): True for lines whose outage splits an island;
+            their LODF columns hold only the -1 diagonal
+        threshold (float): Absolute value below which entries were dropped
+    """
+
+    def __init__(self, ptdf, lodf, islanding, threshold):
+        self.ptdf = ptdf
+        self.lodf = lodf
+        self.islanding = islanding
+        self.threshold = threshold
+
+    def ptdf_tensor(self):
+        """Return the PTDF as a float32 torch sparse CSR tensor."""
+        return to_torch_sparse(self.ptdf)
+
+    def lodf_tensor(self):
+        """Return the LODF as a float32 torch sparse CSR tensor."""
+        return to_torch_sparse(self.lodf)
+
+def to_torch_sparse(matrix):
+    """
+    Convert a SciPy sparse matrix to a float32 torch sparse CSR tensor.
+
+    Args:
+        matrix (scipy.sparse.spmatrix): The matrix to convert
+
+    Returns:
+        torch.Tensor: Sparse CSR tensor with the same shape and entries
+    """
+    matrix = sp.csr_matrix(matrix)
+    return torch.sparse_csr_tensor(
+        torch.from_numpy(matrix.indptr).long(), torch.from_numpy(matrix.indices).long(),
+        torch.from_numpy(matrix.data).float(), size=matrix.shape,
+    )
+
+def _sparsify(block, threshold, row_offset=0, col_offset=0):
+    """Return (rows, cols, values) of the entries of a dense block above the threshold."""
+    rows, cols = np.nonzero(np.abs(block) > threshold)
+    return rows + row_offset, cols + col_offset, block[rows, cols]
+
+def compute_ptdf(network, threshold=0.0, block_size=256):
+    """
+    Compute the PTDF matrix of a DCNetwork.
+
+    Args:
+        network (DCNetwork): The sparse DC model
+        threshold (float): Entries with absolute value at or below this are dropped
+        block_size (int): Number of lines solved per block
+
+    Returns:
+        scipy.sparse.csr_matrix: PTDF of shape [num_lines, num_nodes]
+    """
+    weighted = (sp.diags(network.susceptance) @ network.incidence).tocsc()[:, network.non_reference].tocsr()
+    rows, cols, values = [], [], []
+    for start in range(0, network.num_lines, block_size):
+        stop = min(start + block_size, network.num_lines)
+        # B_red is symmetric, so PTDF rows are B_red^-1 applied to rows of diag(b) A.
+        block = network.solve_reduced(weighted[start:stop].toarray().T).T
+        r, c, v = _sparsify(block, threshold, row_offset=start)
+        rows.append(r)
+        cols.append(network.non_reference[c])
+        values.append(v)
+    return sp.csr_matrix(
+        (np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(network.num_lines, network.num_nodes),
+    ) if rows else sp.csr_matrix((network.num_lines, network.num_nodes))
+
+def compute_lodf(network, threshold=0.0, block_size=256):
+    """
+    Compute the LODF matrix of a DCNetwork.
+
+    Args:
+        network (DCNetwork): The sparse DC model
+        threshold (float): Entries with absolute value at or below this are dropped
+        block_size (int): Number of outaged lines solved per block
+
+    Returns:
+        tuple: (LODF as scipy.sparse.csr_matrix of shape [num_lines, num_lines],
+            boolean array flagging lines whose outage splits an island)
+    """
+    incidence_red = network.incidence.tocsc()[:, network.non_reference].tocsr()
+    weighted = (sp.diags(network.susceptance) @ incidence_red).tocsr()
+    islanding = np.zeros(network.num_lines, dtype=bool)
+    rows, cols, values = [], [], []
+    for start in range(0, network.num_lines, block_size):
+        stop = min(start + block_size, network.num_lines)
+        # Flow on every line per unit transfer across each outaged line's terminals.
+        transfer = network.solve_reduced(incidence_red[start:stop].toarray().T)
+        block = weighted @ transfer
+        outaged = np.arange(start, stop)
+        denominator = 1.0 - block[outaged, outaged - start]
+        bridge = np.abs(denominator) < ISLANDING_TOLERANCE
+        islanding[start:stop] = bridge
+        block = block / np.where(bridge, np.inf, denominator)
+        block[outaged, outaged - start] = -1.0
+        r, c, v = _sparsify(block, threshold, col_offset=start)
+        rows.append(r)
+        cols.append(c)
+        values.append(v)
+    lodf = sp.csr_matrix(
+        (np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(network.num_lines, network.num_lines),
+    ) if rows else sp.csr_matrix((network.num_lines, network.num_lines))
+    return lodf, islanding
+
+def sensitivity_cache_path(case_name, threshold=0.0, cache_dir=None):
+    """Return the cache file of a case's sensitivities under the current versions."""
+    cache_dir = Path(cache_dir) if cache_dir is not None else cache_root() / "sensitivities"
+    return cache_dir / f"{case_name}-t{threshold:g}-pp{pandapower_version()}-v{FORMAT_VERSION}.npz"
+
+def _save(path, sensitivities):
+    arrays = {"islanding": sensitivities.islanding, "threshold": np.array(sensitivities.threshold)}
+    for name in ("ptdf", "lodf"):
+        matrix = getattr(sensitivities, name)
+        if matrix is not None:
+            arrays.update({f"{name}_data": matrix.data, f"{name}_indices": matrix.indices,
+                           f"{name}_indptr": matrix.indptr, f"{name}_shape": np.array(matrix.shape)})
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp.npz")
+    np.savez(tmp, **arrays)
+    tmp.replace(path)
+
+def _load(path):
+    with np.load(path) as f:
+        def matrix(name):
+            if f"{name}_data" not in f:
+                return None
+            return sp.csr_matrix((f[f"{name}_data"], f[f"{name}_indices"], f[f"{name}_indptr"]),
+                                 shape=tuple(f[f"{name}_shape"]))
+        return Sensitivities(matrix("ptdf"), matrix("lodf"), f["islanding"], float(f["threshold"]))
+
+@lru_cache(maxsize=8)
+def load_sensitivities(case_name, threshold=0.0, cache_dir=None):
+    """
+    Load the PTDF and LODF of a case, computing and persisting them on first use.
+
+    Args:
+        case_name (str): Name of the test case
+        threshold (float): Entries with absolute value at or below this are dropped
+        cache_dir (str or Path, optional): Cache directory, defaults to <cache root>/sensitivities
+
+    Returns:
+        Sensitivities: The case's sensitivity matrices
+    """
+    path = sensitivity_cache_path(case_name, threshold, cache_dir)
+    if path.exists():
+        try:
+            return _load(path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Discarding unreadable sensitivity cache entry {path}: {e}")
+
+    network = dc_network(load_topology(case_name))
+    ptdf = compute_ptdf(network, threshold)
+    lodf, islanding = compute_lodf(network, threshold)
+    sensitivities = Sensitivities(ptdf, lodf, islanding, threshold)
+    try:
+        for stale in path.parent.glob(f"{case_name}-t{threshold:g}-pp*.npz"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+        _save(path, sensitivities)
+    except OSError as e:
+        logger.warning(f"Could not write sensitivity cache entry {path}: {e}")
+    return sensitivities
@@ -0,0 +1,201 @@
+"""
+On-disk cache of compiled case topologies.
+
+Each case is stored as a single binary file holding a small JSON header
+followed by the raw CaseTopology arrays. Readers memory-map the arrays in
+copy-on-write mode, so every process opening the same case shares the page
+cache instead of rebuilding the network through pandapower.
+
+File layout:
+    8 bytes   magic (b"GNNOPFTP")
+    4 bytes   little-endian header length
+    N bytes   UTF-8 JSON header (padded to ALIGNMENT)
+    ...       array payloads, each starting on an ALIGNMENT boundary
+"""
+
+import json
+import logging
+import os
+import struct
+import tempfile
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from gnn_opf import instrumentation
+from gnn_opf.data.power_networks import CaseTopology, build_topology, load_power_network
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 2
+MAGIC = b"GNNOPFTP"
+ALIGNMENT = 64
+SUFFIX = ".topo"
+
+_ARRAY_FIELDS = ("bus_index", "voltage", "load_p_mw", "edge_index", "r_ohm", "x_ohm", "capacity")
+
+def cache_root():
+    """
+    Return the root directory of the gnn_opf on-disk caches.
+
+    The location can be overridden with the GNN_OPF_CACHE_DIR environment variable.
+    """
+    root = os.environ.get("GNN_OPF_CACHE_DIR")
+    return Path(root) if root else Path.home() / ".cache" / "gnn_opf"
+
+def default_cache_dir():
+    """Return the directory holding compiled topologies."""
+    return cache_root() / "topologies"
+
+def pandapower_version():
+    """Return the installed pandapower version without importing the package."""
+    try:
+        return version("pandapower")
+    except PackageNotFoundError:
+        return "unknown"
+
+def cache_path(case_name, cache_dir=None):
+    """
+    Return the cache file for a case under the current pandapower and format versions.
+
+    Args:
+        case_name (str): Name of the test case
+        cache_dir (str or Path, optional): Cache directory, defaults to default_cache_dir()
+
+    Returns:
+        pathlib.Path: Path of the compiled topology file
+    """
+    cache_dir = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+    return cache_dir / f"{case_name}-pp{pandapower_version()}-v{FORMAT_VERSION}{SUFFIX}"
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+def write_topology(topology, path):
+    """
+    Write a topology to a compiled cache file.
+
+    The file is written to a temporary name first and renamed into place, so
+    concurrent readers never observe a partially written artifact.
+
+    Args:
+        topology (CaseTopology): The topology to store
+        path (str or Path): Destination file
+    """
+    path = Path(path)
+    arrays = {name: getattr(topology, name).numpy() for name in _ARRAY_FIELDS}
+
+    entries = {}
+    offset = 0
+    for name, array in arrays.items():
+        entries[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset = _align(offset + array.nbytes)
+    header = {
+        "format_version": FORMAT_VERSION,
+        "pandapower_version": pandapower_version(),
+        "case_name": topology.case_name,
+        "sn_mva": topology.sn_mva,
+        "arrays": entries,
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = _align(len(MAGIC) + 4 + len(header_bytes))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(header_bytes)))
+            f.write(header_bytes)
+            for name, array in arrays.items():
+                f.seek(data_start + entries[name]["offset"])
+                f.write(np.ascontiguousarray(array).tobytes())
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+def read_topology(path):
+    """
+    Open a compiled cache file, memory-mapping its arrays.
+
+    Args:
+        path (str or Path): The compiled topology file
+
+    Returns:
+        CaseTopology: Topology whose tensors are backed by the mapped file
+
+    Raises:
+        ValueError: If the file is not a compiled topology or was written by a
+            different format or pandapower version
+    """
+    path = Path(path)
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a compiled topology file")
+        (header_len,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(header_len).decode("utf-8"))
+    if header.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"{path} has format version {header.get('format_version')}, expected {FORMAT_VERSION}")
+    if header.get("pandapower_version") != pandapower_version():
+        raise ValueError(f"{path} was compiled with pandapower {header.get('pandapower_version')}")
+
+    data_start = _align(len(MAGIC) + 4 + header_len)
+    tensors = {}
+    for name in _ARRAY_FIELDS:
+        entry = header["arrays"][name]
+        shape = tuple(entry["shape"])
+        if 0 in shape:
+            array = np.empty(shape, dtype=np.dtype(entry["dtype"]))
+        else:
+            # Copy-on-write keeps the pages shared between processes while
+            # still giving torch a writable buffer to wrap.
+            array = np.memmap(path, dtype=np.dtype(entry["dtype"]), mode="c",
+                              offset=data_start + entry["offset"], shape=shape)
+        tensors[name] = torch.from_numpy(array)
+    return CaseTopology(case_name=header["case_name"], sn_mva=header["sn_mva"], **tensors)
+
+def _remove_stale_entries(case_name, current, cache_dir):
+    for candidate in cache_dir.glob(f"{case_name}-pp*{SUFFIX}"):
+        if candidate != current:
+            logger.info(f"Removing stale topology cache entry {candidate}")
+            candidate.unlink(missing_ok=True)
+
+def load_cached_topology(case_name, cache_dir=None):
+    """
+    Load a case topology from the on-disk cache, compiling it on first use.
+
+    Entries written by another pandapower or format version are removed and
+    rebuilt. If the cache directory is not writable the topology is built in
+    memory instead.
+
+    Args:
+        case_name (str): Name of the test case to load
+        cache_dir (str or Path, optional): Cache directory, defaults to default_cache_dir()
+
+    Returns:
+        CaseTopology: The case topology
+
+    Raises:
+        ValueError: If case_name is not recognized
+    """
+    path = cache_path(case_name, cache_dir)
+    if path.exists():
+        try:
+            return read_topology(path)
+        except (ValueError, KeyError, OSError, struct.error) as e:
+            logger.warning(f"Discarding unreadable topology cache entry {path}: {e}")
+
+    net = load_power_network(case_name)
+    with instrumentation.timer("graph.build"):
+        topology = build_topology(net, case_name)
+    instrumentation.count("graph.cache_miss")
+    try:
+        _remove_stale_entries(case_name, path, path.parent)
+        write_topology(topology, path)
+    except OSError as e:
+        logger.warning(f"Could not write topology cache entry {path}: {e}")
+        return topology
+    return read_topology(path)
@@ -0,0 +1,482 @@
+"""
+Warm-started DC OPF on a fixed network with HiGHS.
+
+pandapower's rundcopp rebuilds the whole OPF problem and starts its interior
+point solver from scratch for every scenario. DCOPFModel instead builds the
+linear program of a network once:
+
+  - columns are the bus voltage angles followed by the generator outputs,
+    each split into segments of a piecewise-linear fit of its cost curve;
+  - one equality row per bus balances generation against load, and one
+    ranged row per rated branch bounds its flow;
+  - loads only enter the right-hand side of the balance rows.
+
+Moving to another load scenario rewrites those bounds and re-solves with
+dual simplex, which starts from the optimal basis of the previous solve
+(a warm start). The closer the consecutive scenarios, the fewer pivots are
+needed; order_scenarios sorts scenarios by total load so that neighbours
+share most of their optimal basis. compare_warm_start reports the effect:
+
+    python -m gnn_opf.dc_opf --cases case14 case118 case300
+
+monitor_branches, generator_dispatch, branch_flows and seed_basis let a
+caller start a solve from a guessed dispatch with only some branch limits
+enforced; gnn_opf.hybrid_opf uses them to seed solves from GNN predictions.
+
+Quadratic generator costs are approximated by num_segments linear pieces,
+so dispatch may differ slightly from pandapower's; the reported total cost
+is the exact polynomial cost of the LP dispatch. Linear costs are exact.
+
+HiGHS is an optional dependency (``pip install gnn_opf[highs]``).
+"""
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import scipy.sparse as sp
+
+from gnn_opf.data.power_networks import pandapower_internal_case
+
+# Number of linear pieces approximating each quadratic cost curve.
+DEFAULT_SEGMENTS = 8
+# MATPOWER column indices of the pandapower internal case (ppci).
+_BUS_TYPE, _PD, _GS = 1, 2, 4
+_REF = 3
+_GEN_BUS, _GEN_STATUS, _PMAX, _PMIN = 0, 7, 8, 9
+_RATE_A, _BR_STATUS = 5, 10
+_COST_MODEL, _NCOST, _COST = 0, 3, 4
+_POLYNOMIAL = 2
+
+def _require_highspy():
+    try:
+        import highspy
+    except ImportError as e:
+        raise ImportError("The HiGHS DC OPF solver requires highspy: pip install gnn_opf[highs]") from e
+    return highspy
+
+@dataclass
+class DCOPFSolution:
+    """
+    Result of one DCOPFModel solve.
+
+    Attributes:
+        converged (bool): Whether HiGHS found an optimal solution
+        total_cost (float): Polynomial generation cost of the dispatch (NaN if not converged)
+        gen_p_mw (numpy.ndarray): Dispatch per bus position of the network, shape [num_buses]
+        theta_rad (numpy.ndarray): Voltage angle per bus position, shape [num_buses]
+        iterations (int): Simplex iterations of the solve
+        seconds (float): Wall time of the solve
+    """
+    converged: bool
+    total_cost: float
+    gen_p_mw: np.ndarray
+    theta_rad: np.ndarray
+    iterations: int
+    seconds: float
+
+class DCOPFModel:
+    """
+    DC OPF linear program of a network, built once and re-solved per load scenario.
+
+    Args:
+        net (pandapower.auxiliary.pandapowerNet): The network; its load table
+            defines the base loads and the order of the load vectors passed to solve
+        num_segments (int): Linear pieces per quadratic cost curve
+        branch_limit_scale (float): Factor applied to every branch rating; the
+            transformer ratings of some imported PEGASE cases are below their
+            base-case DC flows, which makes the nominal problem infeasible
+
+    Attributes:
+        num_rows (int): Balance rows (one per bus) plus rated branch rows
+        num_cols (int): Angle columns plus generator segment columns
+        num_branch_rows (int): Rated branch rows, numbered from num_buses
+        monitored (numpy.ndarray): Which branch rows are currently enforced, see monitor_branches
+    """
+
+    def __init__(self, net, num_segments=DEFAULT_SEGMENTS, branch_limit_scale=1.0):
+        from pandapower.pypower.makeBdc import makeBdc
+        highspy = _require_highspy()
+
+        _, ppci, lookups = pandapower_internal_case(net)
+        lookup = np.asarray(lookups["bus"])
+        bus, gen, branch, gencost = ppci["bus"], ppci["gen"], ppci["branch"], ppci["gencost"]
+        self.base_mva = float(ppci["baseMVA"])
+        nb = bus.shape[0]
+        self.num_buses = nb
+
+        # Positions of the network buses and loads in the internal bus order.
+        self.bus_ppci = lookup[net.bus.index.values]
+        self.load_ppci = lookup[net.load.bus.values]
+        self.load_pos = net.bus.index.get_indexer(net.load.bus.values)
+        self.load_scaling = net.load.scaling.values * net.load.in_service.values
+        self.base_load_p_mw = net.load.p_mw.values.astype(np.float64)
+        base_pd = np.bincount(self.load_ppci, weights=self.base_load_p_mw * self.load_scaling, minlength=nb)
+        # Demand not set through the load table (static generators, shunts).
+        self.fixed_pd = bus[:, _PD] + bus[:, _GS] - base_pd
+        # Fixed static generation, reported with the dispatch like rundcopp's res_sgen.
+        sgen = net.sgen
+        if len(sgen) and "controllable" in sgen:
+            sgen = sgen[sgen.in_service & ~sgen.controllable.fillna(False).astype(bool)]
+        elif len(sgen):
+            sgen = sgen[sgen.in_service]
+        self.sgen_p_mw = np.bincount(net.bus.index.get_indexer(sgen.bus.values),
+                                     weights=sgen.p_mw.values * sgen.scaling.values, minlength=len(net.bus))
+
+        bbus, bf, pbusinj, pfinj = makeBdc(bus, branch)[:4]
+
+        online = gen[:, _GEN_STATUS] > 0
+        gen, gencost = gen[online], gencost[:gen.shape[0]][online]
+        if np.any(gencost[:, _COST_MODEL] != _POLYNOMIAL) or np.any(gencost[:, _NCOST] > 3):
+            raise ValueError("Only linear and quadratic polynomial generator costs are supported")
+        self.gen_bus = gen[:, _GEN_BUS].astype(np.int64)
+        self.pmin = gen[:, _PMIN].astype(np.float64)
+        self.pmax = gen[:, _PMAX].astype(np.float64)
+        # Coefficients (c2, c1, c0) of c2 * P^2 + c1 * P + c0 with P in MW.
+        self.cost = np.zeros((len(gen), 3))
+        for i, row in enumerate(gencost):
+            n = int(row[_NCOST])
+            self.cost[i, 3 - n:] = row[_COST:_COST + n]
+
+        # Segments of each generator: one for a linear cost, num_segments otherwise.
+        segments = np.where(self.cost[:, 0] != 0, num_segments, 1)
+        self.seg_gen = np.repeat(np.arange(len(gen)), segments)
+        seg_k = np.arange(len(self.seg_gen)) - np.repeat(np.cumsum(segments) - segments, segments)
+        width = ((self.pmax - self.pmin) / segments)[self.seg_gen]
+        lo = self.pmin[self.seg_gen] + seg_k * width
+        # Slope of the chord of the cost curve over [lo, lo + width].
+        slope = self.cost[self.seg_gen, 1] + self.cost[self.seg_gen, 0] * (2 * lo + width)
+        num_seg = len(self.seg_gen)
+
+        rated = (branch[:, _RATE_A].real > 0) & (branch[:, _BR_STATUS].real > 0)
+        rate = branch[rated, _RATE_A].real * branch_limit_scale / self.base_mva
+        self.num_cols = nb + num_seg
+        self.num_branch_rows = int(rated.sum())
+        self.num_rows = nb + self.num_branch_rows
+
+        # Balance rows:  sum of segments at the bus - Bbus theta = Pd - Pmin + Pbusinj  (per unit)
+        gen_inc = sp.csr_matrix((np.ones(num_seg), (self.gen_bus[self.seg_gen], np.arange(num_seg))),
+                                shape=(nb, num_seg))
+        balance = sp.hstack([-bbus, gen_inc])
+        flows = sp.hstack([bf[rated], sp.csr_matrix((len(rate), num_seg))])
+        matrix = sp.vstack([balance, flows]).tocsc()
+        self._pbusinj = pbusinj
+        self._pmin_bus = np.bincount(self.gen_bus, weights=self.pmin, minlength=nb)
+        self._seg_lo = lo
+        self._seg_width = width
+        self._bbus = bbus.tocsc()
+        self._bf = bf[rated].tocsr()
+        self._pfinj = pfinj[rated]
+        self._rate = rate
+        self._lu = None
+
+        col_lower = np.concatenate([np.full(nb, -np.inf), np.zeros(num_seg)])
+        col_upper = np.concatenate([np.full(nb, np.inf), width / self.base_mva])
+        ref = bus[:, _BUS_TYPE] == _REF
+        col_lower[:nb][ref] = col_upper[:nb][ref] = 0.0
+
+        self._ref = np.flatnonzero(ref)
+        self.branch_lower = -rate - self._pfinj
+        self.branch_upper = rate - self._pfinj
+        self.monitored = np.ones(self.num_branch_rows, dtype=bool)
+
+        rhs = self._balance_rhs(self.base_load_p_mw)
+        row_lower = np.concatenate([rhs, self.branch_lower])
+        row_upper = np.concatenate([rhs, self.branch_upper])
+
+        lp = highspy.HighsLp()
+        lp.num_col_ = self.num_cols
+        lp.num_row_ = self.num_rows
+        lp.col_cost_ = np.concatenate([np.zeros(nb), slope * self.base_mva])
+        lp.col_lower_ = col_lower
+        lp.col_upper_ = col_upper
+        lp.row_lower_ = row_lower
+        lp.row_upper_ = row_upper
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+        lp.a_matrix_.start_ = matrix.indptr
+        lp.a_matrix_.index_ = matrix.indices
+        lp.a_matrix_.value_ = matrix.data
+        self.highs = highspy.Highs()
+        self.highs.setOptionValue("output_flag", False)
+        # Dual simplex re-solves from the previous basis; interior point cannot.
+        self.highs.setOptionValue("solver", "simplex")
+        self.highs.passModel(lp)
+        self._optimal = highspy.HighsModelStatus.kOptimal
+        self._balance_rows = np.arange(nb, dtype=np.int32)
+        self._branch_rows = np.arange(nb, self.num_rows, dtype=np.int32)
+        self._highspy = highspy
+
+    @classmethod
+    def from_case(cls, case_name, **kwargs):
+        """Build the model of a test case."""
+        from gnn_opf.data.power_networks import load_power_network
+        return cls(load_power_network(case_name), **kwargs)
+
+    def _bus_demand(self, load_p_mw):
+        return self.fixed_pd + np.bincount(self.load_ppci, weights=load_p_mw * self.load_scaling,
+                                           minlength=self.num_buses)
+
+    def _balance_rhs(self, load_p_mw):
+        return (self._bus_demand(load_p_mw) - self._pmin_bus) / self.base_mva + self._pbusinj
+
+    def set_loads(self, load_p_mw):
+        """
+        Update the balance rows for new loads; the constraint matrix is untouched.
+
+        Args:
+            load_p_mw (numpy.ndarray): Active power of every row of the network's load table
+        """
+        rhs = self._balance_rhs(np.asarray(load_p_mw, dtype=np.float64))
+        self.highs.changeRowsBounds(self.num_buses, self._balance_rows, rhs, rhs)
+
+    def monitor_branches(self, mask=None):
+        """
+        Enforce the flow limits of some branch rows and relax the others.
+
+        Relaxed rows stay in the matrix with infinite bounds, so row numbers
+        and bases remain valid; their flows are still reported by the solver
+        and can be checked with branch_violations.
+
+        Args:
+            mask (numpy.ndarray, optional): Boolean per branch row; every row if None
+        """
+        mask = np.ones(self.num_branch_rows, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+        self.monitored = mask
+        self.highs.changeRowsBounds(self.num_branch_rows, self._branch_rows,
+                                    np.where(mask, self.branch_lower, -np.inf),
+                                    np.where(mask, self.branch_upper, np.inf))
+
+    def branch_violations(self, tol=1e-7):
+        """
+        Relaxed branch rows whose flow in the current solution exceeds its limit.
+
+        Returns:
+            numpy.ndarray: Branch row positions (0..num_branch_rows-1)
+        """
+        flows = np.asarray(self.highs.getSolution().row_value)[self.num_buses:]
+        over = (flows > self.branch_upper + tol) | (flows < self.branch_lower - tol)
+        return np.flatnonzero(over & ~self.monitored)
+
+    def generator_dispatch(self, gen_p_mw):
+        """
+        Split per-bus generation onto the generators of the LP.
+
+        The generation of a bus above the sum of its minimum outputs is shared in
+        proportion to each generator's range, then clipped to the limits.
+
+        Args:
+            gen_p_mw (numpy.ndarray): Generation per bus position of the network,
+                including fixed static generation (as in DCOPFSolution.gen_p_mw)
+
+        Returns:
+            numpy.ndarray: Output of every LP generator in MW
+        """
+        bus_p = np.bincount(self.bus_ppci, weights=np.asarray(gen_p_mw, dtype=np.float64) - self.sgen_p_mw,
+                            minlength=self.num_buses)
+        span = self.pmax - self.pmin
+        bus_span = np.bincount(self.gen_bus, weights=span, minlength=self.num_buses)
+        share = np.divide(span, bus_span[self.gen_bus], out=np.zeros_like(span), where=bus_span[self.gen_bus] > 0)
+        p = self.pmin + (bus_p - self._pmin_bus)[self.gen_bus] * share
+        return np.clip(p, self.pmin, self.pmax)
+
+    def branch_flows(self, dispatch, load_p_mw):
+        """
+        DC flows of the rated branches for a generator dispatch.
+
+        Angles come from the sparse LU of the reduced bus susceptance matrix;
+        any imbalance between dispatch and load is taken by the reference buses.
+
+        Args:
+            dispatch (numpy.ndarray): Output of every LP generator in MW
+            load_p_mw (numpy.ndarray): Loads per row of the load table
+
+        Returns:
+            numpy.ndarray: Activity of every branch row in per unit, comparable
+                to branch_lower and branch_upper
+        """
+        from scipy.sparse.linalg import splu
+
+        injection = (np.bincount(self.gen_bus, weights=dispatch, minlength=self.num_buses)
+                     - self._bus_demand(load_p_mw)) / self.base_mva - self._pbusinj
+        keep = np.ones(self.num_buses, dtype=bool)
+        keep[self._ref] = False
+        if self._lu is None:
+            self._lu = splu(self._bbus[keep][:, keep].tocsc())
+        theta = np.zeros(self.num_buses)
+        theta[keep] = self._lu.solve(injection[keep])
+        return self._bf @ theta
+
+    def seed_basis(self, dispatch, flows=None, binding_tol=1e-3):
+        """
+        Set the starting basis of the next solve from a guessed dispatch.
+
+        Generator segments below the guessed output start at their upper
+        bound and those above it at zero. Monitored branch rows whose guessed
+        flow is within binding_tol (per unit) of a limit start at that limit,
+        the other rows and the angles are basic. The remaining basic slots go
+        to the segments the guess leaves most partially filled.
+
+        Args:
+            dispatch (numpy.ndarray): Guessed output of every LP generator in MW
+            flows (numpy.ndarray, optional): Guessed branch row flows, see branch_flows
+            binding_tol (float): Distance from a limit at which a row counts as binding
+        """
+        status = self._highspy.HighsBasisStatus
+        fill = np.clip((dispatch[self.seg_gen] - self._seg_lo)
+                       / np.where(self._seg_width > 0, self._seg_width, 1.0), 0.0, 1.0)
+
+        row_status = np.full(self.num_rows, status.kBasic)
+        row_status[:self.num_buses] = status.kLower
+        if flows is not None:
+            at_upper = self.monitored & (flows >= self.branch_upper - binding_tol)
+            at_lower = self.monitored & (flows <= self.branch_lower + binding_tol)
+            row_status[self.num_buses:][at_upper] = status.kUpper
+            row_status[self.num_buses:][at_lower & ~at_upper] = status.kLower
+        num_binding = int(np.sum(row_status[self.num_buses:] != status.kBasic))
+
+        col_status = np.full(self.num_cols, status.kBasic)
+        col_status[self._ref] = status.kLower
+        # A basis has one basic variable per row.
+        num_basic = len(self._ref) + num_binding
+        seg_status = np.where(fill > 0.5, status.kUpper, status.kLower)
+        seg_status[np.argsort(-np.minimum(fill, 1.0 - fill), kind="stable")[:num_basic]] = status.kBasic
+        col_status[self.num_buses:] = seg_status
+
+        basis = self._highspy.HighsBasis()
+        basis.col_status = list(col_status)
+        basis.row_status = list(row_status)
+        basis.valid = True
+        self.highs.setBasis(basis)
+
+    def solve(self, load_p_mw=None, warm_start=True):
+        """
+        Solve the DC OPF, optionally for new loads.
+
+        Args:
+            load_p_mw (numpy.ndarray, optional): Loads per row of the load table; unchanged if None
+            warm_start (bool): Start from the basis of the previous solve; False discards it
+
+        Returns:
+            DCOPFSolution: The dispatch, angles and solver statistics
+        """
+        if load_p_mw is not None:
+            self.set_loads(load_p_mw)
+        if not warm_start:
+            self.highs.clearSolver()
+        start = time.perf_counter()
+        self.highs.run()
+        seconds = time.perf_counter() - start
+        iterations = int(self.highs.getInfo().simplex_iteration_count)
+        converged = self.highs.getModelStatus() == self._optimal
+
+        gen_p_mw = np.full(len(self.bus_ppci), np.nan)
+        theta = np.full(len(self.bus_ppci), np.nan)
+        total_cost = float("nan")
+        if converged:
+            x = np.asarray(self.highs.getSolution().col_value)
+            p = self.pmin + np.bincount(self.seg_gen, weights=x[self.num_buses:],
+                                        minlength=len(self.pmin)) * self.base_mva
+            total_cost = float(np.sum(self.cost[:, 0] * p ** 2 + self.cost[:, 1] * p + self.cost[:, 2]))
+            bus_p = np.bincount(self.gen_bus, weights=p, minlength=self.num_buses)
+            # Buses merged by closed switches share one internal bus; it is reported once.
+            first = np.unique(self.bus_ppci, return_index=True)[1]
+            gen_p_mw[:] = self.sgen_p_mw
+            gen_p_mw[first] += bus_p[self.bus_ppci[first]]
+            theta = x[:self.num_buses][self.bus_ppci]
+        return DCOPFSolution(converged, total_cost, gen_p_mw, theta, iterations, seconds)
+
+def order_scenarios(load_vectors):
+    """
+    Order scenarios so that consecutive ones have similar optimal bases.
+
+    Scenarios are sorted by total load. Which generators are marginal, and
+    hence the optimal basis, is mostly decided by the total demand, so
+    neighbours in this order usually share their basis even when individual
+    loads differ. With independently perturbed loads this needs far fewer
+    simplex iterations than nearest-neighbour or principal-component orders
+    of the full load vectors.
+
+    Args:
+        load_vectors (numpy.ndarray): Load vectors of shape [num_scenarios, num_loads],
+            or total loads of shape [num_scenarios]
+
+    Returns:
+        numpy.ndarray: Scenario positions in solve order
+    """
+    loads = np.asarray(load_vectors, dtype=np.float64)
+    totals = loads.sum(axis=1) if loads.ndim == 2 else loads
+    return np.argsort(totals, kind="stable")
+
+def compare_warm_start(cases=("case14", "case118", "case300"), num_scenarios=200, load_variation=0.3,
+                       seed=42, pandapower_scenarios=10):
+    """
+    Compare cold and warm-started DC OPF solves on the scenarios of iter_opf_scenarios.
+
+    Modes: "pandapower" (rundcopp per scenario, on the first pandapower_scenarios
+    scenarios), "cold" (HiGHS from scratch), "warm" (previous basis, scenario
+    order) and "warm_ordered" (previous basis, order_scenarios order). Solves
+    per second include updating the right-hand side and reading the solution.
+
+    Args:
+        cases (sequence): Test cases
+        num_scenarios (int): Scenarios per HiGHS mode
+        load_variation (float): Maximum load variation as a fraction of base load
+        seed (int): Base seed of the scenarios
+        pandapower_scenarios (int): Scenarios solved with rundcopp; 0 skips that mode
+
+    Returns:
+        list: One dictionary per (case, mode) with solves_per_second, mean_iterations,
+            converged and speedup over the cold HiGHS solves
+    """
+    import pandapower as pp
+    from pandapower.optimal_powerflow import OPFNotConverged
+    from gnn_opf.data.power_networks import load_power_network
+    from gnn_opf.pypsa_data_generation import scenario_load_p_mw
+
+    rows = []
+    for case in cases:
+        net = load_power_network(case)
+        model = DCOPFModel(net)
+        loads = np.stack([scenario_load_p_mw(model.base_load_p_mw, i, seed, load_variation)
+                          for i in range(num_scenarios)])
+        runs = {}
+        if pandapower_scenarios:
+            start = time.perf_counter()
+            for p_mw in loads[:pandapower_scenarios]:
+                net.load["p_mw"] = p_mw
+                try:
+                    pp.rundcopp(net)
+                except OPFNotConverged:
+                    pass
+            runs["pandapower"] = (pandapower_scenarios, time.perf_counter() - start, float("nan"), float("nan"))
+        for mode, order, warm in (("cold", np.arange(num_scenarios), False),
+                                  ("warm", np.arange(num_scenarios), True),
+                                  ("warm_ordered", order_scenarios(loads), True)):
+            model.solve(loads[order[0]], warm_start=False)
+            start = time.perf_counter()
+            solutions = [model.solve(loads[i], warm_start=warm) for i in order]
+            seconds = time.perf_counter() - start
+            runs[mode] = (num_scenarios, seconds, np.mean([s.iterations for s in solutions]),
+                          np.mean([s.converged for s in solutions]))
+        cold_rate = runs["cold"][0] / runs["cold"][1]
+        for mode, (count, seconds, iterations, converged) in runs.items():
+            rows.append({"case": case, "mode": mode, "solves_per_second": count / seconds,
+                         "mean_iterations": float(iterations), "converged": float(converged),
+                         "speedup": count / seconds / cold_rate})
+    return rows
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare cold and warm-started DC OPF solves")
+    parser.add_argument("--cases", nargs="+", default=["case14", "case118", "case300"])
+    parser.add_argument("--scenarios", type=int, default=200)
+    parser.add_argument("--load-variation", type=float, default=0.3)
+    parser.add_argument("--pandapower-scenarios", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'case':<16} {'mode':<14} {'solves/s':>10} {'iterations':>11} {'vs cold':>8}")
+    for row in compare_warm_start(args.cases, args.scenarios, args.load_variation,
+                                  pandapower_scenarios=args.pandapower_scenarios):
+        print(f"{row['case']:<16} {row['mode']:<14} {row['solves_per_second']:>10.1f} "
+              f"{row['mean_iterations']:>11.1f} {row['speedup']:>8.2f}")
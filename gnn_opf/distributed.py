@@ -0,0 +1,244 @@
+"""
+Data-parallel training of PhysicsInformedGNN on CPU with torch.distributed.
+
+train_distributed spawns world_size local processes joined in a gloo process
+group. Every rank holds the same ScenarioStore and model replica; the
+ShardedBatchSampler hands each rank its shard of every global batch, and the
+gradients are summed across ranks with one all-reduce per step.
+
+Each rank computes its loss as (sum of per-scenario losses in its shard) /
+(global batch size), so the summed gradient is exactly the gradient of the
+single-process batch mean. Training with any world_size therefore follows the
+same trajectory as train_gnn(shared_topology=True) with the same global batch
+size and scenario order, up to floating point summation order.
+"""
+
+import os
+import socket
+import tempfile
+import time
+
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+import torch.optim as optim
+from torch.utils.data import DataLoader, Sampler
+
+from gnn_opf.gnn_opf import PhysicsInformedGNN, normalized_adjacency, physics_penalty
+from gnn_opf.data.scenario_store import build_scenario_store
+
+class ShardedBatchSampler(Sampler):
+    """
+    Deterministic batch sampler splitting every global batch across ranks.
+
+    The scenario order of an epoch is a permutation seeded by seed + epoch (or
+    the identity without shuffling), so all ranks agree on it without
+    communicating. Global batch b holds positions [b * batch_size, (b + 1) * batch_size)
+    of that order and rank r gets every world_size-th scenario of it, starting
+    at position r. Shards of one global batch differ in size by at most one.
+    """
+
+    def __init__(self, num_samples, batch_size, rank=0, world_size=1, shuffle=True, seed=0, drop_last=False):
+        """
+        Args:
+            num_samples (int): Number of scenarios in the store
+            batch_size (int): Global batch size, summed over all ranks
+            rank (int): Rank of this process
+            world_size (int): Number of processes
+            shuffle (bool): Whether to permute the scenarios every epoch
+            seed (int): Base seed of the permutation
+            drop_last (bool): Whether to drop the last incomplete global batch
+        """
+        self.num_samples = num_samples
+        self.batch_size = batch_size
+        self.rank = rank
+        self.world_size = world_size
+        self.shuffle = shuffle
+        self.seed = seed
+        self.drop_last = drop_last
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        """Select the permutation of the given epoch."""
+        self.epoch = epoch
+
+    def __len__(self):
+        if self.drop_last:
+            return self.num_samples // self.batch_size
+        return -(-self.num_samples // self.batch_size)
+
+    def __iter__(self):
+        if self.shuffle:
+            generator = torch.Generator().manual_seed(self.seed + self.epoch)
+            order = torch.randperm(self.num_samples, generator=generator)
+        else:
+            order = torch.arange(self.num_samples)
+        for b in range(len(self)):
+            batch = order[b * self.batch_size:(b + 1) * self.batch_size]
+            yield batch[self.rank::self.world_size].tolist()
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _all_reduce_gradients(model):
+    """Sum the gradients of every parameter across ranks in one flat all-reduce."""
+    grads = [p.grad for p in model.parameters()]
+    flat = torch.cat([g.reshape(-1) for g in grads])
+    dist.all_reduce(flat, op=dist.ReduceOp.SUM)
+    offset = 0
+    for g in grads:
+        g.copy_(flat[offset:offset + g.numel()].view_as(g))
+        offset += g.numel()
+
+def _train_rank(rank, world_size, port, scenarios, config, checkpoint_path):
+    """
+    Training loop of one rank; rank 0 saves the final state_dict to checkpoint_path.
+    """
+    if world_size > 1:
+        torch.set_num_threads(config["threads_per_rank"])
+        dist.init_process_group("gloo", init_method=f"tcp://127.0.0.1:{port}", rank=rank, world_size=world_size)
+    try:
+        store = build_scenario_store(scenarios)
+        sampler = ShardedBatchSampler(len(store), config["batch_size"], rank=rank, world_size=world_size,
+                                      shuffle=config["shuffle"], seed=config["seed"])
+        loader = DataLoader(range(len(store)), batch_sampler=sampler, collate_fn=store.stack)
+        topology_graph = store.topology.to_pyg_data()
+        adjacency = normalized_adjacency(store.edge_index, store.num_nodes)
+
+        torch.manual_seed(config["seed"])
+        model = PhysicsInformedGNN()
+        optimizer = optim.Adam(model.parameters(), lr=config["learning_rate"])
+        num_epochs = config["num_epochs"]
+
+        start = time.perf_counter()
+        for epoch in range(num_epochs):
+            sampler.set_epoch(epoch)
+            total_loss = torch.zeros(1)
+            for b, (x, targets, loads) in enumerate(loader):
+                model.train()
+                optimizer.zero_grad()
+                global_size = min(config["batch_size"], len(store) - b * config["batch_size"])
+                if len(targets):
+                    predictions = model.forward_shared(x, adjacency)
+                    pred_total = predictions.mean(dim=(1, 2))
+                    mse_loss = ((pred_total - targets) ** 2).sum()
+                    penalty = physics_penalty(topology_graph, predictions, loads=loads, reduction="none").sum()
+                    loss = (mse_loss + penalty) / global_size
+                else:
+                    # Empty shard of a short last batch: still join the all-reduce.
+                    loss = sum(p.sum() for p in model.parameters()) * 0.0
+                loss.backward()
+                if world_size > 1:
+                    _all_reduce_gradients(model)
+                optimizer.step()
+                total_loss += loss.detach()
+            if world_size > 1:
+                dist.all_reduce(total_loss, op=dist.ReduceOp.SUM)
+            if rank == 0 and config["verbose"]:
+                print(f"Epoch {epoch+1}/{num_epochs}, Loss: {total_loss.item():.4f}")
+        elapsed = time.perf_counter() - start
+
+        if rank == 0:
+            torch.save({"state_dict": model.state_dict(), "train_seconds": elapsed}, checkpoint_path)
+    finally:
+        if world_size > 1:
+            dist.destroy_process_group()
+
+def train_distributed(scenarios, world_size=2, num_epochs=10, learning_rate=0.01, batch_size=64, shuffle=True,
+                      seed=0, checkpoint_path=None, verbose=True, return_seconds=False):
+    """
+    Train PhysicsInformedGNN with world_size data-parallel CPU processes.
+
+    Args:
+        scenarios (list): Scenario dictionaries as returned by train_gnn.read_scenarios
+        world_size (int): Number of processes; 1 trains in the calling process
+        num_epochs (int): Number of epochs
+        learning_rate (float): Adam learning rate
+        batch_size (int): Global batch size, split across the ranks
+        shuffle (bool): Whether to permute the scenarios every epoch (seeded by seed + epoch)
+        seed (int): Seed of the model initialization and of the scenario order
+        checkpoint_path (str, optional): Where rank 0 saves the final state_dict;
+            a temporary file is used (and removed) if None
+        verbose (bool): Whether rank 0 prints the loss of each epoch
+        return_seconds (bool): Also return the wall time of the training loop
+
+    Returns:
+        PhysicsInformedGNN: The trained model (and the training seconds if return_seconds)
+    """
+    config = {
+        "num_epochs": num_epochs,
+        "learning_rate": learning_rate,
+        "batch_size": batch_size,
+        "shuffle": shuffle,
+        "seed": seed,
+        "verbose": verbose,
+        "threads_per_rank": max(1, (os.cpu_count() or 1) // world_size),
+    }
+    remove = checkpoint_path is None
+    if remove:
+        fd, checkpoint_path = tempfile.mkstemp(suffix=".pth")
+        os.close(fd)
+    try:
+        if world_size == 1:
+            _train_rank(0, 1, None, scenarios, config, checkpoint_path)
+        else:
+            mp.spawn(_train_rank, args=(world_size, _free_port(), scenarios, config, checkpoint_path),
+                     nprocs=world_size, join=True)
+        checkpoint = torch.load(checkpoint_path, map_location="cpu")
+    finally:
+        if remove:
+            os.remove(checkpoint_path)
+
+    model = PhysicsInformedGNN()
+    model.load_state_dict(checkpoint["state_dict"])
+    if return_seconds:
+        return model, checkpoint["train_seconds"]
+    return model
+
+def scaling_report(scenarios, worker_counts=(1, 2, 4, 8, 16), num_epochs=2, batch_size=256, **kwargs):
+    """
+    Measure the strong-scaling efficiency of train_distributed.
+
+    The global batch size is fixed, so each run does the same optimizer steps;
+    efficiency is t_1 / (n * t_n) for n workers.
+
+    Args:
+        scenarios (list): Scenario dictionaries as returned by train_gnn.read_scenarios
+        worker_counts (sequence): World sizes to measure
+        num_epochs (int): Epochs per run
+        batch_size (int): Global batch size
+        **kwargs: Further arguments of train_distributed
+
+    Returns:
+        list: One dictionary per world size with workers, seconds, scenarios_per_second, speedup and efficiency
+    """
+    report = []
+    for workers in worker_counts:
+        _, seconds = train_distributed(scenarios, world_size=workers, num_epochs=num_epochs, batch_size=batch_size,
+                                       verbose=False, return_seconds=True, **kwargs)
+        report.append({"workers": workers, "seconds": seconds,
+                       "scenarios_per_second": num_epochs * len(scenarios) / seconds})
+    base = report[0]["seconds"] * report[0]["workers"]
+    for row in report:
+        row["speedup"] = base / row["seconds"]
+        row["efficiency"] = row["speedup"] / row["workers"]
+    return report
+
+if __name__ == "__main__":
+    import argparse
+    from gnn_opf.train_gnn import read_scenarios
+
+    parser = argparse.ArgumentParser(description="Data-parallel GNN training scaling report")
+    parser.add_argument("--csv", default="data/generated_opf_scenarios.csv")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--epochs", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    rows = scaling_report(read_scenarios(args.csv), args.workers, num_epochs=args.epochs, batch_size=args.batch_size)
+    print(f"{'workers':>8} {'seconds':>9} {'scen/s':>10} {'speedup':>8} {'efficiency':>10}")
+    for row in rows:
+        print(f"{row['workers']:>8} {row['seconds']:>9.3f} {row['scenarios_per_second']:>10.1f} "
+              f"{row['speedup']:>8.2f} {row['efficiency']:>10.2f}")
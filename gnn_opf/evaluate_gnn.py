@@ -1,54 +1,148 @@
+import pandas as pd
 import torch
+from gnn_opf import instrumentation
+from gnn_opf.checkpoint import is_checkpoint, load_checkpoint, save_checkpoint
+from gnn_opf.inference_cache import invalidate_shared_cache
 from gnn_opf.train_gnn import train_gnn
-from gnn_opf.gnn_opf import PhysicsInformedGNN, physics_penalty
+from gnn_opf.gnn_opf import PhysicsInformedGNN, normalized_adjacency, physics_penalty
 from gnn_opf.data.power_networks import load_network_as_pyg
 
-def save_model(model, path="model_checkpoint.pth"):
+def save_model(model, path="model_checkpoint.pth", optimizer=None, epoch=None, topology=None):
     """
     Save the trained model to the specified path.
+
+    The file is a gnn_opf.checkpoint checkpoint, so it records the model
+    dimensions and, when given, the optimizer state, epoch and topology
+    fingerprint needed to resume training.
     """
-    torch.save(model.state_dict(), path)
+    save_checkpoint(path, model, optimizer=optimizer, epoch=epoch, topology=topology)
     print(f"Model saved to {path}")
 
-def load_model(path="model_checkpoint.pth", input_dim=1, hidden_dim=16, output_dim=1):
+def load_model(path="model_checkpoint.pth", input_dim=None, hidden_dim=None, output_dim=None, mmap=True):
     """
     Load the model from the specified path.
+
+    The dimensions are read from the checkpoint; the arguments are only needed
+    for bare state_dict files written by earlier versions (defaulting to
+    1, 16 and 1). The model is built on the meta device and takes over the
+    loaded tensors, so no parameters are allocated and initialized only to be
+    overwritten; with mmap=True those tensors are pages of the memory-mapped
+    file, read on first use instead of up front.
+
+    Loading a checkpoint clears the shared inference cache (see gnn_opf.inference_cache).
     """
-    model = PhysicsInformedGNN(input_dim, hidden_dim, output_dim)
-    model.load_state_dict(torch.load(path, map_location=torch.device('cpu')))
+    state = load_checkpoint(path, mmap=mmap)
+    if is_checkpoint(state):
+        config, state_dict = state["config"], state["state_dict"]
+    else:
+        config = {"input_dim": 1, "hidden_dim": 16, "output_dim": 1}
+        # Bare state_dict, or the {"state_dict", ...} files of gnn_opf.distributed.
+        state_dict = state["state_dict"] if "state_dict" in state else state
+    overrides = {"input_dim": input_dim, "hidden_dim": hidden_dim, "output_dim": output_dim}
+    config.update({k: v for k, v in overrides.items() if v is not None})
+    with torch.device("meta"):
+        model = PhysicsInformedGNN(**config)
+    model.load_state_dict(state_dict, assign=True)
     model.eval()
+    invalidate_shared_cache()
     print(f"Model loaded from {path}")
     return model
 
-def evaluate_model(model, test_csv="data/generated_opf_scenarios.csv"):
+def compute_metrics(predicted, target, node_predictions=None, node_targets=None):
+    """
+    Compute error metrics as tensor reductions.
+
+    Args:
+        predicted (torch.Tensor): Predicted totals, shape [num_scenarios]
+        target (torch.Tensor): Target totals, shape [num_scenarios]
+        node_predictions (torch.Tensor, optional): Per-bus predictions, shape [num_scenarios, num_buses]
+        node_targets (torch.Tensor, optional): Per-bus targets, shape [num_scenarios, num_buses]
+
+    Returns:
+        dict: mae, rmse, mape (in percent, over non-zero targets; NaN if every target
+            is zero) and max_error as floats, plus per_bus_mae and per_bus_max_error
+            tensors of shape [num_buses] when per-bus values are given
+    """
+    error = predicted - target
+    abs_error = error.abs()
+    nonzero = target != 0
+    if nonzero.any():
+        mape = (abs_error[nonzero] / target[nonzero].abs()).mean().item() * 100.0
+    else:
+        mape = float("nan")
+    metrics = {
+        "mae": abs_error.mean().item(),
+        "rmse": error.pow(2).mean().sqrt().item(),
+        "mape": mape,
+        "max_error": abs_error.max().item(),
+    }
+    if node_predictions is not None and node_targets is not None:
+        node_error = (node_predictions - node_targets).abs()
+        metrics["per_bus_mae"] = node_error.mean(dim=0)
+        metrics["per_bus_max_error"] = node_error.max(dim=0).values
+    return metrics
+
+def _node_targets(path):
+    """Per-bus gen_p_mw targets of a Parquet dataset, shape [num_scenarios, num_buses], or None for CSV files."""
+    from gnn_opf.data.scenario_io import is_parquet_path, read_scenario_table
+    if not is_parquet_path(path):
+        return None
+    column = read_scenario_table(path, columns=["gen_p_mw"]).column("gen_p_mw").combine_chunks()
+    num_buses = column.type.list_size
+    values = column.flatten().to_numpy(zero_copy_only=False).reshape(-1, num_buses)
+    return torch.from_numpy(values.copy())
+
+def evaluate_model(model, test_csv="data/generated_opf_scenarios.csv", batch_size=4096):
     """
     Evaluate the model on the test scenario data.
-    This function uses the test scenarios to run inference on the network and calculates a dummy evaluation metric.
+    All test scenarios are run through the shared-topology path of the model in
+    batches of batch_size, and the node predictions of each scenario are averaged
+    as a proxy for its total cost.
+
+    Per-bus metrics need per-bus targets, which only Parquet datasets carry: for
+    those, the prediction of each bus (averaged over output channels) is compared
+    with the gen_p_mw dispatch of that bus. CSV files only yield the aggregate metrics.
+
+    Returns:
+        pandas.DataFrame: One row per scenario with columns scenario, predicted_total,
+            target_total and error. Aggregate metrics (see compute_metrics) are
+            stored in ``results.attrs["metrics"]``.
     """
-    from gnn_opf.train_gnn import read_scenarios, set_network_loads
-    from gnn_opf.data.graph_data import convert_network_to_graph
-    from gnn_opf.pypsa_setup import load_network_config
-    scenarios = read_scenarios(test_csv)
-    evaluation_results = []
-    for scenario in scenarios:
-        # Load network and update loads for each scenario.
-        network = load_network_config("config/ieee_14-bus_config.yaml")
-        set_network_loads(network, scenario["scenario"])
-        graph = convert_network_to_graph(network)
-        
-        with torch.no_grad():
-            predictions = model(graph)
+    from gnn_opf.train_gnn import read_scenarios
+    from gnn_opf.data.scenario_store import build_scenario_store
+    with instrumentation.timer("evaluate.read_scenarios"):
+        scenarios = read_scenarios(test_csv)
+    with instrumentation.timer("evaluate.build_store"):
+        store = build_scenario_store(scenarios)
+    adjacency = normalized_adjacency(store.edge_index, store.num_nodes)
+
+    with torch.no_grad(), instrumentation.profile("evaluate_model"):
         # Aggregate predictions: mean value over nodes as a proxy metric.
-        pred_total = predictions.mean().item()
-        target_total = scenario["total_cost"]
-        error = abs(pred_total - target_total)
-        evaluation_results.append({
-            "scenario": scenario["scenario"],
-            "predicted_total": pred_total,
-            "target_total": target_total,
-            "error": error
-        })
-    return evaluation_results
+        node_pred = []
+        for start in range(0, len(store), batch_size):
+            with instrumentation.timer("evaluate.forward"):
+                node_pred.append(
+                    model.forward_shared(store.features[start:start + batch_size], adjacency).mean(dim=2)
+                )
+        node_pred = torch.cat(node_pred) if node_pred else torch.empty(0, store.num_nodes)
+        pred_total = node_pred.mean(dim=1)
+    instrumentation.count("evaluate.scenarios", len(store))
+
+    error = (pred_total - store.targets).abs()
+    results = pd.DataFrame({
+        "scenario": store.scenario_ids.numpy(),
+        "predicted_total": pred_total.numpy(),
+        "target_total": store.targets.numpy(),
+        "error": error.numpy(),
+    })
+    if len(store):
+        node_targets = _node_targets(test_csv)
+        if node_targets is not None and node_targets.shape != node_pred.shape:
+            raise ValueError(f"{test_csv} has per-bus targets of shape {tuple(node_targets.shape)}, "
+                             f"the model predicts {tuple(node_pred.shape)}")
+        with instrumentation.timer("evaluate.metrics"):
+            results.attrs["metrics"] = compute_metrics(pred_total, store.targets, node_pred, node_targets)
+    return results
 
 if __name__ == "__main__":
     # Train the model for demonstration; use a small epoch count if needed.
@@ -57,8 +151,8 @@ if __name__ == "__main__":
     loaded_model = load_model("model_checkpoint.pth")
     results = evaluate_model(loaded_model)
     print("Evaluation Results:")
-    for res in results:
-        print(res)
+    print(results.to_string(index=False))
+    print(results.attrs.get("metrics"))
 
     # Load IEEE 14-bus network in PyG format
     network = load_network_as_pyg('case14') 
\ No newline at end of file
@@ -0,0 +1,242 @@
+"""
+Frozen TorchScript inference artifacts for PhysicsInformedGNN.
+
+export_torchscript compiles a trained model for one case into a standalone
+TorchScript file:
+
+  - the GCN-normalized adjacency of the case is baked in as a sparse CSR buffer,
+    so no edge_index, normalization or torch_geometric code runs at inference;
+  - every layer is one SpMM plus one addmm with the bias fused in, and the
+    ReLU is applied in place; the cheaper of (A X) W and A (X W) is chosen per
+    layer from the channel counts at export time;
+  - the module is frozen, so weights are inlined as constants.
+
+The artifact maps loads of shape [num_scenarios, num_buses, input_dim] (or
+[num_buses, input_dim]) to predictions of the same layout and is loaded with
+torch.jit.load alone; neither gnn_opf nor torch_geometric is needed to run it.
+ONNX is not offered: its exporters do not support sparse matrix products.
+"""
+
+import json
+import time
+import warnings
+
+import torch
+import torch.nn as nn
+
+from gnn_opf.gnn_opf import normalized_adjacency
+from gnn_opf.data.power_networks import load_topology
+
+EXPORT_FORMAT_VERSION = 1
+_META_FILE = "gnn_opf.json"
+
+class FrozenGCN(nn.Module):
+    """
+    Two-layer GCN with a fixed normalized adjacency, written for scripting.
+
+    Args:
+        model (PhysicsInformedGNN): Trained model to copy the weights from
+        adjacency (torch.Tensor): Normalized adjacency (sparse CSR) of the case
+    """
+
+    def __init__(self, model, adjacency):
+        super().__init__()
+        self.register_buffer("adjacency", adjacency)
+        self.register_buffer("weight1", model.conv1.lin.weight.detach().t().contiguous())
+        self.register_buffer("bias1", model.conv1.bias.detach().clone())
+        self.register_buffer("weight2", model.conv2.lin.weight.detach().t().contiguous())
+        self.register_buffer("bias2", model.conv2.bias.detach().clone())
+        # Aggregate before the linear map when it widens the features.
+        self.aggregate_first1 = model.conv1.in_channels < model.conv1.out_channels
+        self.aggregate_first2 = model.conv2.in_channels < model.conv2.out_channels
+        self.num_nodes = adjacency.size(0)
+
+    def _layer(self, h, weight, bias, aggregate_first: bool):
+        # h: node-major [num_nodes, num_scenarios, channels]
+        num_scenarios = h.size(1)
+        if aggregate_first:
+            h = torch.sparse.mm(self.adjacency, h.reshape(self.num_nodes, -1))
+            h = torch.addmm(bias, h.reshape(-1, weight.size(0)), weight)
+            return h.reshape(self.num_nodes, num_scenarios, -1)
+        h = torch.mm(h.reshape(-1, weight.size(0)), weight).reshape(self.num_nodes, -1)
+        h = torch.sparse.mm(self.adjacency, h).reshape(self.num_nodes, num_scenarios, -1)
+        return h + bias
+
+    def forward(self, x):
+        single = x.dim() == 2
+        if single:
+            x = x.unsqueeze(0)
+        h = x.transpose(0, 1)
+        h = torch.relu_(self._layer(h, self.weight1, self.bias1, self.aggregate_first1))
+        h = self._layer(h, self.weight2, self.bias2, self.aggregate_first2)
+        h = h.transpose(0, 1)
+        if single:
+            h = h.squeeze(0)
+        return h
+
+def freeze_model(model, case_name):
+    """
+    Compile a model for one case into a frozen TorchScript module.
+
+    Args:
+        model (PhysicsInformedGNN): Trained model
+        case_name (str): Name of the test case whose topology is baked in
+
+    Returns:
+        torch.jit.ScriptModule: The frozen module
+    """
+    topology = load_topology(case_name)
+    adjacency = normalized_adjacency(topology.edge_index, topology.num_nodes)
+    with warnings.catch_warnings():
+        # TorchScript is deprecated upstream but remains the dependency-free runtime.
+        warnings.simplefilter("ignore", FutureWarning)
+        scripted = torch.jit.script(FrozenGCN(model, adjacency).eval())
+        return torch.jit.freeze(scripted)
+
+def export_torchscript(model, case_name, path):
+    """
+    Export a model for one case as a frozen TorchScript file.
+
+    Args:
+        model (PhysicsInformedGNN): Trained model
+        case_name (str): Name of the test case whose topology is baked in
+        path (str): Output file
+
+    Returns:
+        str: The output path
+    """
+    frozen = freeze_model(model, case_name)
+    meta = {
+        "format_version": EXPORT_FORMAT_VERSION,
+        "case_name": case_name,
+        "num_nodes": load_topology(case_name).num_nodes,
+        "input_dim": model.conv1.in_channels,
+        "output_dim": model.conv2.out_channels,
+    }
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", FutureWarning)
+        torch.jit.save(frozen, str(path), _extra_files={_META_FILE: json.dumps(meta)})
+    return str(path)
+
+def load_artifact(path):
+    """
+    Load an exported artifact.
+
+    Args:
+        path (str): File written by export_torchscript
+
+    Returns:
+        tuple: (torch.jit.ScriptModule, metadata dictionary)
+    """
+    extra = {_META_FILE: ""}
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", FutureWarning)
+        module = torch.jit.load(str(path), map_location="cpu", _extra_files=extra)
+    return module, json.loads(extra[_META_FILE])
+
+def verify_artifact(module, model, case_name, num_scenarios=8, atol=1e-4, rtol=1e-4):
+    """
+    Check an artifact against the eager model on random loads of a case.
+
+    Args:
+        module (torch.jit.ScriptModule): Exported module
+        model (PhysicsInformedGNN): Eager reference model
+        case_name (str): Name of the test case
+        num_scenarios (int): Number of random load scenarios
+        atol (float): Absolute tolerance
+        rtol (float): Relative tolerance
+
+    Returns:
+        float: Maximum absolute difference between the two
+
+    Raises:
+        AssertionError: If the outputs differ beyond the tolerances
+    """
+    topology = load_topology(case_name)
+    adjacency = normalized_adjacency(topology.edge_index, topology.num_nodes)
+    generator = torch.Generator().manual_seed(0)
+    x = torch.rand(num_scenarios, topology.num_nodes, model.conv1.in_channels, generator=generator)
+    x = x * topology.voltage.max().clamp(min=1.0)
+    with torch.no_grad():
+        expected = model.forward_shared(x, adjacency)
+        actual = module(x)
+    if not torch.allclose(actual, expected, atol=atol, rtol=rtol):
+        raise AssertionError(f"Exported {case_name} model differs from eager by {(actual - expected).abs().max():.3g}")
+    return (actual - expected).abs().max().item()
+
+def _median_seconds(fn, repeats):
+    fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2]
+
+def compare_latency(model, cases=("case14", "case118", "case300", "case1354pegase", "case2869pegase"),
+                    batch_sizes=(1, 64), repeats=20):
+    """
+    Compare eager and exported inference latency.
+
+    "eager" is the per-graph PyG forward of a single scenario as used by
+    run_inference (batch size 1) or forward_shared (larger batches).
+
+    Args:
+        model (PhysicsInformedGNN): Trained model
+        cases (sequence): Test cases
+        batch_sizes (sequence): Scenarios per call
+        repeats (int): Timed calls per point
+
+    Returns:
+        list: One dictionary per (case, batch size) with eager_ms, exported_ms, speedup and max_abs_diff
+    """
+    rows = []
+    model = model.eval()
+    for case in cases:
+        topology = load_topology(case)
+        graph = topology.to_pyg_data()
+        module = freeze_model(model, case)
+        max_diff = verify_artifact(module, model, case)
+        for batch_size in batch_sizes:
+            x = topology.voltage.expand(batch_size, -1).unsqueeze(-1).contiguous()
+            if batch_size == 1:
+                graph.x = x[0]
+
+                def eager():
+                    return model(graph)
+            else:
+                def eager():
+                    adjacency = normalized_adjacency(topology.edge_index, topology.num_nodes)
+                    return model.forward_shared(x, adjacency)
+            with torch.no_grad():
+                eager_s = _median_seconds(eager, repeats)
+                exported_s = _median_seconds(lambda: module(x), repeats)
+            rows.append({"case": case, "batch_size": batch_size, "eager_ms": eager_s * 1e3,
+                         "exported_ms": exported_s * 1e3, "speedup": eager_s / exported_s,
+                         "max_abs_diff": max_diff})
+    return rows
+
+if __name__ == "__main__":
+    import argparse
+    from gnn_opf.gnn_opf import PhysicsInformedGNN
+
+    parser = argparse.ArgumentParser(description="Export a trained model as a frozen TorchScript artifact")
+    parser.add_argument("--checkpoint", help="Model checkpoint (a fresh model if omitted)")
+    parser.add_argument("--case", default="case14")
+    parser.add_argument("--output", default="model_case14.pt")
+    parser.add_argument("--benchmark", action="store_true", help="Print eager vs exported latency")
+    args = parser.parse_args()
+
+    if args.checkpoint:
+        from gnn_opf.evaluate_gnn import load_model
+        model = load_model(args.checkpoint)
+    else:
+        model = PhysicsInformedGNN().eval()
+    path = export_torchscript(model, args.case, args.output)
+    module, _ = load_artifact(path)
+    print(f"Exported {args.case} to {path}; max |exported - eager| = {verify_artifact(module, model, args.case):.3g}")
+    if args.benchmark:
+        print(f"{'case':<16} {'batch':>6} {'eager ms':>10} {'export ms':>10} {'speedup':>8}")
+        for row in compare_latency(model):
+            print(f"{row['case']:<16} {row['batch_size']:>6} {row['eager_ms']:>10.3f} "
+                  f"{row['exported_ms']:>10.3f} {row['speedup']:>8.2f}")
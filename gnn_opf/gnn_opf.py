@@ -1,6 +1,57 @@
+import weakref
 import torch
 import torch.nn as nn
 from torch_geometric.nn import GCNConv
+from torch_geometric.nn.conv.gcn_conv import gcn_norm
+from gnn_opf.data.dc_model import dc_network
+
+# Normalized adjacency per edge_index tensor, keyed by id() and dropped when
+# the edge_index is garbage collected.
+_ADJACENCY_CACHE = {}
+
+def normalized_adjacency(edge_index, num_nodes):
+    """
+    Return the GCN-normalized adjacency D^-1/2 (A + I) D^-1/2 as a sparse CSR tensor.
+
+    The matrix is computed once per edge_index tensor and reused afterwards, so
+    scenarios sharing a topology share its normalization.
+
+    Args:
+        edge_index (torch.Tensor): Edge indices of the topology, shape [2, num_edges]
+        num_nodes (int): Number of nodes in the topology
+
+    Returns:
+        torch.Tensor: Sparse CSR matrix of shape [num_nodes, num_nodes] where row i
+            aggregates the messages sent to node i
+    """
+    key = id(edge_index)
+    entry = _ADJACENCY_CACHE.get(key)
+    if entry is not None and entry[0]() is edge_index and entry[1] == num_nodes:
+        return entry[2]
+
+    norm_index, norm_weight = gcn_norm(edge_index, None, num_nodes, add_self_loops=True)
+    adjacency = torch.sparse_coo_tensor(
+        norm_index.flip(0), norm_weight, (num_nodes, num_nodes)
+    ).coalesce().to_sparse_csr()
+    _ADJACENCY_CACHE[key] = (weakref.ref(edge_index), num_nodes, adjacency)
+    weakref.finalize(edge_index, _ADJACENCY_CACHE.pop, key, None)
+    return adjacency
+
+def _shared_gcn_layer(conv, h, adjacency):
+    """
+    Apply a GCNConv to node-major features [num_nodes, num_scenarios, channels].
+
+    All scenarios are propagated with a single SpMM by laying them out side by
+    side along the feature dimension. The cheaper of (A X) W and A (X W) is used.
+    """
+    num_nodes, num_scenarios, _ = h.shape
+    if conv.in_channels < conv.out_channels:
+        h = torch.sparse.mm(adjacency, h.reshape(num_nodes, -1)).reshape(num_nodes, num_scenarios, -1)
+        h = conv.lin(h)
+    else:
+        h = conv.lin(h)
+        h = torch.sparse.mm(adjacency, h.reshape(num_nodes, -1)).reshape(num_nodes, num_scenarios, -1)
+    return h + conv.bias
 
 class PhysicsInformedGNN(nn.Module):
     def __init__(self, input_dim=1, hidden_dim=16, output_dim=1):
@@ -16,11 +67,58 @@ class PhysicsInformedGNN(nn.Module):
         x = self.conv2(x, edge_index)
         return x
 
-def physics_penalty(data, predictions):
+    def forward_shared(self, x, adjacency):
+        """
+        Run many scenarios of one topology through the model at once.
+
+        Args:
+            x (torch.Tensor): Node features of shape [num_scenarios, num_nodes, input_dim]
+            adjacency (torch.Tensor): Normalized adjacency from normalized_adjacency
+
+        Returns:
+            torch.Tensor: Predictions of shape [num_scenarios, num_nodes, output_dim]
+        """
+        h = x.transpose(0, 1)
+        h = _shared_gcn_layer(self.conv1, h, adjacency)
+        h = self.relu(h)
+        h = _shared_gcn_layer(self.conv2, h, adjacency)
+        return h.transpose(0, 1)
+
+def physics_penalty(data, predictions, loads, reduction="mean"):
     """
-    Compute a simple penalty term as a placeholder for physics constraints.
-    In this example, we enforce that predictions stay near 100.
+    Compute a DC power-flow penalty for predicted bus generation.
+
+    Predictions are read as active generation per bus (MW), so the net injection
+    is predictions - loads. Two violations are penalized, both in per unit of the
+    system base power:
+      - power balance: the total injection of each electrical island must be zero
+        in a lossless DC network;
+      - line flow limits: DC line flows, obtained from the cached sparse B matrix
+        factorization of the topology, must stay within their thermal limits.
+
+    Args:
+        data: Topology of the scenarios (CaseTopology or PyG Data with edge_index,
+            x_ohm, capacity, voltage and sn_mva), shared by every scenario
+        predictions (torch.Tensor): Bus generation, shape [num_nodes, 1] or
+            [num_scenarios, num_nodes(, 1)] or a disjoint-union batch of shape
+            [num_scenarios * num_nodes, 1]
+        loads (torch.Tensor): Bus loads in MW, same layout as predictions. Node
+            features (data.x) are not loads and are never used in their place.
+        reduction (str): "mean" for a scalar, "none" for one penalty per scenario
+
+    Returns:
+        torch.Tensor: Non-negative penalty
     """
-    target_value = 100.0  # Dummy physical target for demonstration
-    penalty = torch.mean(torch.abs(predictions - target_value))
-    return penalty 
\ No newline at end of file
+    network = dc_network(data)
+    generation = predictions.reshape(-1, network.num_nodes)
+    injections = generation - loads.reshape(-1, network.num_nodes)
+
+    sn_mva = network.sn_mva
+    balance = network.island_imbalance(injections).abs().mean(dim=1) / sn_mva
+    if network.num_lines:
+        flows = network.line_flows(injections)
+        overload = torch.relu(flows.abs() - network.limit_mw_t).mean(dim=1) / sn_mva
+    else:
+        overload = torch.zeros_like(balance)
+    penalty = balance + overload
+    return penalty.mean() if reduction == "mean" else penalty
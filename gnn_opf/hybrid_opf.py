@@ -0,0 +1,286 @@
+"""
+Hybrid DC OPF: GNN predictions seed the exact HiGHS solve.
+
+A PhysicsInformedGNN that maps bus loads to bus generation (both in MW, as
+in the per-bus vectors of iter_opf_scenarios) provides a guess of the
+optimal dispatch. HybridOPFSolver turns that guess into
+
+  - a starting basis: generators the guess puts at a limit start at that
+    limit, the partially loaded ones and the branch flows start basic, and
+    branches the guess loads up to a limit start binding (the active-set
+    guess);
+  - a reduced constraint set: branch rows whose guessed flow stays below
+    (1 - screen_margin) of their rating are relaxed. After solving, the
+    relaxed rows are checked and any that are violated are enforced again
+    and the LP re-solved from the current basis, until none are violated.
+
+The result is the optimum of the full DC OPF of gnn_opf.dc_opf; a poor
+prediction only costs iterations. Unlike the sequential warm starts of
+iter_opf_scenarios, this needs no previously solved neighbouring scenario,
+so it suits one-off solves of unrelated snapshots.
+
+    python -m gnn_opf.hybrid_opf --cases case118 case300 case1354pegase
+"""
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import torch
+import torch.optim as optim
+
+from gnn_opf.dc_opf import DCOPFModel, order_scenarios
+from gnn_opf.gnn_opf import PhysicsInformedGNN, normalized_adjacency
+from gnn_opf.data.power_networks import load_topology
+
+# Branch rating factors that make imported cases feasible, see DCOPFModel.
+BRANCH_LIMIT_SCALE = {"case1354pegase": 3.0}
+
+@dataclass
+class HybridSolution:
+    """
+    Result of one hybrid solve.
+
+    Attributes:
+        solution (DCOPFSolution): The final solve; its iterations and seconds cover that solve only
+        iterations (int): Simplex iterations over every round
+        rounds (int): Number of LP solves, 1 if no relaxed branch was violated
+        monitored (int): Branch rows enforced in the last round
+        readded (int): Relaxed branch rows enforced again after a violation
+        predict_seconds (float): GNN inference and basis construction time
+        solve_seconds (float): HiGHS time over every round
+    """
+    solution: object
+    iterations: int
+    rounds: int
+    monitored: int
+    readded: int
+    predict_seconds: float
+    solve_seconds: float
+
+    @property
+    def seconds(self):
+        return self.predict_seconds + self.solve_seconds
+
+class HybridOPFSolver:
+    """
+    Solve the DC OPF of a case from GNN-predicted warm starts.
+
+    Args:
+        model (PhysicsInformedGNN): Model predicting bus generation from bus loads
+        case_name (str): Name of the test case
+        screen_margin (float): Relative headroom below which a branch stays monitored;
+            None keeps every branch monitored
+        max_rounds (int): Maximum number of solves per scenario
+        branch_limit_scale (float, optional): See DCOPFModel; BRANCH_LIMIT_SCALE of the case if None
+        num_segments (int, optional): See DCOPFModel
+    """
+
+    def __init__(self, model, case_name, screen_margin=0.2, max_rounds=10, branch_limit_scale=None,
+                 **model_kwargs):
+        self.model = model.eval()
+        self.opf = DCOPFModel.from_case(case_name, branch_limit_scale=_limit_scale(case_name, branch_limit_scale),
+                                        **model_kwargs)
+        self.topology = load_topology(case_name)
+        self.adjacency = normalized_adjacency(self.topology.edge_index, self.topology.num_nodes)
+        self.screen_margin = screen_margin
+        self.max_rounds = max_rounds
+
+    def bus_loads(self, load_p_mw):
+        """Bus loads in MW (the model input) of per-load active powers."""
+        opf = self.opf
+        return np.bincount(opf.load_pos, weights=np.asarray(load_p_mw) * opf.load_scaling,
+                           minlength=self.topology.num_nodes)
+
+    def predict(self, load_p_mw):
+        """
+        Predict the bus generation of a scenario.
+
+        Args:
+            load_p_mw (numpy.ndarray): Active power of every row of the load table
+
+        Returns:
+            numpy.ndarray: Generation per bus position in MW
+        """
+        x = torch.as_tensor(self.bus_loads(load_p_mw), dtype=torch.float).reshape(1, -1, 1)
+        with torch.no_grad():
+            return self.model.forward_shared(x, self.adjacency)[0, :, 0].double().numpy()
+
+    def solve(self, load_p_mw):
+        """
+        Solve one scenario from the GNN prediction.
+
+        Args:
+            load_p_mw (numpy.ndarray): Active power of every row of the load table
+
+        Returns:
+            HybridSolution: The exact solution and the solve statistics
+        """
+        opf = self.opf
+        start = time.perf_counter()
+        dispatch = opf.generator_dispatch(self.predict(load_p_mw))
+        flows = opf.branch_flows(dispatch, load_p_mw)
+        if self.screen_margin is None:
+            monitored = np.ones(opf.num_branch_rows, dtype=bool)
+        else:
+            limit = np.maximum(np.abs(opf.branch_upper), np.abs(opf.branch_lower))
+            monitored = np.abs(flows) >= (1.0 - self.screen_margin) * limit
+        opf.set_loads(load_p_mw)
+        opf.monitor_branches(monitored)
+        opf.seed_basis(dispatch, flows)
+        predict_seconds = time.perf_counter() - start
+
+        iterations = rounds = readded = 0
+        solve_seconds = 0.0
+        while True:
+            solution = opf.solve(warm_start=True)
+            rounds += 1
+            iterations += solution.iterations
+            solve_seconds += solution.seconds
+            violated = opf.branch_violations() if solution.converged else []
+            if not len(violated) or rounds >= self.max_rounds:
+                break
+            monitored = monitored.copy()
+            monitored[violated] = True
+            readded += len(violated)
+            opf.monitor_branches(monitored)
+        if len(violated):
+            # Still violating after max_rounds: finish on the full constraint set.
+            opf.monitor_branches()
+            solution = opf.solve(warm_start=True)
+            rounds += 1
+            iterations += solution.iterations
+            solve_seconds += solution.seconds
+        return HybridSolution(solution, iterations, rounds, int(opf.monitored.sum()), readded,
+                              predict_seconds, solve_seconds)
+
+def _limit_scale(case_name, branch_limit_scale):
+    return BRANCH_LIMIT_SCALE.get(case_name, 1.0) if branch_limit_scale is None else branch_limit_scale
+
+def _scenario_loads(opf, scenarios, seed, load_variation):
+    from gnn_opf.pypsa_data_generation import scenario_load_p_mw
+    return np.stack([scenario_load_p_mw(opf.base_load_p_mw, i, seed, load_variation) for i in scenarios])
+
+def train_dispatch_model(case_name, num_scenarios=256, num_epochs=300, learning_rate=0.01, hidden_dim=16,
+                         load_variation=0.3, seed=0, branch_limit_scale=None, verbose=False):
+    """
+    Train a PhysicsInformedGNN to predict the optimal bus generation from bus loads.
+
+    Training targets are warm-started HiGHS solves of the scenarios
+    0..num_scenarios-1 of iter_opf_scenarios (with the given seed).
+
+    Args:
+        case_name (str): Name of the test case
+        num_scenarios (int): Number of training scenarios
+        num_epochs (int): Full-batch Adam steps
+        learning_rate (float): Adam learning rate
+        hidden_dim (int): Hidden channels of the model
+        load_variation (float): Maximum load variation as a fraction of base load
+        seed (int): Seed of the scenarios and of the model initialization
+        branch_limit_scale (float, optional): See HybridOPFSolver
+        verbose (bool): Whether to print the loss every 50 epochs
+
+    Returns:
+        PhysicsInformedGNN: The trained model, in evaluation mode
+    """
+    opf = DCOPFModel.from_case(case_name, branch_limit_scale=_limit_scale(case_name, branch_limit_scale))
+    loads = _scenario_loads(opf, range(num_scenarios), seed, load_variation)
+    features, targets = [], []
+    for i in order_scenarios(loads):
+        solution = opf.solve(loads[i])
+        if solution.converged:
+            features.append(np.bincount(opf.load_pos, weights=loads[i] * opf.load_scaling,
+                                        minlength=len(solution.gen_p_mw)))
+            targets.append(solution.gen_p_mw)
+    if not targets:
+        raise RuntimeError(f"No training scenario of {case_name} is feasible")
+    x = torch.tensor(np.stack(features), dtype=torch.float).unsqueeze(-1)
+    y = torch.tensor(np.stack(targets), dtype=torch.float).unsqueeze(-1)
+
+    topology = load_topology(case_name)
+    adjacency = normalized_adjacency(topology.edge_index, topology.num_nodes)
+    torch.manual_seed(seed)
+    model = PhysicsInformedGNN(hidden_dim=hidden_dim)
+    optimizer = optim.Adam(model.parameters(), lr=learning_rate)
+    for epoch in range(num_epochs):
+        optimizer.zero_grad()
+        loss = ((model.forward_shared(x, adjacency) - y) / topology.sn_mva).pow(2).mean()
+        loss.backward()
+        optimizer.step()
+        if verbose and (epoch + 1) % 50 == 0:
+            print(f"Epoch {epoch+1}/{num_epochs}, Loss: {loss.item():.6f}")
+    return model.eval()
+
+def compare_hybrid(cases=("case118", "case300", "case1354pegase"), num_scenarios=50, load_variation=0.3,
+                   seed=1000, models=None, screen_margin=0.2, num_train_scenarios=256, **train_kwargs):
+    """
+    Compare cold solves with hybrid solves on unseen scenarios.
+
+    Each scenario is solved independently: "cold" from scratch with every
+    branch monitored, "hybrid" from the GNN basis with screening and
+    "hybrid_full" from the GNN basis with every branch monitored. The hybrid
+    wall time includes GNN inference and the basis construction.
+
+    Args:
+        cases (sequence): Test cases
+        num_scenarios (int): Test scenarios per case
+        load_variation (float): Maximum load variation as a fraction of base load
+        seed (int): Seed of the test scenarios; keep it away from the training seed
+        models (dict, optional): Trained model per case; trained with train_dispatch_model if missing
+        screen_margin (float): See HybridOPFSolver
+        num_train_scenarios (int): Training scenarios of models trained here
+        **train_kwargs: Passed to train_dispatch_model
+
+    Returns:
+        list: One dictionary per (case, mode) with mean_iterations, mean_ms, converged,
+            max_cost_gap (relative to cold), mean_monitored and mean_rounds
+    """
+    models = models or {}
+    rows = []
+    for case in cases:
+        model = models.get(case)
+        if model is None:
+            model = train_dispatch_model(case, num_train_scenarios, load_variation=load_variation, **train_kwargs)
+        hybrid = HybridOPFSolver(model, case, screen_margin=screen_margin)
+        full = HybridOPFSolver(model, case, screen_margin=None)
+        loads = _scenario_loads(hybrid.opf, range(num_scenarios), seed, load_variation)
+
+        cold = []
+        for p in loads:
+            full.opf.monitor_branches()
+            cold.append(full.opf.solve(p, warm_start=False))
+        rows.append({"case": case, "mode": "cold",
+                     "mean_iterations": float(np.mean([s.iterations for s in cold])),
+                     "mean_ms": 1e3 * float(np.mean([s.seconds for s in cold])),
+                     "converged": float(np.mean([s.converged for s in cold])),
+                     "max_cost_gap": 0.0, "mean_monitored": float(full.opf.num_branch_rows),
+                     "mean_rounds": 1.0})
+        for mode, solver in (("hybrid", hybrid), ("hybrid_full", full)):
+            results = [solver.solve(p) for p in loads]
+            gaps = [abs(r.solution.total_cost - c.total_cost) / abs(c.total_cost)
+                    for r, c in zip(results, cold) if r.solution.converged and c.converged]
+            rows.append({"case": case, "mode": mode,
+                         "mean_iterations": float(np.mean([r.iterations for r in results])),
+                         "mean_ms": 1e3 * float(np.mean([r.seconds for r in results])),
+                         "converged": float(np.mean([r.solution.converged for r in results])),
+                         "max_cost_gap": float(max(gaps, default=float("nan"))),
+                         "mean_monitored": float(np.mean([r.monitored for r in results])),
+                         "mean_rounds": float(np.mean([r.rounds for r in results]))})
+    return rows
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare cold and GNN-seeded DC OPF solves")
+    parser.add_argument("--cases", nargs="+", default=["case118", "case300", "case1354pegase"])
+    parser.add_argument("--scenarios", type=int, default=50)
+    parser.add_argument("--train-scenarios", type=int, default=256)
+    parser.add_argument("--epochs", type=int, default=300)
+    parser.add_argument("--screen-margin", type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"{'case':<16} {'mode':<12} {'iterations':>11} {'ms':>8} {'rounds':>7} {'monitored':>10} {'cost gap':>9}")
+    for row in compare_hybrid(args.cases, args.scenarios, screen_margin=args.screen_margin,
+                              num_train_scenarios=args.train_scenarios, num_epochs=args.epochs):
+        print(f"{row['case']:<16} {row['mode']:<12} {row['mean_iterations']:>11.1f} {row['mean_ms']:>8.2f} "
+              f"{row['mean_rounds']:>7.2f} {row['mean_monitored']:>10.1f} {row['max_cost_gap']:>9.1e}")
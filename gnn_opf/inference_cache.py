@@ -0,0 +1,219 @@
+"""
+Result cache for GNN inference keyed by quantized load vectors.
+
+Many inference queries repeat the same load snapshot, e.g. one SCADA state
+polled by several tools. InferenceCache stores the (predictions, penalty)
+result of a forward pass under the key
+
+    (model version, case name, hash of the loads rounded to resolution_mw)
+
+so a repeated query is answered without running the model. Entries are
+evicted least-recently-used once max_entries or max_bytes is exceeded, and
+expire ttl_seconds after they were stored.
+
+The model version (see model_version) combines a number assigned per model
+object with the storage and in-place version counter of every parameter and
+buffer, so optimizer steps, load_state_dict or any other in-place change of
+the weights give the model a new version without the caller doing anything.
+bump_model_version is only needed for changes torch does not track, such as
+writes through .data. evaluate_gnn.load_model clears the shared cache, so
+loading a new checkpoint never serves stale results.
+"""
+
+import hashlib
+import itertools
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import torch
+
+from gnn_opf import instrumentation
+
+DEFAULT_RESOLUTION_MW = 1e-3
+DEFAULT_TTL_SECONDS = 300.0
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_MAX_BYTES = 64 * 2 ** 20
+# Rough per-entry overhead of the key, the OrderedDict node and the tensor object.
+_ENTRY_OVERHEAD_BYTES = 256
+
+_version_lock = threading.Lock()
+_versions = weakref.WeakKeyDictionary()
+_version_counter = itertools.count(1)
+
+def _object_version(model):
+    with _version_lock:
+        version = _versions.get(model)
+        if version is None:
+            version = _versions[model] = next(_version_counter)
+        return version
+
+def _weights_version(model):
+    """Storage and in-place version counter of every parameter and buffer."""
+    tensors = itertools.chain(model.parameters(), model.buffers())
+    return tuple((t.data_ptr(), t._version) for t in tensors)
+
+def model_version(model):
+    """
+    Version of a model and its current weights.
+
+    Args:
+        model (torch.nn.Module): The model
+
+    Returns:
+        tuple: (number assigned to the model object, unique within the process,
+            weights version); changes whenever the weights are modified in place
+    """
+    return (_object_version(model), _weights_version(model))
+
+def bump_model_version(model):
+    """Give a model a new version after a change torch does not track (e.g. a write through .data)."""
+    with _version_lock:
+        _versions[model] = next(_version_counter)
+    return model_version(model)
+
+def load_digest(loads, resolution_mw=DEFAULT_RESOLUTION_MW):
+    """
+    Hash of a load vector rounded to a resolution.
+
+    Args:
+        loads (torch.Tensor): Per-bus loads in MW
+        resolution_mw (float): Loads closer than about this are considered equal
+
+    Returns:
+        bytes: 16-byte digest
+    """
+    quantized = torch.round(torch.as_tensor(loads, dtype=torch.float64) / resolution_mw).to(torch.int64)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(tuple(quantized.shape)).encode())
+    digest.update(quantized.numpy().tobytes())
+    return digest.digest()
+
+class InferenceCache:
+    """
+    Thread-safe LRU and TTL cache of (predictions, penalty) results.
+
+    Args:
+        max_entries (int): Maximum number of cached results
+        max_bytes (int): Maximum total size of the cached prediction tensors
+        ttl_seconds (float, optional): Lifetime of an entry; None keeps entries until evicted
+        resolution_mw (float): Load quantization step of the keys
+        clock (callable): Monotonic time source in seconds
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES,
+                 ttl_seconds=DEFAULT_TTL_SECONDS, resolution_mw=DEFAULT_RESOLUTION_MW, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.resolution_mw = resolution_mw
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def key(self, model, case_name, loads):
+        """Cache key of a request."""
+        return (model_version(model), case_name, load_digest(loads, self.resolution_mw))
+
+    def get(self, key):
+        """
+        Look up a result.
+
+        Returns:
+            tuple: (predictions, penalty) with predictions cloned, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds is not None and self.clock() >= entry[2]:
+                self._remove(key)
+                self._counters["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._counters["misses"] += 1
+                instrumentation.count("inference.cache_miss")
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+        instrumentation.count("inference.cache_hit")
+        return entry[0].clone(), entry[1]
+
+    def put(self, key, predictions, penalty):
+        """Store a result, evicting least recently used entries beyond the limits."""
+        predictions = predictions.detach().clone()
+        size = predictions.element_size() * predictions.numel() + _ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        expires = float("inf") if self.ttl_seconds is None else self.clock() + self.ttl_seconds
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (predictions, float(penalty), expires, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._counters["evictions"] += 1
+
+    def _remove(self, key):
+        self._bytes -= self._entries.pop(key)[3]
+
+    def invalidate(self, model=None):
+        """
+        Drop cached results.
+
+        Args:
+            model (torch.nn.Module, optional): Only drop the results of this model; all if None
+        """
+        with self._lock:
+            if model is None:
+                keys = list(self._entries)
+            else:
+                version = _versions.get(model)
+                keys = [k for k in self._entries if k[0][0] == version]
+            for key in keys:
+                self._remove(key)
+            self._counters["invalidations"] += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """
+        Return the cache counters.
+
+        Returns:
+            dict: hits, misses, evictions, expirations, invalidations, entries, bytes and hit_rate
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+def shared_cache():
+    """The process-wide cache used by run_inference and InferenceEngine by default."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = InferenceCache()
+        return _shared_cache
+
+def invalidate_shared_cache():
+    """Drop every result of the shared cache, if it was created."""
+    if _shared_cache is not None:
+        _shared_cache.invalidate()
+
+def resolve_cache(cache):
+    """Map a cache argument (True for the shared cache, False/None, or an InferenceCache) to a cache or None."""
+    if cache is True:
+        return shared_cache()
+    if cache is None or cache is False:
+        return None
+    return cache
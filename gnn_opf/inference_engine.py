@@ -0,0 +1,198 @@
+"""
+Long-lived inference engine for PhysicsInformedGNN.
+
+The engine loads a checkpoint once, keeps case topologies and their
+normalized adjacency warm, and serves prediction requests made of per-bus
+load vectors. Requests arriving within max_wait_ms of each other (up to
+max_batch_size of them) are coalesced into one batched forward pass on the
+shared-topology path of the model.
+
+Requests whose quantized loads were answered before for the same model are
+served from an InferenceCache without being queued (see
+gnn_opf.inference_cache).
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import torch
+
+from gnn_opf.gnn_opf import PhysicsInformedGNN, normalized_adjacency, physics_penalty
+from gnn_opf.inference_cache import resolve_cache
+from gnn_opf.data.power_networks import load_topology
+
+class _Request:
+    __slots__ = ("case_name", "loads", "future", "key")
+
+    def __init__(self, case_name, loads, future, key=None):
+        self.case_name = case_name
+        self.loads = loads
+        self.future = future
+        self.key = key
+
+class InferenceEngine:
+    """
+    Serve batched PhysicsInformedGNN predictions from a background thread.
+
+    Args:
+        checkpoint_path (str, optional): Checkpoint loaded with evaluate_gnn.load_model
+        model (torch.nn.Module, optional): Already loaded model, used instead of a checkpoint
+        max_batch_size (int): Maximum number of requests per forward pass
+        max_wait_ms (float): How long the first request of a batch waits for others
+        cases (iterable): Case names whose topologies are loaded up front
+        cache (bool or InferenceCache): Result cache; True for the shared cache, False to disable
+    """
+
+    def __init__(self, checkpoint_path=None, model=None, max_batch_size=64, max_wait_ms=2.0, cases=(),
+                 cache=True):
+        if model is None:
+            if checkpoint_path is None:
+                raise ValueError("Either checkpoint_path or model must be given")
+            from gnn_opf.evaluate_gnn import load_model
+            model = load_model(checkpoint_path)
+        self.model = model.eval()
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.stats = {"requests": 0, "batches": 0}
+        self.cache = resolve_cache(cache)
+
+        self._topologies = {}
+        self._topology_lock = threading.Lock()
+        for case_name in cases:
+            self.warm(case_name)
+
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._serve, name="gnn-opf-inference", daemon=True)
+        self._thread.start()
+
+    @property
+    def cases(self):
+        """Names of the cases whose topologies are loaded."""
+        return sorted(self._topologies)
+
+    def warm(self, case_name):
+        """
+        Load a case topology and its normalized adjacency if not already cached.
+
+        Returns:
+            tuple: (CaseTopology, normalized adjacency, PyG Data of the topology)
+        """
+        with self._topology_lock:
+            entry = self._topologies.get(case_name)
+            if entry is None:
+                topology = load_topology(case_name)
+                adjacency = normalized_adjacency(topology.edge_index, topology.num_nodes)
+                entry = (topology, adjacency, topology.to_pyg_data())
+                self._topologies[case_name] = entry
+            return entry
+
+    def submit(self, case_name, loads):
+        """
+        Queue a prediction request.
+
+        Args:
+            case_name (str): Name of the test case
+            loads (sequence or torch.Tensor): Per-bus loads, length num_buses
+
+        Returns:
+            concurrent.futures.Future: Resolves to (predictions of shape [num_buses, 1], penalty)
+        """
+        if self._closed:
+            raise RuntimeError("InferenceEngine is closed")
+        future = Future()
+        loads = torch.as_tensor(loads, dtype=torch.float)
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(self.model, case_name, loads)
+            cached = self.cache.get(key)
+            if cached is not None:
+                future.set_result(cached)
+                return future
+        self._queue.put(_Request(case_name, loads, future, key))
+        return future
+
+    def predict(self, case_name, loads, timeout=None):
+        """Submit a request and wait for its (predictions, penalty) result."""
+        return self.submit(case_name, loads).result(timeout)
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                self._queue.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _serve(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            by_case = {}
+            for request in batch:
+                by_case.setdefault(request.case_name, []).append(request)
+            for case_name, requests in by_case.items():
+                self._run(case_name, requests)
+
+    def _run(self, case_name, requests):
+        requests = [r for r in requests if r.future.set_running_or_notify_cancel()]
+        try:
+            topology, adjacency, graph = self.warm(case_name)
+        except Exception as e:
+            for request in requests:
+                request.future.set_exception(e)
+            return
+
+        valid = []
+        for request in requests:
+            if request.loads.shape != (topology.num_nodes,):
+                request.future.set_exception(ValueError(
+                    f"Expected {topology.num_nodes} bus loads for {case_name}, got shape {tuple(request.loads.shape)}"
+                ))
+            else:
+                valid.append(request)
+        if not valid:
+            return
+
+        try:
+            x = torch.stack([r.loads for r in valid]).unsqueeze(-1)
+            with torch.no_grad():
+                predictions = self.model.forward_shared(x, adjacency)
+                penalties = physics_penalty(graph, predictions, loads=x, reduction="none").tolist()
+        except Exception as e:
+            for request in valid:
+                request.future.set_exception(e)
+            return
+
+        self.stats["requests"] += len(valid)
+        self.stats["batches"] += 1
+        for request, prediction, penalty in zip(valid, predictions, penalties):
+            if self.cache is not None:
+                self.cache.put(request.key, prediction, penalty)
+            request.future.set_result((prediction, penalty))
+
+    def close(self):
+        """Stop the serving thread after the queued requests are answered."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
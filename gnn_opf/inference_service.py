@@ -0,0 +1,280 @@
+"""
+Asyncio front end for the InferenceEngine.
+
+Serves a minimal HTTP/1.1 JSON API over a local TCP port or Unix socket:
+
+    POST /predict   {"case": "case14", "loads": [...]} -> {"predictions": [...], "penalty": ...}
+    GET  /health    service status and queue depth
+    GET  /metrics   request latency histogram, engine and cache counters
+
+Predictions are submitted straight to the engine and awaited on the event
+loop, so every request in flight can join the engine's next batch. Requests
+beyond max_pending in flight are rejected with 503, and requests exceeding
+request_timeout seconds are answered with 504; a timed-out request still
+counts as pending until the engine has actually answered or dropped it. InferenceClient is a small local client for
+tools and tests; everything runs offline with the standard library.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+from gnn_opf.instrumentation import LATENCY_BUCKETS_MS, LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            500: "Internal Server Error", 503: "Service Unavailable", 504: "Gateway Timeout"}
+
+class _BadMessage(ValueError):
+    """A malformed HTTP message, answered with 400."""
+
+class InferenceService:
+    """
+    Serve an InferenceEngine over HTTP on a local socket.
+
+    Args:
+        engine (InferenceEngine): Engine executing the predictions
+        max_pending (int): Maximum requests in flight before answering 503
+        request_timeout (float): Seconds before a prediction is answered with 504
+    """
+
+    def __init__(self, engine, max_pending=256, request_timeout=5.0):
+        self.engine = engine
+        self.max_pending = max_pending
+        self.request_timeout = request_timeout
+        self.latency = LatencyHistogram()
+        self.status_counts = {}
+        self.pending = 0
+        self._server = None
+
+    async def start(self, host="127.0.0.1", port=0, path=None):
+        """
+        Start listening on a TCP port, or on a Unix socket if path is given.
+
+        Returns:
+            The bound (host, port) tuple or the socket path
+        """
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle_connection, path=path)
+        else:
+            self._server = await asyncio.start_server(self._handle_connection, host=host, port=port)
+        return self.address
+
+    @property
+    def address(self):
+        return self._server.sockets[0].getsockname()
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def close(self):
+        """Stop accepting connections."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await _read_http_message(reader, request=True)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, payload = await self._dispatch(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                _write_http_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except _BadMessage as e:
+            self._count_status(400)
+            _write_http_response(writer, 400, {"error": str(e)}, keep_alive=False)
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method, path, body):
+        start = time.perf_counter()
+        if path == "/predict":
+            status, payload = (await self._predict(body)) if method == "POST" else (405, {"error": "use POST"})
+        elif path == "/health":
+            status, payload = 200, {"status": "ok", "pending": self.pending,
+                                    "cases": self.engine.cases}
+        elif path == "/metrics":
+            status, payload = 200, {"latency": self.latency.to_dict(), "status_counts": self.status_counts,
+                                    "engine": dict(self.engine.stats),
+                                    "cache": self.engine.cache.stats() if self.engine.cache is not None else None}
+        else:
+            status, payload = 404, {"error": f"unknown path {path}"}
+        if path == "/predict":
+            self.latency.observe((time.perf_counter() - start) * 1000.0)
+        self._count_status(status)
+        return status, payload
+
+    def _count_status(self, status):
+        self.status_counts[str(status)] = self.status_counts.get(str(status), 0) + 1
+
+    def _release(self, loop):
+        # Runs on the engine thread (or inline for cache hits and cancellations).
+        def release():
+            self.pending -= 1
+        try:
+            loop.call_soon_threadsafe(release)
+        except RuntimeError:
+            pass  # The loop was closed while the request was still running.
+
+    async def _predict(self, body):
+        try:
+            request = json.loads(body)
+            case_name, loads = request["case"], request["loads"]
+        except (ValueError, KeyError, TypeError) as e:
+            return 400, {"error": f"invalid request: {e}"}
+        if self.pending >= self.max_pending:
+            return 503, {"error": "too many pending requests"}
+
+        try:
+            future = self.engine.submit(case_name, loads)
+        except (ValueError, TypeError) as e:
+            return 400, {"error": f"invalid request: {e}"}
+        except RuntimeError as e:
+            return 503, {"error": str(e)}
+        # The slot is freed when the engine resolves (or drops) the request, not on timeout.
+        self.pending += 1
+        loop = asyncio.get_running_loop()
+        future.add_done_callback(lambda _: self._release(loop))
+        try:
+            # On timeout wait_for cancels the wrapper, which cancels the request if it is still queued.
+            predictions, penalty = await asyncio.wait_for(asyncio.wrap_future(future), self.request_timeout)
+        except asyncio.TimeoutError:
+            return 504, {"error": f"prediction exceeded {self.request_timeout}s"}
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            logger.exception("Prediction failed")
+            return 500, {"error": str(e)}
+        return 200, {"case": case_name, "predictions": predictions.squeeze(-1).tolist(), "penalty": penalty}
+
+async def _read_http_message(reader, request):
+    """Read one HTTP/1.1 message; returns None on a cleanly closed connection."""
+    start_line = await reader.readline()
+    if not start_line:
+        return None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = headers.get("content-length", "0")
+    if not (length.isascii() and length.isdigit()):
+        raise _BadMessage(f"invalid Content-Length {length!r}")
+    length = int(length)
+    body = await reader.readexactly(length) if length else b""
+    parts = start_line.decode("latin-1").split()
+    if request:
+        if len(parts) < 2:
+            raise _BadMessage(f"malformed request line {start_line!r}")
+        return parts[0].upper(), parts[1], headers, body
+    return int(parts[1]), headers, body
+
+def _write_http_response(writer, status, payload, keep_alive):
+    body = json.dumps(payload).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + body)
+
+class InferenceClient:
+    """
+    Minimal asyncio client for an InferenceService.
+
+    Args:
+        host (str): Service host, for TCP connections
+        port (int): Service port, for TCP connections
+        path (str): Unix socket path, used instead of host/port when given
+    """
+
+    def __init__(self, host="127.0.0.1", port=None, path=None):
+        self.host = host
+        self.port = port
+        self.path = path
+
+    async def request(self, method, target, payload=None):
+        """
+        Send one request on a fresh connection.
+
+        Returns:
+            tuple: (HTTP status code, decoded JSON payload)
+        """
+        if self.path is not None:
+            reader, writer = await asyncio.open_unix_connection(self.path)
+        else:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+            writer.write(
+                f"{method} {target} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+            status, _, response_body = await _read_http_message(reader, request=False)
+            return status, json.loads(response_body) if response_body else None
+        finally:
+            writer.close()
+
+    async def predict(self, case_name, loads):
+        return await self.request("POST", "/predict", {"case": case_name, "loads": list(map(float, loads))})
+
+    async def health(self):
+        return await self.request("GET", "/health")
+
+    async def metrics(self):
+        return await self.request("GET", "/metrics")
+
+async def serve(checkpoint_path, host="127.0.0.1", port=8080, path=None, cases=(), **service_kwargs):
+    """Load a checkpoint and serve it until cancelled."""
+    from gnn_opf.inference_engine import InferenceEngine
+    with InferenceEngine(checkpoint_path=checkpoint_path, cases=cases) as engine:
+        service = InferenceService(engine, **service_kwargs)
+        address = await service.start(host=host, port=port, path=path)
+        logger.info(f"Serving GNN-OPF predictions on {address}")
+        try:
+            await service.serve_forever()
+        finally:
+            await service.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve GNN-OPF predictions over a local socket.")
+    parser.add_argument("--checkpoint", default="model_checkpoint.pth")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--unix", dest="path", help="Serve on this Unix socket instead of TCP")
+    parser.add_argument("--case", dest="cases", action="append", default=[], help="Case to warm up (repeatable)")
+    parser.add_argument("--max-pending", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve(args.checkpoint, host=args.host, port=args.port, path=args.path, cases=args.cases,
+                      max_pending=args.max_pending,
+                      request_timeout=args.timeout))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Opt-in stage timers, counters and profiler traces for the pipeline.
+
+Instrumentation is off unless the GNN_OPF_INSTRUMENT environment variable is
+set to a non-empty value other than "0", or enable() is called. While it is
+off, timer() returns a shared no-op context manager and count() returns
+immediately, so instrumented hot paths pay one function call per stage.
+
+    with instrumentation.timer("train.forward"):
+        predictions = model(batch)
+    instrumentation.count("train.scenarios", len(batch))
+
+Every timer feeds a LatencyHistogram per stage name; summary_table() formats
+them and snapshot() exports them as plain dictionaries. profile() records a
+torch.profiler trace in which every active timer also appears as a named
+range. Timers running in pool worker processes stay in those processes.
+"""
+
+import bisect
+import contextlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+# Upper bounds (in milliseconds) of the request latency histogram buckets.
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+# Stage durations range from microseconds (a cached lookup) to minutes (an epoch).
+STAGE_BUCKETS_MS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500,
+                    1000, 2000, 5000, 10000, 30000, 60000)
+
+class LatencyHistogram:
+    """Cumulative latency histogram with fixed millisecond buckets."""
+
+    def __init__(self, buckets_ms=LATENCY_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self.counts = [0] * (len(self.buckets_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, latency_ms):
+        self.counts[bisect.bisect_left(self.buckets_ms, latency_ms)] += 1
+        self.count += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+
+    def quantile(self, q):
+        """Return the upper bucket bound containing quantile q (inf if in the overflow bucket)."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets_ms + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return float(bound)
+        return float("inf")
+
+    def to_dict(self):
+        return {
+            "buckets_ms": list(self.buckets_ms) + ["+Inf"],
+            "counts": list(self.counts),
+            "count": self.count,
+            "sum_ms": self.total_ms,
+            "max_ms": self.max_ms,
+            "p50_ms": self.quantile(0.5),
+            "p99_ms": self.quantile(0.99),
+        }
+
+_enabled = os.environ.get("GNN_OPF_INSTRUMENT", "") not in ("", "0")
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+# Set while profile() records, so timers also open torch.profiler ranges.
+_profiling = False
+_NULL = contextlib.nullcontext()
+
+def enabled():
+    """Whether instrumentation is recording."""
+    return _enabled
+
+def enable():
+    """Start recording timers and counters."""
+    global _enabled
+    _enabled = True
+
+def disable():
+    """Stop recording; collected statistics are kept until reset()."""
+    global _enabled
+    _enabled = False
+
+def reset():
+    """Drop every collected histogram and counter."""
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+def record(name, elapsed_ms):
+    """Add one duration in milliseconds to the histogram of a stage."""
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = LatencyHistogram(STAGE_BUCKETS_MS)
+        histogram.observe(elapsed_ms)
+
+class _Timer:
+    __slots__ = ("name", "start", "range")
+
+    def __init__(self, name):
+        self.name = name
+        self.range = None
+
+    def __enter__(self):
+        if _profiling:
+            import torch
+            self.range = torch.autograd.profiler.record_function(self.name)
+            self.range.__enter__()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, (time.perf_counter() - self.start) * 1e3)
+        if self.range is not None:
+            self.range.__exit__(*exc)
+        return False
+
+def timer(name):
+    """
+    Time a stage.
+
+    Args:
+        name (str): Stage name, e.g. "train.forward"
+
+    Returns:
+        A context manager; a shared no-op one while instrumentation is disabled
+    """
+    return _Timer(name) if _enabled else _NULL
+
+def count(name, value=1):
+    """Add value to a named counter."""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def timed_iter(name, iterable):
+    """
+    Time every next() on an iterable, e.g. the batch wait of a DataLoader.
+
+    Returns the iterable itself while instrumentation is disabled.
+    """
+    if not _enabled:
+        return iterable
+    return _timed_iter(name, iterable)
+
+def _timed_iter(name, iterable):
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        record(name, (time.perf_counter() - start) * 1e3)
+        yield item
+
+@contextlib.contextmanager
+def profile(name, trace_dir=None):
+    """
+    Record a torch.profiler trace of a block.
+
+    Tracing happens only while instrumentation is enabled and a trace directory
+    is given or set in the GNN_OPF_TRACE_DIR environment variable. The Chrome
+    trace is written to <trace_dir>/<name>.json.
+
+    Args:
+        name (str): Name of the trace file
+        trace_dir (str, optional): Directory of the trace file
+    """
+    global _profiling
+    trace_dir = trace_dir or os.environ.get("GNN_OPF_TRACE_DIR")
+    if not (_enabled and trace_dir):
+        yield None
+        return
+    from torch.profiler import ProfilerActivity
+    from torch.profiler import profile as torch_profile
+
+    Path(trace_dir).mkdir(parents=True, exist_ok=True)
+    with torch_profile(activities=[ProfilerActivity.CPU]) as profiler:
+        _profiling = True
+        try:
+            yield profiler
+        finally:
+            _profiling = False
+    profiler.export_chrome_trace(str(Path(trace_dir) / f"{name}.json"))
+
+def snapshot():
+    """
+    Return the collected statistics.
+
+    Returns:
+        dict: {"stages": {name: histogram dict}, "counters": {name: value}}
+    """
+    with _lock:
+        return {
+            "stages": {name: h.to_dict() for name, h in sorted(_histograms.items())},
+            "counters": dict(sorted(_counters.items())),
+        }
+
+def export_json(path):
+    """Write snapshot() to a JSON file."""
+    Path(path).write_text(json.dumps(snapshot(), indent=2))
+    return str(path)
+
+def summary_table():
+    """
+    Format the collected statistics as a text table, slowest stages first.
+
+    Percentiles are histogram bucket upper bounds.
+    """
+    with _lock:
+        stages = sorted(_histograms.items(), key=lambda item: -item[1].total_ms)
+        counters = sorted(_counters.items())
+    lines = [f"{'stage':<32} {'count':>8} {'total ms':>12} {'mean ms':>10} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>10}"]
+    for name, h in stages:
+        lines.append(f"{name:<32} {h.count:>8} {h.total_ms:>12.2f} {h.total_ms / h.count:>10.3f} "
+                     f"{h.quantile(0.5):>9g} {h.quantile(0.99):>9g} {h.max_ms:>10.3f}")
+    if counters:
+        lines.append("")
+        lines.append(f"{'counter':<32} {'value':>8}")
+        lines.extend(f"{name:<32} {value:>8}" for name, value in counters)
+    return "\n".join(lines)
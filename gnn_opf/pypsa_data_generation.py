@@ -1,63 +1,298 @@
-import csv
-import os
-import pypsa
-import yaml
+import logging
+import multiprocessing
+import time
 import numpy as np
 import pandas as pd
 from pathlib import Path
-import logging
+
+from gnn_opf import instrumentation
+from gnn_opf.data.power_networks import load_power_network
+from gnn_opf.data.scenario_io import ParquetScenarioWriter, dataset_metadata, written_scenarios
 
 logger = logging.getLogger(__name__)
 
-def generate_opf_scenarios(num_scenarios: int = 100, load_variation: float = 0.3) -> str:
+# Network and base loads of the current process, built once by _init_worker.
+_worker_state = None
+
+def _init_worker(case_name, solver="pandapower", warm_start=True):
     """
-    Generate OPF scenarios for the IEEE 14-bus system with varying loads.
-    
+    Build the network of a solver worker.
+
+    The pandapower network is created once per process; between solves only
+    the load column is overwritten. With solver="highs" the DC OPF linear
+    program is also built once (see gnn_opf.dc_opf) and only its right-hand
+    side changes between solves.
+    """
+    global _worker_state
+    with instrumentation.timer("generate.case_load"):
+        net = load_power_network(case_name)
+    bus_index = net.bus.index
+    _worker_state = {
+        "net": net,
+        "base_p_mw": net.load.p_mw.values.copy(),
+        "scaling": net.load.scaling.values.copy(),
+        "num_buses": len(bus_index),
+        "load_pos": bus_index.get_indexer(net.load.bus.values),
+        "gen_pos": bus_index.get_indexer(net.gen.bus.values),
+        "sgen_pos": bus_index.get_indexer(net.sgen.bus.values),
+        "ext_grid_pos": bus_index.get_indexer(net.ext_grid.bus.values),
+        "model": None,
+        "warm_start": warm_start,
+    }
+    if solver == "highs":
+        from gnn_opf.dc_opf import DCOPFModel
+        with instrumentation.timer("generate.build_lp"):
+            _worker_state["model"] = DCOPFModel(net)
+    elif solver != "pandapower":
+        raise ValueError(f"Unknown solver: {solver}. Use 'pandapower' or 'highs'.")
+
+def scenario_load_p_mw(base_p_mw, scenario, seed, load_variation):
+    """
+    Perturbed loads of one scenario.
+
+    Every load is scaled by an independent factor drawn uniformly from
+    [1 - load_variation, 1 + load_variation] by a generator seeded with
+    (seed, scenario), so a scenario's loads do not depend on which process
+    draws them.
+
+    Args:
+        base_p_mw (numpy.ndarray): Base active power of every row of the load table
+        scenario (int): Scenario number
+        seed (int): Base seed
+        load_variation (float): Maximum load variation as a fraction of base load
+
+    Returns:
+        numpy.ndarray: Active power of every row of the load table
+    """
+    rng = np.random.default_rng([seed, scenario])
+    return base_p_mw * (1 + rng.uniform(-load_variation, load_variation, size=len(base_p_mw)))
+
+def _solve_scenario(task):
+    """
+    Perturb the loads of the worker network and solve its DC OPF.
+
+    The loads are drawn by scenario_load_p_mw, so a scenario's result does
+    not depend on which worker solves it.
+
+    Args:
+        task (tuple): (scenario, seed, load_variation)
+
+    Returns:
+        dict: Scenario number, total cost, bus1_load, per-bus load and
+            dispatch vectors and whether the OPF converged
+    """
+    import pandapower as pp
+    from pandapower.optimal_powerflow import OPFNotConverged
+
+    scenario, seed, load_variation = task
+    state = _worker_state
+    net = state["net"]
+    num_buses = state["num_buses"]
+
+    with instrumentation.timer("generate.set_loads"):
+        p_mw = scenario_load_p_mw(state["base_p_mw"], scenario, seed, load_variation)
+        load_p_mw = np.bincount(state["load_pos"], weights=p_mw * state["scaling"], minlength=num_buses)
+
+    if state["model"] is not None:
+        with instrumentation.timer("generate.highs"):
+            solution = state["model"].solve(p_mw, warm_start=state["warm_start"])
+        converged = solution.converged
+        total_cost = solution.total_cost
+        gen_p_mw = solution.gen_p_mw
+    else:
+        net.load["p_mw"] = p_mw
+        try:
+            with instrumentation.timer("generate.rundcopp"):
+                pp.rundcopp(net)
+            converged = bool(net.OPF_converged)
+        except OPFNotConverged:
+            converged = False
+
+        if converged:
+            total_cost = float(net.res_cost)
+            gen_p_mw = (
+                np.bincount(state["gen_pos"], weights=net.res_gen.p_mw.values, minlength=num_buses)
+                + np.bincount(state["sgen_pos"], weights=net.res_sgen.p_mw.values, minlength=num_buses)
+                + np.bincount(state["ext_grid_pos"], weights=net.res_ext_grid.p_mw.values, minlength=num_buses)
+            )
+        else:
+            total_cost = float("nan")
+            gen_p_mw = np.full(num_buses, np.nan)
+
+    return {
+        "scenario": scenario,
+        "total_cost": total_cost,
+        "bus1_load": float(load_p_mw[1]) if num_buses > 1 else float(load_p_mw[0]),
+        "load_p_mw": load_p_mw,
+        "gen_p_mw": gen_p_mw,
+        "converged": converged,
+    }
+
+def iter_opf_scenarios(num_scenarios=100, load_variation=0.3, case_name="case14", num_workers=1,
+                       seed=42, scenarios=None, solver="pandapower", warm_start=True):
+    """
+    Solve DC OPF scenarios with randomly perturbed loads, yielding results as they finish.
+
+    Each scenario scales every load by an independent factor drawn uniformly
+    from [1 - load_variation, 1 + load_variation]. With num_workers > 1 the
+    solves run in a process pool whose workers each keep one copy of the
+    network, and results arrive in completion order rather than scenario order.
+
+    solver="pandapower" solves every scenario from scratch with rundcopp.
+    solver="highs" re-solves one prebuilt linear program per worker (see
+    gnn_opf.dc_opf); with warm_start the scenarios are solved in order of
+    total load, so each solve starts from the basis of a similar one, and
+    results arrive in that order.
+
+    Args:
+        num_scenarios: Number of scenarios to solve (ignored if scenarios is given)
+        load_variation: Maximum load variation as a fraction of base load
+        case_name: Name of the pandapower test case
+        num_workers: Number of solver processes; 1 solves in the current process
+        seed: Base seed; results are identical for any num_workers
+        scenarios: Optional iterable of scenario numbers to solve
+        solver: "pandapower" or "highs"
+        warm_start: Warm-start the HiGHS solves from the previous basis (solver="highs" only)
+
+    Yields:
+        dict: One result per scenario, see _solve_scenario
+    """
+    scenarios = range(num_scenarios) if scenarios is None else scenarios
+    tasks = [(int(i), seed, load_variation) for i in scenarios]
+    initargs = (case_name, solver, warm_start)
+    ordered = solver == "highs" and warm_start
+    if num_workers <= 1:
+        _init_worker(*initargs)
+        if ordered:
+            tasks = _order_tasks(tasks, _worker_state["base_p_mw"] * _worker_state["scaling"])
+        for task in tasks:
+            yield _solve_scenario(task)
+        return
+
+    if ordered:
+        # The parent only needs the base loads to order the tasks.
+        load = load_power_network(case_name).load
+        tasks = _order_tasks(tasks, load.p_mw.values * load.scaling.values)
+    # Contiguous chunks keep each worker on neighbouring scenarios.
+    chunksize = max(1, len(tasks) // (num_workers * 8))
+    with multiprocessing.Pool(num_workers, initializer=_init_worker, initargs=initargs) as pool:
+        yield from pool.imap_unordered(_solve_scenario, tasks, chunksize=chunksize)
+
+def _order_tasks(tasks, base_p_mw):
+    """
+    Sort scenario tasks by the total load they draw, see gnn_opf.dc_opf.order_scenarios.
+
+    Args:
+        tasks (list): (scenario, seed, load_variation) tuples
+        base_p_mw (numpy.ndarray): Scaled base active power of every row of the load table
+    """
+    from gnn_opf.dc_opf import order_scenarios
+    totals = [scenario_load_p_mw(base_p_mw, *task).sum() for task in tasks]
+    return [tasks[i] for i in order_scenarios(totals)]
+
+def generate_opf_scenarios(num_scenarios: int = 100, load_variation: float = 0.3, case_name: str = "case14",
+                           num_workers: int = 1, seed: int = 42, output_format: str = "csv",
+                           chunk_size: int = 1024, resume: bool = False, solver: str = "pandapower") -> str:
+    """
+    Generate OPF scenarios for a pandapower test case (IEEE 14-bus by default) with varying loads.
+
+    Loads are perturbed around their base values and each scenario's DC OPF is
+    solved with pandapower or, with solver="highs", with warm-started HiGHS
+    re-solves of one prebuilt linear program, optionally across a pool of
+    worker processes (see iter_opf_scenarios).
+
+    With output_format="csv" the converged scenarios are written to one CSV
+    file at the end. With output_format="parquet" results are streamed to a
+    Parquet dataset in chunks of chunk_size scenarios, including the per-bus
+    load and dispatch vectors and non-converged scenarios (flagged by the
+    converged column); resume=True then skips scenarios already on disk.
+
     Args:
         num_scenarios: Number of scenarios to generate
         load_variation: Maximum load variation as a fraction of base load (e.g., 0.3 = ±30%)
+        case_name: Name of the pandapower test case
+        num_workers: Number of solver processes
+        seed: Seed for reproducibility, independent of num_workers
+        output_format: "csv" or "parquet"
+        chunk_size: Scenarios per Parquet part file
+        resume: Skip scenarios already present in the Parquet dataset; raises ValueError
+            if the dataset was generated with a different case_name, seed,
+            load_variation or solver
+        solver: "pandapower" or "highs"
     
     Returns:
-        str: Path to the output CSV file containing scenario results
+        str: Path to the output CSV file or Parquet dataset containing scenario results
     """
-    # Set random seed for reproducibility
-    np.random.seed(42)
-    
-    # Load network configuration
-    config_path = Path("config/ieee_14-bus_config.yaml")
-    with open(config_path) as f:
-        config = yaml.safe_load(f)
-    
     # Create output directory if it doesn't exist
     output_dir = Path("data")
     output_dir.mkdir(exist_ok=True)
+
+    if output_format == "parquet":
+        return _generate_parquet(output_dir / "generated_opf_scenarios.parquet", num_scenarios,
+                                 load_variation, case_name, num_workers, seed, chunk_size, resume, solver)
+    if output_format != "csv":
+        raise ValueError(f"Unknown output format: {output_format}. Use 'csv' or 'parquet'.")
     output_file = output_dir / "generated_opf_scenarios.csv"
-    
-    # Initialize results list to store scenario data
+
     results = []
-    
-    # Generate at least one dummy scenario to prevent failure in downstream tasks
-    # Since we're having issues with the PyPSA solver, we'll use dummy data but ensure
-    # it has a proper structure with some variability
-    base_cost = 1000.0
-    base_load = 10.0
-    
-    for i in range(num_scenarios):
-        # Add some variation to make the dummy data more realistic
-        cost_variation = np.random.uniform(-0.2, 0.2)  # ±20% cost variation
-        load_variation_factor = np.random.uniform(-load_variation, load_variation)
-        
+    failed = 0
+    start = time.perf_counter()
+    scenarios = iter_opf_scenarios(num_scenarios, load_variation, case_name, num_workers, seed, solver=solver)
+    for result in instrumentation.timed_iter("generate.result", scenarios):
+        instrumentation.count("generate.scenarios")
+        if not result["converged"]:
+            failed += 1
+            instrumentation.count("generate.not_converged")
+            continue
         results.append({
-            'scenario': i,
-            'total_cost': base_cost * (1 + cost_variation),
-            'bus1_load': base_load * (1 + load_variation_factor)
+            'scenario': result['scenario'],
+            'total_cost': result['total_cost'],
+            'bus1_load': result['bus1_load']
         })
-    
-    # Write results to CSV file
-    df = pd.DataFrame(results)
-    df.to_csv(output_file, index=False)
-    
-    logger.info(f"Generated {len(results)} synthetic scenarios")
-    logger.info(f"Note: Using synthetic data due to PyPSA solver compatibility issues")
-    
-    return str(output_file)
\ No newline at end of file
+
+    # Write results to CSV file in scenario order
+    with instrumentation.timer("generate.write"):
+        df = pd.DataFrame(results, columns=['scenario', 'total_cost', 'bus1_load'])
+        df.sort_values('scenario').to_csv(output_file, index=False)
+
+    logger.info(f"Solved {len(results)} DC OPF scenarios for {case_name} with {num_workers} {solver} "
+                f"worker(s), {num_scenarios / (time.perf_counter() - start):.1f} solves/s")
+    if failed:
+        logger.warning(f"{failed} scenarios did not converge and were skipped")
+
+    return str(output_file)
+
+def _generate_parquet(output_path, num_scenarios, load_variation, case_name, num_workers, seed,
+                      chunk_size, resume, solver):
+    """Stream scenario results into a Parquet dataset, see generate_opf_scenarios."""
+    parameters = {"case_name": case_name, "seed": seed, "load_variation": load_variation, "solver": solver}
+    done = written_scenarios(output_path) if resume else set()
+    if done:
+        existing = dataset_metadata(output_path)
+        if existing != parameters:
+            raise ValueError(f"Cannot resume {output_path}: it was generated with {existing}, "
+                             f"this run uses {parameters}")
+    if not resume and output_path.exists():
+        for part in output_path.glob("part-*.parquet"):
+            part.unlink()
+    pending = [i for i in range(num_scenarios) if i not in done]
+    if done:
+        logger.info(f"Resuming: {len(done)} scenarios already written, {len(pending)} to solve")
+
+    failed = 0
+    start = time.perf_counter()
+    with ParquetScenarioWriter(output_path, chunk_size=chunk_size, metadata=parameters) as writer:
+        results = iter_opf_scenarios(load_variation=load_variation, case_name=case_name,
+                                     num_workers=num_workers, seed=seed, scenarios=pending, solver=solver)
+        for result in instrumentation.timed_iter("generate.result", results):
+            instrumentation.count("generate.scenarios")
+            failed += not result["converged"]
+            with instrumentation.timer("generate.write"):
+                writer.write(result)
+
+    logger.info(f"Solved {len(pending)} DC OPF scenarios for {case_name} with {num_workers} {solver} "
+                f"worker(s), {len(pending) / max(time.perf_counter() - start, 1e-9):.1f} solves/s")
+    if failed:
+        logger.warning(f"{failed} scenarios did not converge")
+
+    return str(output_path)
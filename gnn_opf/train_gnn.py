@@ -1,17 +1,27 @@
+import contextlib
 import csv
+import os
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from gnn_opf.pypsa_setup import load_network_config
-from gnn_opf.data.graph_data import convert_network_to_graph
-from gnn_opf.gnn_opf import PhysicsInformedGNN, physics_penalty
-from gnn_opf.data.power_networks import load_network_as_pyg
+from torch_geometric.nn import global_mean_pool
+from gnn_opf import instrumentation
+from gnn_opf.checkpoint import AsyncCheckpointer, load_checkpoint, restore_training_state
+from gnn_opf.gnn_opf import PhysicsInformedGNN, normalized_adjacency, physics_penalty
+from gnn_opf.data.scenario_store import build_scenario_store, scenario_loader
+from gnn_opf.data.scenario_io import is_parquet_path, read_scenario_table
 
 def read_scenarios(csv_path="data/generated_opf_scenarios.csv"):
     """
-    Reads the CSV file containing OPF scenarios.
+    Reads the CSV file (or Parquet scenario dataset) containing OPF scenarios.
     Returns a list of dictionaries with keys 'scenario' and 'total_cost'.
     """
+    if is_parquet_path(csv_path):
+        table = read_scenario_table(csv_path, columns=["scenario", "total_cost"])
+        return [
+            {"scenario": float(s), "total_cost": float(c)}
+            for s, c in zip(table.column("scenario").to_pylist(), table.column("total_cost").to_pylist())
+        ]
     scenarios = []
     with open(csv_path, "r") as f:
         reader = csv.DictReader(f)
@@ -28,52 +38,98 @@ def set_network_loads(network, scenario, load_variation=0.3):
     Here, we use a simple dummy mapping: the load is set as:
       load = v_nom * (1 + load_variation * (scenario / 10))
     This can be refined in future iterations.
+    The whole load column is written in one vectorized assignment; to move a
+    model input between scenarios without any pandas work, use
+    gnn_opf.data.grid_state.GridState.apply_scenario.
     """
-    for bus in network.buses.index:
-        base_load = network.buses.at[bus, "v_nom"]
-        variation_factor = scenario / 10.0  # Dummy mapping from scenario number to load variation
-        network.buses.at[bus, "load"] = base_load * (1 + load_variation * variation_factor)
+    variation_factor = scenario / 10.0  # Dummy mapping from scenario number to load variation
+    network.buses["load"] = network.buses["v_nom"] * (1 + load_variation * variation_factor)
 
-def train_gnn(num_epochs=10, learning_rate=0.01):
+def train_gnn(num_epochs=10, learning_rate=0.01, csv_path="data/generated_opf_scenarios.csv",
+              batch_size=1, shuffle=False, num_workers=0, shared_topology=False, world_size=1,
+              checkpoint_path=None, checkpoint_every=1, resume=False):
     """
     Train the PhysicsInformedGNN model using the OPF scenario data.
-    For each scenario:
-      - Load the network configuration.
-      - Update the bus loads using the scenario number.
-      - Convert the network to a PyTorch Geometric Data object.
+    All scenarios are first materialized into a ScenarioStore (node loads
+    computed from the scenario number on the shared case14 topology).
+    For each batch of scenarios:
+      - Pack the precomputed graphs into one disjoint-union graph.
       - Run the model to obtain predictions.
-      - Aggregate node predictions by taking their mean (as a proxy for a global metric).
-      - Compute the MSE loss between the aggregated prediction and the target total_cost.
-      - Add the physics penalty to form the final loss.
+      - Aggregate node predictions per scenario by taking their mean (as a proxy for a global metric).
+      - Compute the MSE loss between the aggregated predictions and the target total_cost values.
+      - Add the physics penalty (predictions balanced against the scenario's
+        bus loads in MW, see scenario_bus_loads) to form the final loss.
       - Backpropagate and update the model.
+    With the default batch_size of 1 this takes one optimizer step per scenario.
+    num_workers > 0 collates batches in background worker processes.
+    shared_topology=True skips the graph packing: the normalized adjacency is
+    computed once and each batch runs through PhysicsInformedGNN.forward_shared.
+    world_size > 1 trains on the shared-topology path with that many data-parallel
+    CPU processes (see gnn_opf.distributed); batch_size is then the global batch size.
+    With checkpoint_path set, a checkpoint (model, optimizer, RNG state, epoch and
+    topology fingerprint, see gnn_opf.checkpoint) is written in the background
+    every checkpoint_every epochs and after the last one. resume=True continues
+    from that checkpoint if it exists, so a preempted run picks up where it stopped.
     Returns the trained model.
     """
-    scenarios = read_scenarios()
+    if world_size > 1:
+        if checkpoint_path is not None:
+            raise ValueError("checkpointing is not supported with world_size > 1")
+        from gnn_opf.distributed import train_distributed
+        return train_distributed(read_scenarios(csv_path), world_size=world_size, num_epochs=num_epochs,
+                                 learning_rate=learning_rate, batch_size=batch_size, shuffle=shuffle)
+    with instrumentation.timer("train.read_scenarios"):
+        scenarios = read_scenarios(csv_path)
+    with instrumentation.timer("train.build_store"):
+        store = build_scenario_store(scenarios)
+    loader = scenario_loader(store, batch_size=batch_size, shuffle=shuffle, num_workers=num_workers,
+                             shared_topology=shared_topology)
+    # The physics penalty works on the case topology shared by every batch.
+    topology_graph = store.topology.to_pyg_data()
+    if shared_topology:
+        adjacency = normalized_adjacency(store.edge_index, store.num_nodes)
     model = PhysicsInformedGNN()
     optimizer = optim.Adam(model.parameters(), lr=learning_rate)
     criterion = nn.MSELoss()
+    start_epoch = 0
+    if resume and checkpoint_path is not None and os.path.exists(checkpoint_path):
+        start_epoch = restore_training_state(load_checkpoint(checkpoint_path), model, optimizer,
+                                             topology=store.topology)
+        print(f"Resuming from {checkpoint_path} at epoch {start_epoch+1}/{num_epochs}")
+    checkpointer = AsyncCheckpointer(checkpoint_path) if checkpoint_path is not None else None
 
-    for epoch in range(num_epochs):
-        total_loss = 0.0
-        for scenario in scenarios:
-            # Load network and update loads for the scenario
-            network = load_network_as_pyg('case14')
-            set_network_loads(network, scenario["scenario"])
-            graph = convert_network_to_graph(network)
-
-            model.train()
-            optimizer.zero_grad()
-            predictions = model(graph)
-            # Aggregate predictions: compute the mean over all nodes
-            pred_total = predictions.mean()
-            mse_loss = criterion(pred_total, torch.tensor(scenario["total_cost"], dtype=torch.float))
-            # Compute a physics penalty (dummy constraint: predictions should be near 100)
-            penalty = physics_penalty(graph, predictions)
-            loss = mse_loss + penalty
-            loss.backward()
-            optimizer.step()
-            total_loss += loss.item()
-        print(f"Epoch {epoch+1}/{num_epochs}, Loss: {total_loss:.4f}")
+    with instrumentation.profile("train_gnn"), (checkpointer or contextlib.nullcontext()):
+        for epoch in range(start_epoch, num_epochs):
+            total_loss = 0.0
+            for batch in instrumentation.timed_iter("train.load_batch", loader):
+                model.train()
+                optimizer.zero_grad()
+                with instrumentation.timer("train.forward"):
+                    if shared_topology:
+                        x, targets, loads = batch
+                        predictions = model.forward_shared(x, adjacency)
+                        # Aggregate predictions: compute the mean over the nodes of each scenario
+                        pred_total = predictions.mean(dim=(1, 2))
+                    else:
+                        x, targets, loads = batch.x, batch.y, batch.loads
+                        predictions = model(batch)
+                        # Aggregate predictions: compute the mean over the nodes of each scenario
+                        pred_total = global_mean_pool(predictions, batch.batch, size=batch.num_graphs).squeeze(-1)
+                    mse_loss = criterion(pred_total, targets)
+                with instrumentation.timer("train.penalty"):
+                    # Compute the DC power-balance and line-limit penalty against the scenario's MW bus loads
+                    penalty = physics_penalty(topology_graph, predictions, loads=loads)
+                loss = mse_loss + penalty
+                with instrumentation.timer("train.backward"):
+                    loss.backward()
+                with instrumentation.timer("train.optimizer"):
+                    optimizer.step()
+                total_loss += loss.item()
+                instrumentation.count("train.steps")
+                instrumentation.count("train.scenarios", targets.numel())
+            print(f"Epoch {epoch+1}/{num_epochs}, Loss: {total_loss:.4f}")
+            if checkpointer is not None and ((epoch + 1) % checkpoint_every == 0 or epoch + 1 == num_epochs):
+                checkpointer.save(model, optimizer, epoch=epoch, topology=store.topology)
     return model
 
 if __name__ == "__main__":
@@ -2,12 +2,15 @@
 """
 Main pipeline script for the GNN-OPF project.
 This script runs the complete pipeline from data generation to model evaluation.
+Set GNN_OPF_INSTRUMENT=1 to print per-stage timings at the end, and
+GNN_OPF_TRACE_DIR to also record torch.profiler traces of training and evaluation.
 """
 
 import logging
 import os
 from pathlib import Path
 
+from gnn_opf import instrumentation
 from gnn_opf.pypsa_data_generation import generate_opf_scenarios
 from gnn_opf.baseline_opf import train_baseline_model
 from gnn_opf.train_gnn import train_gnn
@@ -66,7 +69,10 @@ def run_ieee_14bus_pipeline(
         logger.info("\n=== Step 3: Train the Physics-Informed GNN ===")
         gnn_model = train_gnn(
             num_epochs=epochs,
-            learning_rate=learning_rate
+            learning_rate=learning_rate,
+            csv_path=scenario_csv,
+            batch_size=batch_size,
+            shuffle=True
         )
         logger.info("GNN model training completed")
 
@@ -79,11 +85,18 @@ def run_ieee_14bus_pipeline(
         results = evaluate_model(loaded_model, test_csv=scenario_csv)
         
         logger.info("\nEvaluation Results:")
-        for result in results:
-            logger.info(f"Scenario {result['scenario']}: "
-                       f"Predicted={result['predicted_total']:.4f}, "
-                       f"Actual={result['target_total']:.4f}, "
-                       f"Error={result['error']:.4f}")
+        for result in results.itertuples(index=False):
+            logger.info(f"Scenario {result.scenario}: "
+                       f"Predicted={result.predicted_total:.4f}, "
+                       f"Actual={result.target_total:.4f}, "
+                       f"Error={result.error:.4f}")
+        metrics = results.attrs.get("metrics", {})
+        if metrics:
+            logger.info(f"MAE={metrics['mae']:.4f}, RMSE={metrics['rmse']:.4f}, "
+                       f"MAPE={metrics['mape']:.2f}%, Max error={metrics['max_error']:.4f}")
+
+        if instrumentation.enabled():
+            logger.info("\nStage timings:\n" + instrumentation.summary_table())
 
         logger.info("\n=== Pipeline Completed Successfully ===")
         return True
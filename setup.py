@@ -14,6 +14,12 @@ setup(
         "numpy",
     ],
     extras_require={
+        "parquet": [
+            "pyarrow",
+        ],
+        "highs": [
+            "highspy",
+        ],
         "dev": [
             "pytest",
             "pytest-cov",
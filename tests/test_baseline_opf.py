@@ -31,4 +31,55 @@ def test_training():
     params_after = [p for p in model_after.parameters()]
     # Check that at least one parameter has changed.
     changed = any(torch.any(p_after != p_before) for p_before, p_after in zip(params_before, params_after))
-    assert changed, "Model parameters did not change after training." 
\ No newline at end of file
+    assert changed, "Model parameters did not change after training." 
+
+def write_csv(path, num_rows, cost_offset=0.0):
+    with open(path, "w") as f:
+        f.write("scenario,total_cost,bus1_load\n")
+        for i in range(num_rows):
+            f.write(f"{i},{1000.0 + i + cost_offset},{10.0 + i}\n")
+
+def test_dataset_batch_indexing(tmp_path):
+    csv_file = tmp_path / "scenarios.csv"
+    write_csv(csv_file, 10)
+    dataset = OPFDataset(str(csv_file))
+    assert len(dataset) == 10
+    feature, target = dataset[3]
+    assert feature.tolist() == [3.0, 13.0]
+    assert target.tolist() == [1003.0]
+    features, targets = dataset[[1, 4, 7]]
+    assert features.shape == (3, 2) and targets.shape == (3, 1)
+    assert targets[:, 0].tolist() == [1001.0, 1004.0, 1007.0]
+
+def test_dataset_binary_cache(tmp_path):
+    import numpy as np
+    csv_file = tmp_path / "scenarios.csv"
+    write_csv(csv_file, 5)
+    OPFDataset(str(csv_file))
+    cache = tmp_path / "scenarios.csv.cache.npy"
+    assert cache.exists(), "Parsed samples should be cached next to the CSV."
+    # An unchanged CSV (same size and mtime) is served from the cache without parsing.
+    stat = csv_file.stat()
+    csv_file.write_text("x" * stat.st_size)
+    os.utime(csv_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    first = OPFDataset(str(csv_file))
+    assert first.targets[0].item() == 1000.0
+
+    # Rewriting the CSV invalidates the cache, even if its mtime moves backwards.
+    write_csv(csv_file, 6, cost_offset=1.0)
+    os.utime(csv_file, ns=(stat.st_mtime_ns - 10**9, stat.st_mtime_ns - 10**9))
+    second = OPFDataset(str(csv_file))
+    assert len(second) == 6 and second.targets[0].item() == 1001.0
+    assert np.load(cache).shape == (6, 3)
+
+def test_batch_loader_serves_whole_batches(tmp_path):
+    from gnn_opf.baseline_opf import batch_loader
+    csv_file = tmp_path / "scenarios.csv"
+    write_csv(csv_file, 10)
+    dataset = OPFDataset(str(csv_file))
+    batches = list(batch_loader(dataset, batch_size=4, shuffle=True))
+    assert [b[0].shape[0] for b in batches] == [4, 4, 2]
+    seen = torch.cat([b[1] for b in batches])[:, 0]
+    assert sorted(seen.tolist()) == [1000.0 + i for i in range(10)]
+    model = train_baseline_model(str(csv_file), epochs=2, batch_size=4)
+    assert isinstance(model, BaselineOPFModel)
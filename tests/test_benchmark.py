@@ -0,0 +1,49 @@
+import copy
+from gnn_opf.benchmark import compare_results, load_results, main, run_benchmarks, save_results
+
+def test_run_benchmarks_records():
+    results = run_benchmarks(cases=["case4gs", "case14"], batch_sizes=[2, 8],
+                             benchmarks=["graph_build", "inference", "evaluate_model"], repeats=1, verbose=False)
+    keys = {(r["benchmark"], r["case"], r["batch_size"]) for r in results["results"]}
+    assert ("graph_build", "case4gs", 1) in keys
+    assert ("inference", "case14", 8) in keys
+    # evaluate_model only runs on case14
+    assert ("evaluate_model", "case14", 2) in keys
+    assert not any(k[0] == "evaluate_model" and k[1] == "case4gs" for k in keys)
+    for record in results["results"]:
+        assert record["wall_s"] > 0 and record["throughput"] > 0 and record["peak_rss_mb"] > 0
+    assert results["meta"]["torch"]
+
+def test_import_time_is_benchmarked():
+    results = run_benchmarks(cases=["case4gs", "case14"], benchmarks=["import_gnn_opf"], repeats=1, verbose=False)
+    assert [(r["benchmark"], r["case"], r["batch_size"]) for r in results["results"]] == [
+        ("import_gnn_opf", "case14", 1)]
+    assert results["results"][0]["wall_s"] > 0
+    slower = copy.deepcopy(results)
+    slower["results"][0]["wall_s"] += 1.0
+    assert [r["metric"] for r in compare_results(slower, results)] == ["wall_s"]
+
+def test_compare_flags_regressions(tmp_path):
+    baseline = {"meta": {}, "results": [
+        {"benchmark": "inference", "case": "case14", "batch_size": 8, "wall_s": 0.01, "peak_rss_mb": 100.0},
+        {"benchmark": "inference", "case": "case30", "batch_size": 8, "wall_s": 1e-5, "peak_rss_mb": 100.0},
+    ]}
+    path = save_results(baseline, tmp_path / "nested" / "baseline.json")
+    assert load_results(path) == baseline
+
+    current = copy.deepcopy(baseline)
+    assert compare_results(current, baseline) == []
+    current["results"][0]["wall_s"] = 0.02
+    # Below min_seconds: timer noise on microsecond points is ignored.
+    current["results"][1]["wall_s"] = 5e-5
+    current["results"][1]["peak_rss_mb"] = 200.0
+    regressions = compare_results(current, baseline)
+    assert [(r["case"], r["metric"]) for r in regressions] == [("case14", "wall_s"), ("case30", "peak_rss_mb")]
+    assert regressions[0]["ratio"] == 2.0
+
+def test_cli_baseline_roundtrip(tmp_path):
+    args = ["--cases", "case4gs", "--benchmarks", "graph_build", "--repeats", "1",
+            "--output", str(tmp_path / "latest.json"), "--baseline", str(tmp_path / "baseline.json")]
+    assert main(args + ["--save-baseline"]) == 0
+    assert (tmp_path / "baseline.json").exists()
+    assert main(args + ["--tolerance", "100"]) == 0
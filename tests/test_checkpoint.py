@@ -0,0 +1,98 @@
+import threading
+
+import pytest
+import torch
+from gnn_opf.checkpoint import (AsyncCheckpointer, load_checkpoint, restore_training_state, save_checkpoint,
+                                topology_fingerprint)
+from gnn_opf.data.power_networks import load_topology
+from gnn_opf.evaluate_gnn import load_model, save_model
+from gnn_opf.gnn_opf import PhysicsInformedGNN
+from gnn_opf.train_gnn import train_gnn
+
+def write_scenarios(path, n=12):
+    path.write_text("scenario,total_cost\n" + "".join(f"{i % 10}.0,{1000.0 + 10.0 * i}\n" for i in range(n)))
+    return str(path)
+
+def test_load_model_reads_dimensions_and_maps_weights(tmp_path):
+    path = tmp_path / "model.pth"
+    model = PhysicsInformedGNN(input_dim=2, hidden_dim=8, output_dim=3)
+    save_model(model, str(path))
+    loaded = load_model(str(path))
+    assert loaded.conv1.in_channels == 2 and loaded.conv2.out_channels == 3
+    for name, value in model.state_dict().items():
+        assert torch.equal(value, loaded.state_dict()[name]), name
+    assert all(p.device.type == "cpu" and p.requires_grad for p in loaded.parameters())
+    assert torch.equal(load_model(str(path), mmap=False).conv1.lin.weight, model.conv1.lin.weight)
+
+def test_load_model_accepts_bare_state_dict(tmp_path):
+    path = tmp_path / "legacy.pth"
+    model = PhysicsInformedGNN(hidden_dim=4)
+    torch.save(model.state_dict(), path)
+    loaded = load_model(str(path), hidden_dim=4)
+    assert torch.equal(loaded.conv2.lin.weight, model.conv2.lin.weight)
+
+def test_restore_checks_topology_and_restores_state(tmp_path):
+    path = tmp_path / "ckpt.pth"
+    case14, case30 = load_topology("case14"), load_topology("case30")
+    assert topology_fingerprint(case14) == topology_fingerprint(load_topology("case14"))
+    assert topology_fingerprint(case14) != topology_fingerprint(case30)
+
+    model = PhysicsInformedGNN()
+    optimizer = torch.optim.Adam(model.parameters(), lr=0.1)
+    sum(p.sum() for p in model.parameters()).backward()
+    optimizer.step()
+    save_checkpoint(path, model, optimizer, epoch=4, topology=case14)
+    expected = torch.rand(3)
+
+    state = load_checkpoint(path)
+    with pytest.raises(ValueError):
+        restore_training_state(state, PhysicsInformedGNN(), topology=case30)
+    restored = PhysicsInformedGNN()
+    restored_optimizer = torch.optim.Adam(restored.parameters(), lr=0.1)
+    assert restore_training_state(state, restored, restored_optimizer, topology=case14) == 5
+    assert torch.equal(torch.rand(3), expected)
+    assert torch.equal(restored.conv1.lin.weight, model.conv1.lin.weight)
+    assert torch.equal(restored_optimizer.state_dict()["state"][0]["exp_avg"],
+                       optimizer.state_dict()["state"][0]["exp_avg"])
+
+def test_async_saves_snapshot_state_without_blocking(tmp_path, monkeypatch):
+    import gnn_opf.checkpoint as checkpoint
+    started, release = threading.Event(), threading.Event()
+    write = checkpoint.write_checkpoint
+
+    def stalled_write(state, path):
+        started.set()
+        release.wait(10)
+        write(state, path)
+
+    monkeypatch.setattr(checkpoint, "write_checkpoint", stalled_write)
+    model = PhysicsInformedGNN()
+    with AsyncCheckpointer(tmp_path / "ckpt.pth") as checkpointer:
+        checkpointer.save(model, epoch=0)
+        assert started.wait(10)
+        # The writer is stalled, yet the caller keeps going; later saves replace the queued one.
+        with torch.no_grad():
+            model.conv1.lin.weight.fill_(1.0)
+        checkpointer.save(model, epoch=1)
+        checkpointer.save(model, epoch=2)
+        release.set()
+        checkpointer.wait()
+        assert checkpointer.saves == 2 and checkpointer.skipped == 1
+    state = load_checkpoint(tmp_path / "ckpt.pth")
+    assert state["epoch"] == 2
+    assert torch.all(state["state_dict"]["conv1.lin.weight"] == 1.0)
+
+def test_resumed_training_matches_uninterrupted_run(tmp_path):
+    csv_path = write_scenarios(tmp_path / "scenarios.csv")
+    torch.manual_seed(0)
+    reference = train_gnn(num_epochs=4, csv_path=csv_path, batch_size=3, shuffle=True)
+
+    checkpoint_path = tmp_path / "train.pth"
+    torch.manual_seed(0)
+    train_gnn(num_epochs=2, csv_path=csv_path, batch_size=3, shuffle=True, checkpoint_path=checkpoint_path)
+    torch.manual_seed(123)
+    resumed = train_gnn(num_epochs=4, csv_path=csv_path, batch_size=3, shuffle=True,
+                        checkpoint_path=checkpoint_path, resume=True)
+    for name, value in reference.state_dict().items():
+        assert torch.allclose(value, resumed.state_dict()[name], atol=1e-6), name
+    assert load_checkpoint(checkpoint_path)["epoch"] == 3
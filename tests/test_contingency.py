@@ -0,0 +1,105 @@
+import torch
+import pytest
+from torch_geometric.data import Data
+from gnn_opf.contingency import outage_adjacency, screen_contingencies
+from gnn_opf.data.power_networks import load_topology
+from gnn_opf.gnn_opf import PhysicsInformedGNN
+
+def test_outage_adjacency_matches_rebuilt_graph():
+    topology = load_topology('case30')
+    lines = torch.tensor([0, 5, 17])
+    adjacency = outage_adjacency(topology, lines).to_dense()
+    model = PhysicsInformedGNN()
+    x = torch.rand(topology.num_nodes, 1) * 100
+    N = topology.num_nodes
+    with torch.no_grad():
+        batched = model.forward_shared(x.repeat(3, 1).unsqueeze(0), outage_adjacency(topology, lines))[0]
+    for j, line in enumerate(lines.tolist()):
+        keep = torch.ones(topology.edge_index.size(1), dtype=torch.bool)
+        keep[[line, line + topology.num_lines]] = False
+        graph = Data(x=x, edge_index=topology.edge_index[:, keep])
+        with torch.no_grad():
+            expected = model(graph)
+        assert torch.allclose(batched[j * N:(j + 1) * N], expected, atol=1e-4)
+    # Blocks do not interact.
+    assert adjacency[:N, N:].abs().sum() == 0
+
+def test_screen_contingencies_flags():
+    topology = load_topology('case30')
+    model = PhysicsInformedGNN()
+    loads = topology.load_p_mw.expand(5, -1) * torch.linspace(0.5, 1.5, 5)[:, None]
+    result = screen_contingencies(model, 'case30', loads, block_size=8, return_node_predictions=True)
+    L = topology.num_lines
+    assert result.predicted_total.shape == (L, 5)
+    assert result.max_loading.shape == (L, 5)
+    assert result.violation.dtype == torch.bool
+    assert result.node_predictions.shape == (L, 5, topology.num_nodes)
+    assert torch.allclose(result.node_predictions.mean(dim=2), result.predicted_total)
+    assert torch.isnan(result.max_loading[result.islanding]).all()
+    assert not result.violation[result.islanding].any()
+
+    subset = screen_contingencies(model, 'case30', loads, lines=[3, 7])
+    assert torch.allclose(subset.predicted_total, result.predicted_total[[3, 7]], atol=1e-4)
+    assert torch.allclose(subset.max_loading, result.max_loading[[3, 7]], atol=1e-4, equal_nan=True)
+
+def test_loading_matches_direct_outage_flows():
+    """LODF-based post-contingency loading equals flows solved on the outaged network."""
+    from gnn_opf.data.dc_model import DCNetwork, dc_network
+    topology = load_topology('case30')
+    model = PhysicsInformedGNN()
+    loads = topology.load_p_mw.unsqueeze(0)
+    result = screen_contingencies(model, 'case30', loads, lines=[2], return_node_predictions=True)
+    keep = torch.ones(topology.edge_index.size(1), dtype=torch.bool)
+    keep[[2, 2 + topology.num_lines]] = False
+    outaged = DCNetwork(topology.edge_index[:, keep], topology.x_ohm[keep], topology.capacity[keep],
+                        topology.voltage, topology.sn_mva)
+    flows = outaged.line_flows(result.node_predictions[0] - loads)
+    expected = (flows.abs() / outaged.limit_mw_t).amax()
+    assert result.max_loading[0, 0].item() == pytest.approx(expected.item(), rel=1e-3)
+
+class DispatchModel(PhysicsInformedGNN):
+    """Predicts a fixed bus dispatch for every scenario and outage block."""
+
+    def __init__(self, dispatch):
+        super().__init__()
+        self.dispatch = dispatch
+
+    def forward_shared(self, x, adjacency):
+        blocks = x.size(1) // self.dispatch.numel()
+        return self.dispatch.repeat(blocks).view(1, -1, 1).expand(x.size(0), -1, 1)
+
+def test_loading_matches_pandapower_outages():
+    """Post-contingency loading equals pandapower DC power flows with the branch out of service."""
+    import numpy as np
+    import pandapower as pp
+    from gnn_opf.data.dc_model import dc_network
+    from gnn_opf.data.power_networks import load_power_network
+    net = load_power_network('case14')
+    pp.rundcpp(net)
+    topology = load_topology('case14')
+    network = dc_network(topology)
+    position = {bus: i for i, bus in enumerate(net.bus.index)}
+    injections = torch.zeros(topology.num_nodes)
+    injections[[position[b] for b in net.res_bus.index]] = -torch.tensor(net.res_bus.p_mw.values).float()
+
+    branches = {}
+    for table, from_col, to_col in (("line", "from_bus", "to_bus"), ("trafo", "hv_bus", "lv_bus")):
+        for idx, row in net[table].iterrows():
+            f, t = position[row[from_col]], position[row[to_col]]
+            branches[(min(f, t), max(f, t))] = (table, idx)
+    result = screen_contingencies(DispatchModel(injections), 'case14', torch.zeros(1, topology.num_nodes))
+    assert result.islanding.sum() == 1  # bus 8 hangs off a single transformer
+
+    limits = network.limit_mw
+    for k in np.flatnonzero(~result.islanding.numpy()):
+        table, idx = branches[(network.from_bus[k], network.to_bus[k])]
+        net[table].at[idx, "in_service"] = False
+        pp.rundcpp(net)
+        net[table].at[idx, "in_service"] = True
+        flows = np.zeros(network.num_lines)
+        for j, (f, t) in enumerate(zip(network.from_bus, network.to_bus)):
+            other_table, other_idx = branches[(f, t)]
+            column = "p_from_mw" if other_table == "line" else "p_hv_mw"
+            flows[j] = np.nan_to_num(net["res_" + other_table].at[other_idx, column])
+        expected = (np.abs(flows) / limits).max()
+        assert result.max_loading[k, 0].item() == pytest.approx(expected, rel=1e-3)
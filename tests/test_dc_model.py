@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+import torch
+import pandapower as pp
+from gnn_opf.data.dc_model import DCNetwork, dc_network
+from gnn_opf.data.power_networks import build_topology, load_power_network, load_topology
+
+@pytest.mark.parametrize("case_name", ['case9', 'case14', 'case118', 'case300'])
+def test_line_flows_match_pandapower_dc_power_flow(case_name):
+    """Flows on lines and transformers from the cached sparse B factorization match pandapower's DC power flow."""
+    net = load_power_network(case_name)
+    pp.rundcpp(net)
+    topology = build_topology(net, case_name)
+    network = dc_network(topology)
+
+    injections = np.zeros(len(net.bus))
+    np.add.at(injections, net.bus.index.get_indexer(net.res_bus.index), -net.res_bus.p_mw.values)
+    flows = network.line_flows(torch.from_numpy(injections).float().unsqueeze(0))[0]
+
+    expected = {}
+    branches = [(net.line.from_bus, net.line.to_bus, net.res_line.p_from_mw),
+                (net.trafo.hv_bus, net.trafo.lv_bus, net.res_trafo.p_hv_mw)]
+    for from_bus, to_bus, p_mw in branches:
+        for f, t, p in zip(net.bus.index.get_indexer(from_bus), net.bus.index.get_indexer(to_bus), p_mw):
+            key = (min(f, t), max(f, t))
+            # Parallel branches are merged into one edge carrying their summed flow.
+            expected[key] = expected.get(key, 0.0) + (p if f < t else -p)
+    assert len(expected) == network.num_lines
+    for k in range(network.num_lines):
+        key = (network.from_bus[k], network.to_bus[k])
+        assert flows[k].item() == pytest.approx(expected[key], rel=1e-3, abs=1e-2)
+
+def test_transformers_connect_the_grid():
+    network = dc_network(load_topology('case14'))
+    assert network.num_islands == 1
+    assert network.num_lines == 20  # 15 lines and 5 transformers
+
+def test_internal_case_leaves_the_network_untouched(monkeypatch):
+    import pandapower
+    from gnn_opf.data.power_networks import pandapower_internal_case
+    net = load_power_network('case300')
+    columns = {name: list(net[name].columns) for name in ("gen", "sgen", "load")}
+    keys = set(net.keys())
+    ppc, ppci, lookups = pandapower_internal_case(net)
+    assert ppci["bus"].shape[0] == len(net.bus)
+    assert {name: list(net[name].columns) for name in columns} == columns and set(net.keys()) == keys
+
+    monkeypatch.setattr(pandapower, "__version__", "9.0.0")
+    with pytest.raises(ImportError, match="9.0.0"):
+        pandapower_internal_case(net)
+
+def test_islands_get_their_own_reference():
+    # Two triangles without a branch between them.
+    edges = torch.tensor([[0, 1, 0, 3, 4, 3], [1, 2, 2, 4, 5, 5]])
+    edge_index = torch.cat([edges, edges.flip(0)], dim=1)
+    network = DCNetwork(edge_index, torch.ones(12), torch.ones(12), torch.full((6,), 110.0), 100.0)
+    assert network.num_islands == 2
+    assert network.island.tolist() == [0, 0, 0, 1, 1, 1]
+    assert network.reference.tolist() == [0, 3]
+    # Each island balances on its own; a transfer inside one island leaves the other without flow.
+    flows = network.line_flows(torch.tensor([[10.0, -10.0, 0.0, 0.0, 0.0, 0.0]]))[0]
+    assert torch.all(flows[3:] == 0) and flows[:3].abs().sum() > 0
+    assert network.island_imbalance(torch.tensor([[1.0, 0, 0, 2.0, 0, 0]])).tolist() == [[1.0, 2.0]]
+
+def test_network_is_cached_per_topology():
+    topology = load_topology('case14')
+    assert dc_network(topology) is dc_network(topology.to_pyg_data())
+
+def test_reduced_solve_gradient():
+    topology = load_topology('case9')
+    network = dc_network(topology)
+    injections = torch.randn(2, topology.num_nodes, dtype=torch.double, requires_grad=True)
+    assert torch.autograd.gradcheck(lambda p: network.angles(p), (injections,))
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("highspy")
+
+from gnn_opf.dc_opf import DCOPFModel, compare_warm_start, order_scenarios
+from gnn_opf.data.power_networks import load_power_network
+from gnn_opf.pypsa_data_generation import iter_opf_scenarios, scenario_load_p_mw
+
+@pytest.mark.parametrize("case_name", ["case14", "case300"])
+def test_matches_pandapower_dc_opf(case_name):
+    import pandapower as pp
+    net = load_power_network(case_name)
+    columns = {name: list(net[name].columns) for name in ("gen", "sgen", "load")}
+    model = DCOPFModel(net)
+    # Building the model leaves the caller's network as it was.
+    assert {name: list(net[name].columns) for name in columns} == columns
+    solution = model.solve(warm_start=False)
+    pp.rundcopp(net)
+    assert solution.converged
+    # Piecewise-linear costs: close to, and never below, the quadratic optimum.
+    assert solution.total_cost == pytest.approx(net.res_cost, rel=2e-3)
+    assert solution.total_cost >= net.res_cost - 1e-6
+    # case300 has shunts with active power (bus GS), which the dispatch has to cover too.
+    demand = net.load.p_mw.sum() + (net.shunt.p_mw * net.shunt.step * net.shunt.in_service).sum()
+    assert solution.gen_p_mw.sum() == pytest.approx(demand, rel=1e-6)
+    generation = net.res_gen.p_mw.sum() + net.res_ext_grid.p_mw.sum() + net.res_sgen.p_mw.sum()
+    assert solution.gen_p_mw.sum() == pytest.approx(generation, rel=1e-6)
+
+def test_warm_start_needs_fewer_iterations():
+    model = DCOPFModel.from_case("case118")
+    loads = [scenario_load_p_mw(model.base_load_p_mw, i, 0, 0.3) for i in range(20)]
+    cold = [model.solve(p, warm_start=False) for p in loads]
+    model.solve(loads[0], warm_start=False)
+    warm = [model.solve(p) for p in loads]
+    for c, w in zip(cold, warm):
+        assert c.converged and w.converged
+        assert w.total_cost == pytest.approx(c.total_cost, rel=1e-6)
+    assert sum(w.iterations for w in warm) < sum(c.iterations for c in cold) / 5
+
+def test_order_scenarios_sorts_by_total_load():
+    loads = np.array([[3.0, 1.0], [1.0, 0.0], [2.0, 0.5]])
+    assert order_scenarios(loads).tolist() == [1, 2, 0]
+    assert order_scenarios(loads.sum(axis=1)).tolist() == [1, 2, 0]
+
+def test_highs_generation_matches_pandapower():
+    reference = {r["scenario"]: r for r in iter_opf_scenarios(num_scenarios=4, seed=3)}
+    for warm_start in (True, False):
+        results = list(iter_opf_scenarios(num_scenarios=4, seed=3, solver="highs", warm_start=warm_start))
+        assert sorted(r["scenario"] for r in results) == [0, 1, 2, 3]
+        for r in results:
+            assert r["converged"]
+            assert np.allclose(r["load_p_mw"], reference[r["scenario"]]["load_p_mw"])
+            assert r["total_cost"] == pytest.approx(reference[r["scenario"]]["total_cost"], rel=2e-3)
+
+def test_compare_warm_start_reports_modes():
+    rows = compare_warm_start(cases=("case14",), num_scenarios=10, pandapower_scenarios=2)
+    assert [r["mode"] for r in rows] == ["pandapower", "cold", "warm", "warm_ordered"]
+    assert all(r["solves_per_second"] > 0 for r in rows)
+    assert all(r["converged"] == 1.0 for r in rows[1:])
+
+def test_parallel_highs_leaves_parent_state_alone(monkeypatch):
+    import gnn_opf.pypsa_data_generation as generation
+    monkeypatch.setattr(generation, "_worker_state", None)
+    serial = {r["scenario"]: r for r in iter_opf_scenarios(num_scenarios=4, seed=3, solver="highs")}
+    monkeypatch.setattr(generation, "_worker_state", None)
+    parallel = list(iter_opf_scenarios(num_scenarios=4, seed=3, solver="highs", num_workers=2))
+    assert generation._worker_state is None
+    assert sorted(r["scenario"] for r in parallel) == [0, 1, 2, 3]
+    for r in parallel:
+        assert r["total_cost"] == pytest.approx(serial[r["scenario"]]["total_cost"], rel=1e-6)
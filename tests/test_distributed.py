@@ -0,0 +1,38 @@
+import torch
+from gnn_opf.distributed import ShardedBatchSampler, train_distributed
+from gnn_opf.train_gnn import train_gnn
+
+def make_scenarios(n=40):
+    return [{"scenario": float(i % 10), "total_cost": 1000.0 + 10.0 * i} for i in range(n)]
+
+def test_sharded_sampler_partitions_each_global_batch():
+    samplers = [ShardedBatchSampler(23, 8, rank=r, world_size=3, seed=5) for r in range(3)]
+    for epoch in range(2):
+        for s in samplers:
+            s.set_epoch(epoch)
+        batches = [list(s) for s in samplers]
+        assert all(len(b) == 3 for b in batches)
+        single = ShardedBatchSampler(23, 8, seed=5)
+        single.set_epoch(epoch)
+        for b, global_batch in enumerate(single):
+            shards = [batches[r][b] for r in range(3)]
+            assert sorted(sum(shards, [])) == sorted(global_batch)
+            assert max(map(len, shards)) - min(map(len, shards)) <= 1
+    assert list(samplers[0]) != list(ShardedBatchSampler(23, 8, rank=0, world_size=3, seed=5))
+
+def test_two_ranks_match_single_process():
+    scenarios = make_scenarios()
+    single = train_distributed(scenarios, world_size=1, num_epochs=2, batch_size=7, seed=3, verbose=False)
+    parallel = train_distributed(scenarios, world_size=2, num_epochs=2, batch_size=7, seed=3, verbose=False)
+    for name, value in single.state_dict().items():
+        assert torch.allclose(value, parallel.state_dict()[name], atol=1e-5), name
+
+def test_matches_train_gnn(tmp_path):
+    csv_path = tmp_path / "scenarios.csv"
+    rows = make_scenarios(20)
+    csv_path.write_text("scenario,total_cost\n" + "".join(f"{r['scenario']},{r['total_cost']}\n" for r in rows))
+    torch.manual_seed(11)
+    reference = train_gnn(num_epochs=2, csv_path=str(csv_path), batch_size=6, shared_topology=True)
+    model = train_distributed(rows, world_size=1, num_epochs=2, batch_size=6, shuffle=False, seed=11, verbose=False)
+    for name, value in reference.state_dict().items():
+        assert torch.allclose(value, model.state_dict()[name], atol=1e-5), name
@@ -1,6 +1,9 @@
+import math
 import os
+import pandas as pd
+import pytest
 import torch
-from gnn_opf.evaluate_gnn import save_model, load_model, evaluate_model
+from gnn_opf.evaluate_gnn import save_model, load_model, evaluate_model, compute_metrics
 from gnn_opf.gnn_opf import PhysicsInformedGNN
 
 def test_save_and_load_model(tmp_path):
@@ -21,10 +24,57 @@ def test_evaluate_model():
     model = train_gnn(num_epochs=2, learning_rate=0.01)
     # Evaluate the model using the generated scenario CSV.
     evaluation_results = evaluate_model(model)
-    # Check that evaluation results is a non-empty list.
-    assert isinstance(evaluation_results, list), "Evaluation results should be a list."
-    assert len(evaluation_results) > 0, "Evaluation results list should not be empty."
-    # Verify that each result contains required keys.
-    for res in evaluation_results:
-        for key in ["scenario", "predicted_total", "target_total", "error"]:
-            assert key in res, f"Key '{key}' missing in evaluation result." 
\ No newline at end of file
+    # Check that evaluation results is a non-empty table.
+    assert isinstance(evaluation_results, pd.DataFrame), "Evaluation results should be a DataFrame."
+    assert len(evaluation_results) > 0, "Evaluation results should not be empty."
+    # Verify that the table contains the required columns.
+    for key in ["scenario", "predicted_total", "target_total", "error"]:
+        assert key in evaluation_results.columns, f"Column '{key}' missing in evaluation results."
+    for key in ["mae", "rmse", "mape", "max_error"]:
+        assert key in evaluation_results.attrs["metrics"], f"Metric '{key}' missing." 
+
+def test_evaluate_matches_per_scenario_forward(tmp_path):
+    from gnn_opf.data.scenario_store import build_scenario_store
+    from gnn_opf.train_gnn import read_scenarios
+    csv_path = tmp_path / "scenarios.csv"
+    csv_path.write_text("scenario,total_cost,bus1_load\n" + "".join(f"{i},{1000 + i},10\n" for i in range(7)))
+    model = PhysicsInformedGNN()
+    results = evaluate_model(model, test_csv=str(csv_path), batch_size=3)
+    store = build_scenario_store(read_scenarios(str(csv_path)))
+    with torch.no_grad():
+        expected = [model(store.graph(i)).mean().item() for i in range(len(store))]
+    assert results["predicted_total"].tolist() == pytest.approx(expected, rel=1e-4)
+    assert results["scenario"].tolist() == list(range(7))
+
+def test_evaluate_parquet_reports_per_bus_metrics(tmp_path):
+    pytest.importorskip("pyarrow")
+    from gnn_opf.data.scenario_io import ParquetScenarioWriter
+    from gnn_opf.data.scenario_store import build_scenario_store
+    from gnn_opf.train_gnn import read_scenarios
+    path = tmp_path / "scenarios.parquet"
+    with ParquetScenarioWriter(path, chunk_size=2) as writer:
+        for i in range(3):
+            writer.write({"scenario": i, "total_cost": 1000.0 + i, "bus1_load": 10.0, "converged": True,
+                          "load_p_mw": [0.0] * 14, "gen_p_mw": [float(i)] * 14})
+    model = PhysicsInformedGNN()
+    metrics = evaluate_model(model, test_csv=str(path)).attrs["metrics"]
+    store = build_scenario_store(read_scenarios(str(path)))
+    with torch.no_grad():
+        node_pred = torch.stack([model(store.graph(i))[:, 0] for i in range(3)])
+    node_error = (node_pred - torch.arange(3.0)[:, None]).abs()
+    assert metrics["per_bus_mae"].tolist() == pytest.approx(node_error.mean(dim=0).tolist(), rel=1e-4)
+    assert metrics["per_bus_max_error"].tolist() == pytest.approx(node_error.max(dim=0).values.tolist(), rel=1e-4)
+
+def test_compute_metrics():
+    predicted = torch.tensor([110.0, 90.0, 100.0, 0.0])
+    target = torch.tensor([100.0, 100.0, 100.0, 0.0])
+    node_predictions = torch.tensor([[1.0, 2.0], [3.0, 6.0]])
+    node_targets = torch.tensor([[1.0, 1.0], [1.0, 1.0]])
+    metrics = compute_metrics(predicted, target, node_predictions, node_targets)
+    assert metrics["mae"] == pytest.approx(5.0)
+    assert metrics["rmse"] == pytest.approx((200.0 / 4) ** 0.5)
+    assert metrics["mape"] == pytest.approx(20.0 / 3)
+    assert metrics["max_error"] == pytest.approx(10.0)
+    assert metrics["per_bus_mae"].tolist() == pytest.approx([1.0, 3.0])
+    assert metrics["per_bus_max_error"].tolist() == pytest.approx([2.0, 5.0])
+    assert math.isnan(compute_metrics(predicted[3:], target[3:])["mape"])
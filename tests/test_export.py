@@ -0,0 +1,52 @@
+import json
+import os
+import subprocess
+import sys
+import torch
+from torch_geometric.data import Data
+from gnn_opf.data.power_networks import load_topology
+from gnn_opf.export import compare_latency, export_torchscript, freeze_model, load_artifact, verify_artifact
+from gnn_opf.gnn_opf import PhysicsInformedGNN
+
+def test_frozen_module_matches_eager():
+    model = PhysicsInformedGNN().eval()
+    module = freeze_model(model, 'case30')
+    assert verify_artifact(module, model, 'case30') < 1e-4
+    # Single-graph input matches the PyG forward.
+    topology = load_topology('case30')
+    x = topology.voltage.unsqueeze(-1)
+    with torch.no_grad():
+        expected = model(Data(x=x, edge_index=topology.edge_index))
+    assert torch.allclose(module(x), expected, atol=1e-4)
+
+def test_wide_input_layers_match_eager():
+    model = PhysicsInformedGNN(input_dim=32, hidden_dim=8, output_dim=4).eval()
+    module = freeze_model(model, 'case14')
+    verify_artifact(module, model, 'case14')
+
+def test_artifact_runs_without_gnn_opf(tmp_path):
+    model = PhysicsInformedGNN().eval()
+    path = export_torchscript(model, 'case14', tmp_path / "model.pt")
+    module, meta = load_artifact(path)
+    assert meta["case_name"] == 'case14' and meta["num_nodes"] == 14
+    x = torch.rand(3, 14, 1)
+    with torch.no_grad():
+        expected = module(x)
+    torch.save(x, tmp_path / "x.pt")
+
+    code = (
+        "import json, sys, torch\n"
+        f"module = torch.jit.load({str(path)!r})\n"
+        f"out = module(torch.load({str(tmp_path / 'x.pt')!r}))\n"
+        f"torch.save(out, {str(tmp_path / 'out.pt')!r})\n"
+        "print(json.dumps([m for m in ('gnn_opf', 'torch_geometric') if m in sys.modules]))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=tmp_path, env={**os.environ, "PYTHONPATH": ""})
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
+    assert torch.allclose(torch.load(tmp_path / "out.pt"), expected)
+
+def test_compare_latency():
+    rows = compare_latency(PhysicsInformedGNN(), cases=('case14',), batch_sizes=(1, 4), repeats=2)
+    assert [(r["case"], r["batch_size"]) for r in rows] == [('case14', 1), ('case14', 4)]
+    assert all(r["eager_ms"] > 0 and r["exported_ms"] > 0 for r in rows)
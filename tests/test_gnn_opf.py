@@ -1,7 +1,7 @@
 import torch
 from torch_geometric.data import Data
 import pytest
-from gnn_opf.gnn_opf import PhysicsInformedGNN, physics_penalty
+from gnn_opf.gnn_opf import PhysicsInformedGNN, normalized_adjacency, physics_penalty
 
 def test_gnn_forward():
     # Create a dummy graph Data object with 4 nodes and a simple edge index.
@@ -15,10 +15,67 @@ def test_gnn_forward():
     # Check that output has the same number of nodes and one feature per node.
     assert output.shape == (4, 1), "Output shape should be [number_of_nodes, 1]."
 
+def line_graph(x_ohm=(1.0, 1.0), capacity=(1.0, 1.0)):
+    """Three buses in a line (0 - 1 - 2) at 100 kV on a 100 MVA base, so x_ohm equals x_pu."""
+    edge_index = torch.tensor([[0, 1, 1, 2],
+                               [1, 2, 0, 1]], dtype=torch.long)
+    attr = lambda values: torch.tensor(list(values) * 2, dtype=torch.float)
+    return Data(edge_index=edge_index, x_ohm=attr(x_ohm), capacity=attr(capacity),
+                voltage=torch.full((3,), 100.0), sn_mva=100.0, num_nodes=3)
+
 def test_physics_penalty():
     # Create dummy predictions and compute penalty.
     predictions = torch.tensor([[90.0], [110.0], [100.0]], dtype=torch.float)
-    penalty = physics_penalty(None, predictions)
+    penalty = physics_penalty(line_graph(), predictions, torch.full((3, 1), 100.0))
     # Penalty should be a positive scalar.
     assert torch.is_tensor(penalty) and penalty.dim() == 0, "Penalty should be a scalar tensor."
-    assert penalty.item() >= 0, "Penalty should be non-negative." 
\ No newline at end of file
+    assert penalty.item() >= 0, "Penalty should be non-negative."
+
+def test_physics_penalty_balance_and_limits():
+    data = line_graph(capacity=(1.0, 1.0))  # limit = sqrt(3) * 100 kV * 1 kA ~ 173 MW
+    loads = torch.tensor([[0.0], [0.0], [100.0]])
+    # Balanced dispatch within line limits: no penalty.
+    balanced = torch.tensor([[100.0], [0.0], [0.0]])
+    assert physics_penalty(data, balanced, loads).item() == pytest.approx(0.0, abs=1e-5)
+    # Imbalance of 50 MW on a 100 MVA base.
+    short = torch.tensor([[50.0], [0.0], [0.0]])
+    assert physics_penalty(data, short, loads).item() == pytest.approx(0.5, rel=1e-4)
+    # 273 MW flowing over both lines overloads each by 100 MW (1 p.u.).
+    heavy = torch.tensor([[100.0 + 3 ** 0.5 * 100.0], [0.0], [0.0]])
+    heavy_loads = torch.tensor([[0.0], [0.0], [100.0 + 3 ** 0.5 * 100.0]])
+    assert physics_penalty(data, heavy, heavy_loads).item() == pytest.approx(1.0, rel=1e-3)
+
+def test_physics_penalty_is_batched_and_differentiable():
+    from gnn_opf.data.power_networks import load_topology
+    topology = load_topology('case14')
+    data = topology.to_pyg_data()
+    loads = topology.load_p_mw.expand(4, -1)
+    generation = (loads.sum(dim=1, keepdim=True) / 14 * torch.rand(4, 14) * 2).requires_grad_()
+    per_scenario = physics_penalty(data, generation, loads, reduction="none")
+    assert per_scenario.shape == (4,)
+    for i in range(4):
+        single = physics_penalty(data, generation[i].detach().unsqueeze(-1), loads[i].unsqueeze(-1))
+        assert single.item() == pytest.approx(per_scenario[i].item(), rel=1e-4)
+    per_scenario.sum().backward()
+    assert generation.grad is not None and torch.isfinite(generation.grad).all() 
+
+def test_normalized_adjacency_is_cached():
+    edge_index = torch.tensor([[0, 1, 1, 2],
+                               [1, 0, 2, 1]], dtype=torch.long)
+    adjacency = normalized_adjacency(edge_index, 3)
+    assert normalized_adjacency(edge_index, 3) is adjacency, "Normalization should be computed once per topology."
+    # Node 1 has two neighbours plus a self loop, so its self weight is 1/3.
+    assert adjacency.to_dense()[1, 1].item() == pytest.approx(1.0 / 3.0)
+
+def test_forward_shared_matches_forward():
+    """Stacked scenarios through one SpMM match per-graph GCNConv passes."""
+    edge_index = torch.tensor([[0, 1, 2, 3, 0, 2],
+                               [1, 0, 3, 2, 2, 0]], dtype=torch.long)
+    x = torch.rand(5, 4, 1) * 230.0
+    model = PhysicsInformedGNN()
+    adjacency = normalized_adjacency(edge_index, 4)
+    with torch.no_grad():
+        shared = model.forward_shared(x, adjacency)
+        single = torch.stack([model(Data(x=x[i], edge_index=edge_index)) for i in range(5)])
+    assert shared.shape == (5, 4, 1)
+    assert torch.allclose(shared, single, rtol=1e-4, atol=1e-4)
@@ -1,5 +1,10 @@
 import pytest
-from gnn_opf.data.power_networks import load_power_network, build_graph_from_pandapower, to_pyg_data
+import pandas as pd
+import torch
+from gnn_opf.data.power_networks import (
+    load_power_network, build_graph_from_pandapower, to_pyg_data,
+    build_topology, load_topology, load_network_as_pyg,
+)
 import networkx as nx
 from torch_geometric.data import Data
 
@@ -18,4 +23,48 @@ def test_graph_conversion():
     pyg_data = to_pyg_data(nx_graph)
     assert isinstance(pyg_data, Data), "PyG conversion failed"
     assert pyg_data.num_nodes == len(nx_graph.nodes), "Node count mismatch"
-    assert pyg_data.num_edges == len(nx_graph.edges) * 2, "Edge count mismatch (PyG uses directed edges)" 
\ No newline at end of file
+    assert pyg_data.num_edges == len(nx_graph.edges) * 2, "Edge count mismatch (PyG uses directed edges)" 
+
+def test_topology_matches_networkx_conversion():
+    """The vectorized topology should describe the same graph as the networkx path."""
+    pp_net = load_power_network('case14')
+    topology = build_topology(pp_net, 'case14')
+    nx_graph = build_graph_from_pandapower(pp_net)
+
+    assert topology.num_nodes == len(nx_graph.nodes)
+    assert topology.num_lines == len(nx_graph.edges)
+    bus_labels = topology.bus_index.tolist()
+    for k in range(topology.num_lines):
+        u = bus_labels[topology.edge_index[0, k]]
+        v = bus_labels[topology.edge_index[1, k]]
+        attrs = nx_graph.edges[u, v]
+        assert topology.x_ohm[k].item() == pytest.approx(attrs["x_ohm"], rel=1e-6)
+        assert topology.capacity[k].item() == pytest.approx(attrs["capacity"], rel=1e-6)
+    # The second half of edge_index holds the reverse direction of every line.
+    L = topology.num_lines
+    assert torch.equal(topology.edge_index[:, L:], topology.edge_index[:, :L].flip(0))
+    assert topology.load_p_mw.sum().item() == pytest.approx(pp_net.load.p_mw.sum(), rel=1e-5)
+
+def test_parallel_lines_are_merged():
+    """Parallel lines collapse into one equivalent line."""
+    pp_net = load_power_network('case14')
+    first = pp_net.line.iloc[[0]].copy()
+    first.index = [pp_net.line.index.max() + 1]
+    pp_net.line = pd.concat([pp_net.line, first])
+
+    topology = build_topology(pp_net)
+    reference = build_topology(load_power_network('case14'))
+    assert topology.num_lines == reference.num_lines
+    k = ((topology.edge_index[0] == 0) & (topology.edge_index[1] == 1)).nonzero()[0, 0]
+    assert topology.x_ohm[k].item() == pytest.approx(reference.x_ohm[k].item() / 2, rel=1e-5)
+    assert topology.capacity[k].item() == pytest.approx(reference.capacity[k].item() * 2, rel=1e-5)
+
+def test_load_topology_is_cached():
+    """Repeated loads of the same case return the shared topology."""
+    first = load_topology('case14')
+    second = load_topology('case14')
+    assert first is second
+    data = load_network_as_pyg('case14')
+    assert data.edge_index is first.edge_index
+    with pytest.raises(ValueError):
+        load_topology('nonexistent_case')
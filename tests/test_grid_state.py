@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+import torch
+from torch_geometric.data import Data
+from gnn_opf.data.grid_state import GridState
+from gnn_opf.data.power_networks import load_topology
+from gnn_opf.data.scenario_store import scenario_bus_loads, scenario_load_features
+from gnn_opf.gnn_opf import PhysicsInformedGNN, physics_penalty
+from gnn_opf.train_gnn import set_network_loads
+
+def test_model_input_is_updated_in_place():
+    state = GridState.from_case('case14')
+    assert torch.equal(state.loads, load_topology('case14').load_p_mw)
+    loads_ptr, x_ptr = state.loads.data_ptr(), state.x.data_ptr()
+    state.set_loads(torch.arange(14, dtype=torch.float))
+    state.scale_loads(2.0)
+    assert torch.equal(state.graph.x[:, 0], state.loads)
+    state.apply_scenario(3)
+    assert state.loads.data_ptr() == loads_ptr
+    assert state.x.data_ptr() == x_ptr and state.graph.x.data_ptr() == x_ptr
+
+def test_apply_scenario_matches_training_features():
+    state = GridState.from_case('case30')
+    scenarios = torch.tensor([0.0, 4.0, 9.0])
+    features = scenario_load_features(state.topology, scenarios)
+    loads = scenario_bus_loads(state.topology, scenarios)
+    for x, bus_loads, current in zip(features, loads, state.iter_scenarios([0, 4, 9])):
+        assert torch.allclose(current.x, x)
+        assert torch.allclose(current.loads, bus_loads)
+
+def test_partial_updates():
+    state = GridState.from_case('case14', loads=torch.zeros(14))
+    state.update_loads([1, 1, 5], torch.tensor([2.0, 3.0, 4.0]))
+    assert state.loads[1] == 5.0 and state.loads[5] == 4.0
+    state.assign_loads([1, 2], 7.0)
+    assert state.loads[1] == 7.0 and state.loads[2] == 7.0 and state.loads[5] == 4.0
+    state.set_generation(1.0)
+    assert torch.equal(state.injections, 1.0 - state.loads)
+    state.reset()
+    assert torch.equal(state.loads, state.base_loads) and state.generation.abs().sum() == 0
+    # The shared topology is never written to.
+    assert torch.equal(load_topology('case14').load_p_mw, state.base_loads)
+    with pytest.raises(ValueError):
+        state.set_loads(torch.zeros(3))
+
+def test_predict_and_penalty_follow_updates():
+    state = GridState.from_case('case14')
+    model = PhysicsInformedGNN().eval()
+    for scenario in (1, 6):
+        state.apply_scenario(scenario)
+        predictions = state.predict(model)
+        with torch.no_grad():
+            expected = model(Data(x=state.x.clone(), edge_index=state.topology.edge_index))
+        assert torch.allclose(predictions, expected, atol=1e-5)
+        # The penalty balances the MW loads of the scenario, not the voltage-derived input.
+        loads = scenario_bus_loads(state.topology, torch.tensor([float(scenario)]))[0]
+        assert torch.allclose(state.loads, loads)
+        assert state.penalty(predictions).item() == pytest.approx(
+            physics_penalty(state.topology, predictions, loads=loads).item())
+
+def test_set_network_loads_is_vectorized():
+    class Network:
+        buses = pd.DataFrame({"v_nom": [110.0, 220.0, 20.0]}, index=["a", "b", "c"])
+    set_network_loads(Network, scenario=5, load_variation=0.3)
+    assert Network.buses["load"].tolist() == pytest.approx([v * 1.15 for v in (110.0, 220.0, 20.0)])
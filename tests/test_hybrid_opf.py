@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+import torch
+
+pytest.importorskip("highspy")
+
+from gnn_opf.gnn_opf import PhysicsInformedGNN
+from gnn_opf.hybrid_opf import HybridOPFSolver, compare_hybrid, train_dispatch_model
+
+def _cold(solver, load_p_mw):
+    solver.opf.monitor_branches()
+    return solver.opf.solve(load_p_mw, warm_start=False)
+
+def test_trained_model_cuts_iterations():
+    model = train_dispatch_model("case118", num_scenarios=64, num_epochs=100)
+    solver = HybridOPFSolver(model, "case118")
+    load_p_mw = solver.opf.base_load_p_mw * 1.1
+    cold = _cold(solver, load_p_mw)
+    hybrid = solver.solve(load_p_mw)
+    assert hybrid.solution.converged
+    assert hybrid.solution.total_cost == pytest.approx(cold.total_cost, rel=1e-9)
+    assert hybrid.iterations < cold.iterations / 5
+
+def test_violated_branches_are_enforced_again():
+    # An infinitely negative margin monitors no branch, so every binding one must be re-added.
+    torch.manual_seed(0)
+    solver = HybridOPFSolver(PhysicsInformedGNN(), "case39", screen_margin=-np.inf, branch_limit_scale=0.8)
+    load_p_mw = solver.opf.base_load_p_mw
+    cold = _cold(solver, load_p_mw)
+    hybrid = solver.solve(load_p_mw)
+    assert hybrid.readded > 0 and hybrid.rounds > 1
+    assert len(solver.opf.branch_violations()) == 0
+    assert hybrid.solution.total_cost == pytest.approx(cold.total_cost, rel=1e-9)
+    assert np.allclose(hybrid.solution.gen_p_mw, cold.gen_p_mw, atol=1e-6)
+
+def test_compare_hybrid_reports_modes():
+    rows = compare_hybrid(cases=("case14",), num_scenarios=3, num_train_scenarios=16, num_epochs=10)
+    assert [r["mode"] for r in rows] == ["cold", "hybrid", "hybrid_full"]
+    assert all(r["converged"] == 1.0 for r in rows)
+    assert all(r["max_cost_gap"] < 1e-8 for r in rows)
@@ -0,0 +1,40 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+def run_python(code, env=None):
+    env = {**os.environ, **(env or {}), "PYTHONPATH": str(ROOT)}
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def test_import_package_is_lazy():
+    loaded = run_python(
+        "import json, sys, gnn_opf, gnn_opf.data\n"
+        "print(json.dumps([m for m in ('torch', 'pandapower', 'pypsa', 'networkx', 'pandas') if m in sys.modules]))"
+    )
+    assert loaded == []
+
+def test_submodules_resolve_on_attribute_access():
+    import gnn_opf
+    assert gnn_opf.instrumentation.enabled() in (True, False)
+    assert "train_gnn" in dir(gnn_opf)
+    assert gnn_opf.data.power_networks.TOPOLOGY_CACHE_SIZE > 0
+
+def test_inference_does_not_load_pandapower_with_cached_topology(tmp_path):
+    env = {"GNN_OPF_CACHE_DIR": str(tmp_path)}
+    # Populate the topology cache in a separate process.
+    run_python("from gnn_opf.data.power_networks import load_topology; load_topology('case14'); print(1)", env)
+    loaded = run_python(
+        "import json, sys\n"
+        "from gnn_opf.gnn_opf import PhysicsInformedGNN\n"
+        "from gnn_opf.inference_engine import InferenceEngine\n"
+        "with InferenceEngine(model=PhysicsInformedGNN(), cases=['case14']) as engine:\n"
+        "    engine.predict('case14', [1.0] * 14)\n"
+        "print(json.dumps([m for m in ('pandapower', 'pypsa', 'networkx') if m in sys.modules]))",
+        env,
+    )
+    assert loaded == []
@@ -0,0 +1,111 @@
+import torch
+import pytest
+from gnn_opf.gnn_opf import PhysicsInformedGNN
+from gnn_opf.data.power_networks import load_topology
+from gnn_opf.evaluate_gnn import load_model, save_model
+from gnn_opf.inference_cache import InferenceCache, bump_model_version, shared_cache
+from gnn_opf.inference_engine import InferenceEngine
+from gnn_opf.inference_pipeline import run_inference
+
+class CountingGNN(PhysicsInformedGNN):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def forward(self, data):
+        self.calls += 1
+        return super().forward(data)
+
+    def forward_shared(self, x, adjacency):
+        self.calls += 1
+        return super().forward_shared(x, adjacency)
+
+def test_quantized_keys_and_lru_eviction():
+    model = PhysicsInformedGNN()
+    cache = InferenceCache(max_entries=2, resolution_mw=0.01)
+    loads = torch.tensor([10.0, 20.0, 30.0])
+    cache.put(cache.key(model, "case", loads), torch.ones(3, 1), 0.5)
+    # Within the resolution: same key; beyond it: a miss.
+    assert cache.get(cache.key(model, "case", loads + 0.001))[1] == 0.5
+    assert cache.get(cache.key(model, "case", loads + 0.1)) is None
+    assert cache.get(cache.key(PhysicsInformedGNN(), "case", loads)) is None
+
+    cache.put(cache.key(model, "case", loads + 1), torch.ones(3, 1), 1.0)
+    cache.get(cache.key(model, "case", loads))
+    cache.put(cache.key(model, "case", loads + 2), torch.ones(3, 1), 2.0)
+    # loads + 1 was the least recently used entry.
+    assert cache.get(cache.key(model, "case", loads + 1)) is None
+    assert cache.get(cache.key(model, "case", loads)) is not None
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["entries"] == 2
+    assert stats["hits"] == 3 and stats["misses"] == 3
+
+def test_byte_limit_ttl_and_invalidation():
+    now = [0.0]
+    cache = InferenceCache(max_bytes=3 * (400 + 256), ttl_seconds=10, clock=lambda: now[0])
+    model = PhysicsInformedGNN()
+    for i in range(4):
+        cache.put(cache.key(model, "case", torch.tensor([float(i)])), torch.zeros(100), 0.0)
+    assert len(cache) == 3 and cache.stats()["bytes"] <= cache.max_bytes
+
+    now[0] = 11.0
+    assert cache.get(cache.key(model, "case", torch.tensor([3.0]))) is None
+    assert cache.stats()["expirations"] == 1
+
+    cache.put(cache.key(model, "case", torch.tensor([5.0])), torch.zeros(1), 0.0)
+    bump_model_version(model)
+    assert cache.get(cache.key(model, "case", torch.tensor([5.0]))) is None
+    cache.invalidate()
+    assert len(cache) == 0
+
+def test_run_inference_hit_skips_forward():
+    model = CountingGNN()
+    cache = InferenceCache()
+    loads = load_topology("case14").load_p_mw
+    first, penalty = run_inference("case14", model=model, loads=loads, cache=cache)
+    second, cached_penalty = run_inference("case14", model=model, loads=loads.clone(), cache=cache)
+    assert model.calls == 1
+    assert torch.equal(first, second) and penalty == cached_penalty
+    assert cache.stats()["hits"] == 1
+
+def test_in_place_weight_changes_are_not_served_stale():
+    model = CountingGNN()
+    cache = InferenceCache()
+    first, _ = run_inference("case14", model=model, cache=cache)
+    with torch.no_grad():
+        for p in model.parameters():
+            p.add_(1.0)
+    second, _ = run_inference("case14", model=model, cache=cache)
+    assert model.calls == 2 and not torch.equal(first, second)
+
+    optimizer = torch.optim.SGD(model.parameters(), lr=0.1)
+    sum(p.sum() for p in model.parameters()).backward()
+    optimizer.step()
+    run_inference("case14", model=model, cache=cache)
+    model.load_state_dict(PhysicsInformedGNN().state_dict())
+    run_inference("case14", model=model, cache=cache)
+    assert model.calls == 4 and cache.stats()["hits"] == 0
+    run_inference("case14", model=model, cache=cache)
+    assert model.calls == 4
+    cache.invalidate(model)
+    assert len(cache) == 0
+
+def test_engine_serves_repeats_from_cache():
+    model = CountingGNN()
+    loads = torch.rand(14) * 100
+    with InferenceEngine(model=model, cache=InferenceCache()) as engine:
+        first, _ = engine.predict("case14", loads, timeout=10)
+        second, _ = engine.predict("case14", loads, timeout=10)
+        assert engine.cache.stats()["hits"] == 1
+        assert engine.stats["requests"] == 1
+    assert model.calls == 1
+    assert torch.equal(first, second)
+
+def test_load_model_invalidates_shared_cache(tmp_path):
+    path = tmp_path / "model.pth"
+    model = PhysicsInformedGNN()
+    save_model(model, str(path))
+    run_inference("case14", model=model)
+    assert len(shared_cache()) > 0
+    load_model(str(path))
+    assert len(shared_cache()) == 0
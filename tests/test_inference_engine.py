@@ -0,0 +1,50 @@
+import threading
+import torch
+import pytest
+from gnn_opf.gnn_opf import PhysicsInformedGNN
+from gnn_opf.data.power_networks import load_topology
+from gnn_opf.evaluate_gnn import save_model
+from gnn_opf.inference_engine import InferenceEngine
+from gnn_opf.inference_pipeline import run_inference
+
+def test_engine_matches_single_inference():
+    torch.manual_seed(0)
+    model = PhysicsInformedGNN()
+    loads = load_topology('case14').load_p_mw
+    with InferenceEngine(model=model, cases=['case14']) as engine:
+        predictions, penalty = engine.predict('case14', loads, timeout=10)
+    expected, expected_penalty = run_inference('case14', model=model, loads=loads, cache=False)
+    assert torch.allclose(predictions, expected, atol=1e-4)
+    assert penalty == pytest.approx(expected_penalty, rel=1e-5)
+
+def test_concurrent_requests_are_coalesced():
+    model = PhysicsInformedGNN()
+    num_requests = 32
+    loads = torch.rand(num_requests, 14) * 100
+    with InferenceEngine(model=model, max_batch_size=16, max_wait_ms=50) as engine:
+        futures = [None] * num_requests
+        def client(i):
+            futures[i] = engine.submit('case14', loads[i])
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(num_requests)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        results = [f.result(timeout=10) for f in futures]
+        assert engine.stats["requests"] == num_requests
+        assert engine.stats["batches"] < num_requests, "Requests should share forward passes."
+    for i, (predictions, penalty) in enumerate(results):
+        assert predictions.shape == (14, 1)
+        expected, _ = run_inference('case14', model=model, loads=loads[i], cache=False)
+        assert torch.allclose(predictions, expected, atol=1e-3)
+
+def test_engine_loads_checkpoint_and_rejects_bad_input(tmp_path):
+    path = tmp_path / "model.pth"
+    save_model(PhysicsInformedGNN(), str(path))
+    with InferenceEngine(checkpoint_path=str(path)) as engine:
+        with pytest.raises(ValueError):
+            engine.predict('case14', torch.zeros(5), timeout=10)
+        with pytest.raises(ValueError):
+            engine.predict('nonexistent_case', torch.zeros(5), timeout=10)
+        predictions, _ = engine.predict('case14', torch.zeros(14), timeout=10)
+        assert predictions.shape == (14, 1)
@@ -1,3 +1,4 @@
+import pytest
 import torch
 from gnn_opf.inference_pipeline import run_inference
 
@@ -8,4 +9,13 @@ def test_run_inference():
     assert predictions.dim() == 2 and predictions.size(1) == 1, "Predictions should have shape [num_nodes, 1]."
     # Check that the penalty is a non-negative float.
     assert isinstance(penalty, float), "Penalty should be a float."
-    assert penalty >= 0, "Penalty should be non-negative." 
\ No newline at end of file
+    assert penalty >= 0, "Penalty should be non-negative." 
+def test_run_inference_balances_base_loads_in_mw():
+    from gnn_opf.data.power_networks import load_topology
+    from gnn_opf.gnn_opf import PhysicsInformedGNN, physics_penalty
+    topology = load_topology('case14')
+    model = PhysicsInformedGNN()
+    predictions, penalty = run_inference('case14', model=model, cache=False)
+    expected = physics_penalty(topology, predictions, loads=topology.load_p_mw).item()
+    assert penalty == pytest.approx(expected, rel=1e-6)
+    assert penalty != pytest.approx(physics_penalty(topology, predictions, loads=topology.voltage).item())
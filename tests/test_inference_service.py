@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import torch
+from gnn_opf.gnn_opf import PhysicsInformedGNN
+from gnn_opf.inference_engine import InferenceEngine
+from gnn_opf.inference_pipeline import run_inference
+from gnn_opf.inference_service import InferenceClient, InferenceService, LatencyHistogram
+
+def run_with_service(scenario, engine_kwargs=None, **service_kwargs):
+    """Start a service on an ephemeral local port, run scenario(client, service), then shut down."""
+    model = PhysicsInformedGNN()
+
+    async def main():
+        with InferenceEngine(model=model, cases=['case14'], **(engine_kwargs or {})) as engine:
+            async with InferenceService(engine, **service_kwargs) as service:
+                host, port = await service.start(port=0)
+                return await scenario(InferenceClient(host, port), service), model
+
+    return asyncio.run(main())
+
+def test_predict_health_and_metrics():
+    loads = (torch.rand(20, 14) * 100).tolist()
+
+    async def scenario(client, service):
+        responses = await asyncio.gather(*[client.predict('case14', l) for l in loads])
+        return responses, await client.health(), await client.metrics()
+
+    (responses, health, metrics), model = run_with_service(scenario)
+    for (status, payload), l in zip(responses, loads):
+        assert status == 200
+        expected, _ = run_inference('case14', model=model, loads=torch.tensor(l), cache=False)
+        assert torch.allclose(torch.tensor(payload["predictions"]), expected.squeeze(-1), atol=1e-3)
+    assert health == (200, {"status": "ok", "pending": 0, "cases": ["case14"]})
+    status, body = metrics
+    assert status == 200 and body["latency"]["count"] == 20
+
+def test_bad_requests_are_rejected():
+    async def scenario(client, service):
+        return (await client.request("POST", "/predict", {"loads": [1.0]}),
+                await client.predict('case14', [1.0, 2.0]),
+                await client.request("GET", "/unknown"))
+
+    (missing_case, wrong_length, unknown_path), _ = run_with_service(scenario)
+    assert missing_case[0] == 400
+    assert wrong_length[0] == 400
+    assert unknown_path[0] == 404
+
+def test_backpressure_and_timeout():
+    release = threading.Event()
+
+    async def scenario(client, service):
+        model = service.engine.model
+        model.forward_shared = lambda *args: (release.wait(5), type(model).forward_shared(model, *args))[1]
+        slow = asyncio.ensure_future(client.predict('case14', [1.0] * 14))
+        await asyncio.sleep(0.05)
+        rejected = await client.predict('case14', [2.0] * 14)
+        timed_out = await slow
+        # The timed-out request still occupies the engine, so its slot is not freed yet.
+        still_rejected = await client.predict('case14', [3.0] * 14)
+        release.set()
+        while service.pending:
+            await asyncio.sleep(0.01)
+        return rejected, timed_out, still_rejected, await client.predict('case14', [4.0] * 14)
+
+    (rejected, slow, still_rejected, recovered), _ = run_with_service(scenario, max_pending=1, request_timeout=0.3)
+    assert rejected[0] == 503
+    assert slow[0] == 504
+    assert still_rejected[0] == 503
+    assert recovered[0] == 200
+
+def test_concurrent_requests_share_engine_batches():
+    loads = (torch.rand(40, 14) * 100).tolist()
+
+    async def scenario(client, service):
+        responses = await asyncio.gather(*[client.predict('case14', l) for l in loads])
+        return responses, dict(service.engine.stats)
+
+    (responses, stats), _ = run_with_service(scenario, engine_kwargs={"max_wait_ms": 500.0})
+    assert all(status == 200 for status, _ in responses)
+    # Not capped by a thread pool: far fewer than 40 / 8 batches.
+    assert stats["requests"] == 40 and stats["batches"] <= 3
+
+def test_malformed_content_length_is_rejected():
+    async def scenario(client, service):
+        responses = []
+        for length in ("abc", "-5"):
+            reader, writer = await asyncio.open_connection(client.host, client.port)
+            writer.write(f"POST /predict HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode("latin-1"))
+            await writer.drain()
+            responses.append((await reader.readline()).decode("latin-1").split()[1])
+            writer.close()
+        return responses
+
+    responses, _ = run_with_service(scenario)
+    assert responses == ["400", "400"]
+
+def test_unix_socket(tmp_path):
+    path = str(tmp_path / "gnn.sock")
+
+    async def main():
+        with InferenceEngine(model=PhysicsInformedGNN()) as engine:
+            async with InferenceService(engine) as service:
+                await service.start(path=path)
+                return await InferenceClient(path=path).predict('case14', [10.0] * 14)
+
+    status, payload = asyncio.run(main())
+    assert status == 200 and len(payload["predictions"]) == 14
+
+def test_latency_histogram_quantiles():
+    histogram = LatencyHistogram(buckets_ms=(1, 10, 100))
+    for latency in [0.5] * 98 + [50, 500]:
+        histogram.observe(latency)
+    assert histogram.quantile(0.5) == 1.0
+    assert histogram.quantile(0.99) == 100.0
+    assert histogram.to_dict()["counts"] == [98, 0, 1, 1]
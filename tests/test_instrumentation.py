@@ -0,0 +1,63 @@
+import json
+import time
+import pytest
+from gnn_opf import instrumentation
+
+@pytest.fixture
+def recording():
+    instrumentation.reset()
+    instrumentation.enable()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+def test_disabled_records_nothing():
+    instrumentation.disable()
+    instrumentation.reset()
+    with instrumentation.timer("stage"):
+        pass
+    instrumentation.count("items", 3)
+    items = [1, 2]
+    assert instrumentation.timed_iter("wait", items) is items
+    assert instrumentation.snapshot() == {"stages": {}, "counters": {}}
+
+def test_timers_counters_and_table(recording, tmp_path):
+    for _ in range(3):
+        with instrumentation.timer("stage.slow"):
+            time.sleep(0.002)
+    with instrumentation.timer("stage.fast"):
+        pass
+    instrumentation.count("items")
+    instrumentation.count("items", 4)
+    assert list(instrumentation.timed_iter("stage.wait", range(2))) == [0, 1]
+
+    snap = instrumentation.snapshot()
+    slow = snap["stages"]["stage.slow"]
+    assert slow["count"] == 3 and slow["sum_ms"] >= 6 and sum(slow["counts"]) == 3
+    assert snap["stages"]["stage.wait"]["count"] == 2
+    assert snap["counters"] == {"items": 5}
+
+    table = instrumentation.summary_table().splitlines()
+    assert table[1].startswith("stage.slow")
+    assert any(line.startswith("items") for line in table)
+    path = instrumentation.export_json(tmp_path / "stages.json")
+    assert json.loads(open(path).read()) == snap
+
+def test_pipeline_stages_are_recorded(recording):
+    from gnn_opf.inference_pipeline import run_inference
+    run_inference('case14')
+    stages = instrumentation.snapshot()["stages"]
+    assert {"inference.forward", "inference.penalty", "inference.load_topology"} <= set(stages)
+
+def test_profile_writes_trace(recording, tmp_path):
+    import torch
+    with instrumentation.profile("block", trace_dir=tmp_path):
+        with instrumentation.timer("stage.matmul"):
+            torch.ones(8, 8) @ torch.ones(8, 8)
+    trace = json.loads((tmp_path / "block.json").read_text())
+    assert any(event.get("name") == "stage.matmul" for event in trace["traceEvents"])
+
+def test_profile_is_noop_without_trace_dir(recording, monkeypatch, tmp_path):
+    monkeypatch.delenv("GNN_OPF_TRACE_DIR", raising=False)
+    with instrumentation.profile("block") as profiler:
+        assert profiler is None
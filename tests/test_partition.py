@@ -0,0 +1,70 @@
+import torch
+import pytest
+from gnn_opf.data.power_networks import load_topology
+from gnn_opf.data.scenario_store import scenario_load_features
+from gnn_opf.gnn_opf import PhysicsInformedGNN, normalized_adjacency
+from gnn_opf.partition import (
+    activation_bytes,
+    partition_for_budget,
+    partition_topology,
+    partitioned_backward,
+    predict_partitioned,
+    spectral_partition,
+    train_partitioned,
+)
+
+def test_spectral_partition_is_balanced_cover():
+    topology = load_topology('case118')
+    parts = spectral_partition(topology.edge_index, topology.num_nodes, 5)
+    counts = torch.bincount(parts, minlength=5)
+    assert counts.sum() == topology.num_nodes
+    assert counts.max() - counts.min() <= 1
+    # Spectral bisection cuts far fewer lines than a random assignment.
+    src, dst = topology.edge_index
+    cut = (parts[src] != parts[dst]).float().mean()
+    assert cut < 0.3
+
+def test_stitched_predictions_match_full_graph():
+    topology = load_topology('case118')
+    partition = partition_topology(topology, 6)
+    model = PhysicsInformedGNN()
+    ids = torch.arange(4, dtype=torch.float)
+    features = scenario_load_features(topology, ids)
+    with torch.no_grad():
+        expected = model.forward_shared(features, normalized_adjacency(topology.edge_index, topology.num_nodes))
+        stitched = predict_partitioned(model, partition, lambda nodes: features[:, nodes])
+    assert torch.allclose(stitched, expected, atol=1e-4)
+
+def test_partitioned_gradient_matches_full_graph():
+    topology = load_topology('case118')
+    partition = partition_topology(topology, 4)
+    model = PhysicsInformedGNN()
+    features = scenario_load_features(topology, torch.arange(5, dtype=torch.float))
+    targets = torch.linspace(1000, 2000, 5)
+
+    adjacency = normalized_adjacency(topology.edge_index, topology.num_nodes)
+    loss = ((model.forward_shared(features, adjacency).mean(dim=(1, 2)) - targets) ** 2).mean()
+    loss.backward()
+    expected = [p.grad.clone() for p in model.parameters()]
+    model.zero_grad()
+
+    partitioned_loss = partitioned_backward(model, partition, lambda nodes: features[:, nodes], targets)
+    assert partitioned_loss.item() == pytest.approx(loss.item(), rel=1e-5)
+    for grad, p in zip(expected, model.parameters()):
+        assert torch.allclose(p.grad, grad, rtol=1e-4, atol=1e-3)
+
+def test_budget_bounds_cluster_size():
+    topology = load_topology('case300')
+    model = PhysicsInformedGNN()
+    budget_mb = activation_bytes(model, topology.num_nodes, 64) / 2 ** 20 / 3
+    partition = partition_for_budget(topology, model, 64, budget_mb)
+    assert len(partition.clusters) > 1
+    assert activation_bytes(model, partition.max_cluster_nodes, 64) <= budget_mb * 2 ** 20
+    with pytest.raises(ValueError):
+        partition_for_budget(topology, model, 64, 1e-4)
+
+def test_train_partitioned():
+    scenarios = [{"scenario": float(i % 10), "total_cost": 1000.0 + i} for i in range(16)]
+    model, partition = train_partitioned(scenarios, case_name='case30', num_epochs=2, batch_size=8, num_parts=3)
+    assert isinstance(model, PhysicsInformedGNN)
+    assert len(partition.clusters) == 3
@@ -0,0 +1,26 @@
+import pytest
+import pandapower
+from gnn_opf.data.power_networks import load_power_network, load_network_as_pyg, load_topology
+from torch_geometric.data import Data
+
+def test_load_power_network():
+    """Test loading a power network test case."""
+    network = load_power_network('case14')
+    assert isinstance(network, pandapower.auxiliary.pandapowerNet), "load_power_network did not return a pandapower network."
+
+def test_load_network_as_pyg():
+    """Test loading a power network directly as PyG data."""
+    data = load_network_as_pyg('case14')
+    assert isinstance(data, Data), "load_network_as_pyg did not return a PyG Data object."
+
+def test_load_topology():
+    """The IEEE 14-bus topology has 14 buses and MW base loads."""
+    topology = load_topology('case14')
+    assert topology.num_nodes == 14, "Number of buses does not match the case."
+    assert topology.num_lines >= 1, "Expected at least one branch in the topology."
+    assert topology.load_p_mw.sum().item() == pytest.approx(load_power_network('case14').load.p_mw.sum(), rel=1e-6)
+
+def test_invalid_case_name():
+    """Test that loading an invalid case name raises an error."""
+    with pytest.raises(ValueError):
+        load_power_network('nonexistent_case')
@@ -1,7 +1,8 @@
 import os
 import csv
+import numpy as np
 import pytest
-from gnn_opf.pypsa_data_generation import generate_opf_scenarios
+from gnn_opf.pypsa_data_generation import generate_opf_scenarios, iter_opf_scenarios
 
 def test_generate_opf_scenarios():
     output_file = generate_opf_scenarios(num_scenarios=5)
@@ -15,4 +16,21 @@ def test_generate_opf_scenarios():
         assert "total_cost" in header, "'total_cost' column not found in CSV header."
         # Ensure there's at least one data row.
         data_row = next(reader, None)
-        assert data_row is not None, "No data rows found in CSV output." 
\ No newline at end of file
+        assert data_row is not None, "No data rows found in CSV output."
+
+def test_scenarios_are_solved_opf():
+    results = list(iter_opf_scenarios(num_scenarios=3, case_name="case14"))
+    assert [r["scenario"] for r in results] == [0, 1, 2]
+    for r in results:
+        assert r["converged"], "case14 DC OPF should converge."
+        # Lossless DC OPF: total dispatch balances total load.
+        assert r["gen_p_mw"].sum() == pytest.approx(r["load_p_mw"].sum(), rel=1e-4)
+        assert r["total_cost"] > 0
+
+def test_results_independent_of_worker_count():
+    serial = {r["scenario"]: r for r in iter_opf_scenarios(num_scenarios=4, num_workers=1, seed=7)}
+    parallel = {r["scenario"]: r for r in iter_opf_scenarios(num_scenarios=4, num_workers=2, seed=7)}
+    assert serial.keys() == parallel.keys()
+    for i in serial:
+        assert np.allclose(serial[i]["load_p_mw"], parallel[i]["load_p_mw"])
+        assert serial[i]["total_cost"] == pytest.approx(parallel[i]["total_cost"])
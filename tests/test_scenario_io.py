@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from gnn_opf.data.scenario_io import (
+    ParquetScenarioWriter, dataset_metadata, is_parquet_path, read_scenario_table, written_scenarios,
+)
+
+pytest.importorskip("pyarrow")
+
+def make_result(i, num_buses=3, converged=True):
+    return {
+        "scenario": i,
+        "total_cost": 100.0 + i,
+        "bus1_load": 10.0 + i,
+        "converged": converged,
+        "load_p_mw": np.arange(num_buses, dtype=float) + i,
+        "gen_p_mw": np.ones(num_buses) * i,
+    }
+
+def test_writer_flushes_fixed_size_chunks(tmp_path):
+    path = tmp_path / "scenarios.parquet"
+    with ParquetScenarioWriter(path, chunk_size=2) as writer:
+        for i in [3, 0, 1, 2, 4]:
+            writer.write(make_result(i))
+    assert len(list(path.glob("part-*.parquet"))) == 3
+    table = read_scenario_table(path)
+    assert table.column("scenario").to_pylist() == [0, 1, 2, 3, 4]
+    loads = table.column("load_p_mw").to_pylist()
+    assert np.allclose(loads[2], [2.0, 3.0, 4.0])
+
+def test_column_projection_and_converged_filter(tmp_path):
+    path = tmp_path / "scenarios.parquet"
+    with ParquetScenarioWriter(path) as writer:
+        writer.write(make_result(0))
+        writer.write(make_result(1, converged=False))
+    table = read_scenario_table(path, columns=["total_cost"])
+    assert table.column_names == ["total_cost"]
+    assert table.column("total_cost").to_pylist() == [100.0]
+    assert written_scenarios(path) == {0, 1}
+    assert is_parquet_path(path)
+
+def test_generate_parquet_resumes(tmp_path, monkeypatch):
+    from gnn_opf.pypsa_data_generation import generate_opf_scenarios
+    from gnn_opf.train_gnn import read_scenarios
+    from gnn_opf.baseline_opf import OPFDataset
+    monkeypatch.chdir(tmp_path)
+
+    path = generate_opf_scenarios(num_scenarios=2, output_format="parquet", chunk_size=1)
+    assert written_scenarios(path) == {0, 1}
+    first = read_scenario_table(path).column("total_cost").to_pylist()
+
+    path = generate_opf_scenarios(num_scenarios=4, output_format="parquet", chunk_size=1, resume=True)
+    assert written_scenarios(path) == {0, 1, 2, 3}
+    table = read_scenario_table(path)
+    assert table.column("total_cost").to_pylist()[:2] == first
+    assert len(table.column("gen_p_mw")[0]) == 14
+
+    scenarios = read_scenarios(path)
+    assert [s["scenario"] for s in scenarios] == [0.0, 1.0, 2.0, 3.0]
+    assert len(OPFDataset(path)) == 4
+    assert dataset_metadata(path) == {"case_name": "case14", "seed": 42, "load_variation": 0.3,
+                                      "solver": "pandapower"}
+
+    with pytest.raises(ValueError, match="Cannot resume"):
+        generate_opf_scenarios(num_scenarios=5, output_format="parquet", chunk_size=1, resume=True, seed=1)
+    assert written_scenarios(path) == {0, 1, 2, 3}
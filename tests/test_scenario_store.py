@@ -0,0 +1,95 @@
+import csv
+import torch
+import pytest
+from gnn_opf.data.power_networks import load_topology
+from gnn_opf.data.scenario_store import (
+    ScenarioStore, build_scenario_store, scenario_bus_loads, scenario_load_features,
+)
+
+def make_scenarios(num_scenarios=6):
+    return [{"scenario": float(i), "total_cost": 1000.0 + 10.0 * i} for i in range(num_scenarios)]
+
+def test_store_shapes():
+    store = build_scenario_store(make_scenarios(6))
+    assert len(store) == 6
+    assert store.features.shape == (6, 14, 1), "Features should be [num_scenarios, num_buses, 1]."
+    assert store.targets.shape == (6,)
+    assert store.edge_index is load_topology('case14').edge_index, "Topology should be shared."
+
+def test_features_follow_load_mapping():
+    """Features reproduce v_nom * (1 + load_variation * scenario / 10) per bus."""
+    topology = load_topology('case14')
+    features = scenario_load_features(topology, torch.tensor([0.0, 5.0]), load_variation=0.3)
+    assert torch.allclose(features[0, :, 0], topology.voltage)
+    assert torch.allclose(features[1, :, 0], topology.voltage * 1.15)
+
+def test_bus_loads_are_scaled_base_loads_in_mw():
+    topology = load_topology('case14')
+    loads = scenario_bus_loads(topology, torch.tensor([0.0, 5.0]), load_variation=0.3)
+    assert torch.allclose(loads[0], topology.load_p_mw)
+    assert torch.allclose(loads[1], topology.load_p_mw * 1.15)
+    store = build_scenario_store(make_scenarios(4))
+    features, targets, batch_loads = store.stack([3, 1])
+    assert torch.equal(batch_loads, store.loads[[3, 1]])
+    assert torch.equal(store.collate([3, 1]).loads, store.loads[[3, 1]].reshape(-1))
+
+def test_graph_view():
+    store = build_scenario_store(make_scenarios(3))
+    graph = store.graph(2)
+    assert torch.equal(graph.x, store.features[2])
+    assert graph.y.item() == pytest.approx(1020.0)
+    assert graph.num_nodes == 14
+
+def test_mismatched_shapes_rejected():
+    topology = load_topology('case14')
+    with pytest.raises(ValueError):
+        ScenarioStore(topology, torch.zeros(2, 5, 1), torch.zeros(2), torch.zeros(2))
+
+def test_train_gnn_from_store(tmp_path):
+    from gnn_opf.train_gnn import train_gnn
+    csv_path = tmp_path / "scenarios.csv"
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["scenario", "total_cost", "bus1_load"])
+        writer.writeheader()
+        for s in make_scenarios(4):
+            writer.writerow({**s, "bus1_load": 10.0})
+    model = train_gnn(num_epochs=2, learning_rate=0.01, csv_path=str(csv_path))
+    assert isinstance(model, torch.nn.Module)
+    model = train_gnn(num_epochs=2, learning_rate=0.01, csv_path=str(csv_path), batch_size=3, shuffle=True)
+    assert isinstance(model, torch.nn.Module)
+    model = train_gnn(num_epochs=2, learning_rate=0.01, csv_path=str(csv_path), batch_size=3,
+                      shared_topology=True)
+    assert isinstance(model, torch.nn.Module)
+
+def test_collate_builds_disjoint_union():
+    store = build_scenario_store(make_scenarios(5))
+    batch = store.collate([4, 1, 2])
+    N = store.num_nodes
+    E = store.edge_index.size(1)
+    assert batch.x.shape == (3 * N, 1)
+    assert torch.equal(batch.x[N:2 * N], store.features[1])
+    assert batch.edge_index.shape == (2, 3 * E)
+    assert torch.equal(batch.edge_index[:, E:2 * E], store.edge_index + N)
+    assert torch.equal(batch.batch.bincount(), torch.full((3,), N))
+    assert torch.equal(batch.y, store.targets[[4, 1, 2]])
+
+def test_batched_forward_matches_single_graphs():
+    """Per-graph segment means of a packed batch equal single-graph means."""
+    from torch_geometric.nn import global_mean_pool
+    from gnn_opf.gnn_opf import PhysicsInformedGNN
+    store = build_scenario_store(make_scenarios(4))
+    model = PhysicsInformedGNN()
+    batch = store.collate(list(range(4)))
+    with torch.no_grad():
+        batched = global_mean_pool(model(batch), batch.batch).squeeze(-1)
+        single = torch.stack([model(store.graph(i)).mean() for i in range(4)])
+    assert torch.allclose(batched, single, rtol=1e-5)
+
+def test_scenario_loader_covers_every_scenario():
+    from gnn_opf.data.scenario_store import scenario_loader
+    store = build_scenario_store(make_scenarios(10))
+    loader = scenario_loader(store, batch_size=4, shuffle=True, generator=torch.Generator().manual_seed(0))
+    sizes = [batch.num_graphs for batch in loader]
+    assert sizes == [4, 4, 2]
+    targets = torch.cat([batch.y for batch in loader])
+    assert torch.equal(targets.sort().values, store.targets.sort().values)
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+import torch
+from gnn_opf.data.dc_model import dc_network
+from gnn_opf.data.power_networks import build_topology, load_power_network, load_topology
+from gnn_opf.data.sensitivities import (
+    compute_lodf, compute_ptdf, load_sensitivities, sensitivity_cache_path,
+)
+
+def test_ptdf_reproduces_dc_flows():
+    network = dc_network(load_topology('case30'))
+    ptdf = compute_ptdf(network, block_size=7)
+    injections = torch.randn(3, network.num_nodes, dtype=torch.float64)
+    injections -= injections.mean(dim=1, keepdim=True)
+    expected = network.line_flows(injections.float()).double()
+    assert np.allclose(ptdf @ injections.numpy().T, expected.numpy().T, atol=1e-3)
+
+@pytest.mark.parametrize("case_name", ['case14', 'case30'])
+def test_ptdf_matches_pandapower(case_name):
+    """Rows match pandapower's makePTDF on the same branches, transformers included."""
+    import pandapower as pp
+    from pandapower.pypower.idx_brch import F_BUS, T_BUS
+    from pandapower.pypower.makePTDF import makePTDF
+    net = load_power_network(case_name)
+    pp.rundcpp(net)
+    ppci = net._ppc["internal"]
+    lookup = np.asarray(net._pd2ppc_lookups["bus"])[net.bus.index.values]
+    network = dc_network(build_topology(net, case_name))
+    expected = makePTDF(ppci["baseMVA"], ppci["bus"], ppci["branch"], slack=lookup[network.reference[0]])
+    ptdf = compute_ptdf(network).toarray()
+
+    position = np.empty(len(ppci["bus"]), dtype=np.int64)
+    position[lookup] = np.arange(len(lookup))
+    rows = {(f, t): k for k, (f, t) in enumerate(zip(network.from_bus, network.to_bus))}
+    assert len(ppci["branch"]) == network.num_lines
+    for branch, row in zip(ppci["branch"], expected):
+        f, t = position[int(branch[F_BUS].real)], position[int(branch[T_BUS].real)]
+        sign = 1.0 if f < t else -1.0
+        assert np.allclose(ptdf[rows[min(f, t), max(f, t)]], sign * row[lookup], atol=1e-8)
+
+def test_lodf_predicts_post_outage_flows():
+    """Flows after an outage equal base flows plus LODF times the outaged flow."""
+    from gnn_opf.data.dc_model import DCNetwork
+    topology = load_topology('case30')
+    network = dc_network(topology)
+    lodf, islanding = compute_lodf(network, block_size=5)
+    injections = torch.randn(1, network.num_nodes, dtype=torch.float64)
+    injections -= injections.mean()
+    base = network.line_flows(injections.float()).double().numpy()[0]
+
+    outage = int(np.flatnonzero(~islanding)[0])
+    keep = torch.ones(topology.edge_index.size(1), dtype=torch.bool)
+    keep[[outage, outage + topology.num_lines]] = False
+    outaged = DCNetwork(topology.edge_index[:, keep], topology.x_ohm[keep], topology.capacity[keep],
+                        topology.voltage, topology.sn_mva)
+    after = outaged.line_flows(injections.float()).double().numpy()[0]
+    predicted = np.delete(base + lodf[:, outage].toarray()[:, 0] * base[outage], outage)
+    assert np.allclose(predicted, after, atol=1e-2)
+    assert lodf[outage, outage] == -1.0
+
+@pytest.mark.parametrize("case_name", ['case14', 'case118'])
+def test_islanding_lines_are_the_bridges_of_the_grid(case_name):
+    """Only outages that disconnect pandapower's own bus-branch graph are flagged."""
+    import networkx as nx
+    import pandapower.topology as top
+    net = load_power_network(case_name)
+    network = dc_network(load_topology(case_name))
+    _, islanding = compute_lodf(network)
+    labels = net.bus.index.values
+    flagged = {frozenset((labels[network.from_bus[k]], labels[network.to_bus[k]]))
+               for k in np.flatnonzero(islanding)}
+    graph = nx.Graph(top.create_nxgraph(net, multi=False))
+    assert flagged == {frozenset(edge) for edge in nx.bridges(graph)}
+
+def test_radial_lines_are_islanding():
+    network = dc_network(load_topology('case33bw'))  # radial distribution feeder with ties open
+    _, islanding = compute_lodf(network)
+    assert islanding.any()
+
+def test_threshold_and_disk_cache(tmp_path):
+    dense = load_sensitivities('case30', 0.0, tmp_path)
+    sparse = load_sensitivities('case30', 0.05, tmp_path)
+    assert sparse.ptdf.nnz < dense.ptdf.nnz
+    assert np.all(np.abs(sparse.ptdf.data) > 0.05)
+    assert sensitivity_cache_path('case30', 0.05, tmp_path).exists()
+
+    load_sensitivities.cache_clear()
+    reloaded = load_sensitivities('case30', 0.05, tmp_path)
+    assert (reloaded.ptdf != sparse.ptdf).nnz == 0
+    assert (reloaded.lodf != sparse.lodf).nnz == 0
+
+    ptdf = reloaded.ptdf_tensor()
+    assert ptdf.layout == torch.sparse_csr and ptdf.shape == reloaded.ptdf.shape
+    x = torch.randn(reloaded.ptdf.shape[1], 4)
+    assert torch.allclose(ptdf @ x, torch.from_numpy(reloaded.ptdf @ x.numpy()).float(), atol=1e-4)
@@ -0,0 +1,49 @@
+import pytest
+import torch
+from gnn_opf.data import topology_cache
+from gnn_opf.data.power_networks import load_power_network, build_topology
+from gnn_opf.data.topology_cache import cache_path, load_cached_topology, read_topology, write_topology
+
+def test_round_trip(tmp_path):
+    """A written topology reads back identically through the memory map."""
+    topology = build_topology(load_power_network('case14'), 'case14')
+    path = tmp_path / "case14.topo"
+    write_topology(topology, path)
+    loaded = read_topology(path)
+    assert loaded.case_name == 'case14'
+    assert loaded.sn_mva == topology.sn_mva
+    for name in ["bus_index", "voltage", "load_p_mw", "edge_index", "r_ohm", "x_ohm", "capacity"]:
+        assert torch.equal(getattr(loaded, name), getattr(topology, name)), f"{name} differs"
+
+def test_load_cached_topology_compiles_once(tmp_path):
+    """The first load compiles the case, later loads read the artifact."""
+    first = load_cached_topology('case14', cache_dir=tmp_path)
+    path = cache_path('case14', tmp_path)
+    assert path.exists()
+    mtime = path.stat().st_mtime_ns
+    second = load_cached_topology('case14', cache_dir=tmp_path)
+    assert path.stat().st_mtime_ns == mtime
+    assert torch.equal(first.edge_index, second.edge_index)
+
+def test_stale_entries_are_replaced(tmp_path, monkeypatch):
+    """Entries from another pandapower version are removed and rebuilt."""
+    monkeypatch.setattr(topology_cache, "pandapower_version", lambda: "0.0.0")
+    load_cached_topology('case14', cache_dir=tmp_path)
+    stale = cache_path('case14', tmp_path)
+    assert stale.exists()
+    monkeypatch.undo()
+    with pytest.raises(ValueError):
+        read_topology(stale)
+
+    load_cached_topology('case14', cache_dir=tmp_path)
+    assert not stale.exists()
+    assert cache_path('case14', tmp_path).exists()
+
+def test_corrupt_entry_is_rebuilt(tmp_path):
+    """A truncated or foreign file is discarded rather than trusted."""
+    path = cache_path('case14', tmp_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"not a topology")
+    topology = load_cached_topology('case14', cache_dir=tmp_path)
+    assert topology.num_nodes == 14
+    assert read_topology(path).num_nodes == 14
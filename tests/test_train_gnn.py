@@ -1,32 +1,34 @@
-import os
+import pandas as pd
 import torch
 import pytest
 from gnn_opf.train_gnn import read_scenarios, set_network_loads, train_gnn
-from gnn_opf.pypsa_setup import load_network_config
-from gnn_opf.data.power_networks import load_network_as_pyg
 
-def test_read_scenarios():
-    csv_path = "data/generated_opf_scenarios.csv"
-    assert os.path.exists(csv_path), "CSV file for scenarios does not exist."
-    scenarios = read_scenarios(csv_path)
+def write_scenarios(path, n=6):
+    path.write_text("scenario,total_cost\n" + "".join(f"{i}.0,{1000.0 + 10.0 * i}\n" for i in range(n)))
+    return str(path)
+
+def test_read_scenarios(tmp_path):
+    scenarios = read_scenarios(write_scenarios(tmp_path / "scenarios.csv"))
     assert isinstance(scenarios, list), "Scenarios should be returned as a list."
-    assert len(scenarios) > 0, "Scenarios list should not be empty."
+    assert len(scenarios) == 6, "Every row should be read."
     for scenario in scenarios:
         assert "scenario" in scenario and "total_cost" in scenario, "Each scenario must have 'scenario' and 'total_cost' keys."
 
 def test_set_network_loads():
-    network = load_network_config("config/ieee_14-bus_config.yaml")
-    original_loads = {bus: network.buses.at[bus, "v_nom"] for bus in network.buses.index}
+    class Network:
+        buses = pd.DataFrame({"v_nom": [138.0, 138.0, 69.0]})
+    original_loads = Network.buses["v_nom"].copy()
     # Set loads for a dummy scenario value, e.g., scenario = 5
-    set_network_loads(network, scenario=5, load_variation=0.3)
-    for bus in network.buses.index:
-        new_load = network.buses.at[bus, "load"]
+    set_network_loads(Network, scenario=5, load_variation=0.3)
+    for bus in Network.buses.index:
+        new_load = Network.buses.at[bus, "load"]
         assert new_load != original_loads[bus], "Bus load should be updated from its nominal value."
 
-def test_training_pipeline():
+@pytest.mark.parametrize("shared_topology", [False, True])
+def test_training_pipeline(tmp_path, shared_topology):
     # Run training for a small number of epochs and check the trained model type.
-    model = train_gnn(num_epochs=2, learning_rate=0.01)
+    csv_path = write_scenarios(tmp_path / "scenarios.csv")
+    model = train_gnn(num_epochs=2, learning_rate=0.01, csv_path=csv_path, batch_size=3,
+                      shared_topology=shared_topology)
     assert isinstance(model, torch.nn.Module), "Trained model should be an instance of torch.nn.Module."
-
-    # Load test network
-    network = load_network_as_pyg('case14') 
\ No newline at end of file
+    assert all(torch.isfinite(p).all() for p in model.parameters()), "Training should keep the weights finite."